@@ -1,13 +1,21 @@
 import logging
 import math
 import os
+from concurrent import futures
 
 import numpy as np
 import scipy.sparse as sparse
 
+from aspire import config
 from aspire.image import Image
 from aspire.operators import PolarFT
-from aspire.utils import common_line_from_rots, complex_type, fuzzy_mask, tqdm
+from aspire.utils import (
+    common_line_from_rots,
+    complex_type,
+    fuzzy_mask,
+    physical_core_cpu_suggestion,
+    tqdm,
+)
 from aspire.utils.random import choice
 
 logger = logging.getLogger(__name__)
@@ -250,6 +258,13 @@ class CLOrient3D:
     def build_clmatrix_host(self):
         """
         Build common-lines matrix from Fourier stack of 2D images
+
+        Image pairs sharing their second image are searched together,
+        stacking the first images of up to a tile of pairs into a
+        single matrix product per shift.  Second images are processed
+        by `config["abinitio"]["clmatrix_threads"]` threads, each
+        holding correlations of at most
+        `config["abinitio"]["clmatrix_tile_bytes"]`.
         """
 
         n_img = self.n_img
@@ -272,13 +287,6 @@ class CLOrient3D:
         # starts from 0 instead of 1 as Matlab version. -1 means
         # there is no common line such as clmatrix[i,i].
         clmatrix = -np.ones((n_img, n_img), dtype=self.dtype)
-        # When cl_dist[i, j] is not -1, it stores the maximum value
-        # of correlation between image i and j for all possible 1D shifts.
-        # We will use cl_dist[i, j] = -1 (including j<=i) to
-        # represent that there is no need to check common line
-        # between i and j. Since it is symmetric,
-        # only above the diagonal entries are necessary.
-        cl_dist = -np.ones((n_img, n_img), dtype=self.dtype)
 
         # Allocate variables used for shift estimation
 
@@ -301,59 +309,139 @@ class CLOrient3D:
         # Note that only use half of each ray
         pf = self._apply_filter_and_norm("ijk, k -> ijk", pf, r_max, h)
 
-        # Setup a progress bar
-        _total_pairs_to_test = self.n_img * (self.n_check - 1) // 2
-        pbar = tqdm(desc="Searching over common line pairs", total=_total_pairs_to_test)
-
-        # Search for common lines between [i, j] pairs of images.
+        # Build the subset of j images for each i if n_check < n_img.
         # Creating pf and building common lines are different to the Matlab version.
         # The random selection is implemented.
+        idx_i, idx_j = [], []
         for i in range(n_img - 1):
-            p1 = pf[i]
-            p1_real = np.real(p1)
-            p1_imag = np.imag(p1)
-
-            # build the subset of j images if n_check < n_img
             n_remaining = n_img - i - 1
             n_j = min(n_remaining, n_check)
             subset_j = np.sort(choice(n_remaining, n_j, replace=False) + i + 1)
+            idx_i.append(np.full(n_j, i))
+            idx_j.append(subset_j)
+        idx_i = np.concatenate(idx_i)
+        idx_j = np.concatenate(idx_j)
+
+        # Group the pairs by j image.
+        order = np.argsort(idx_j, kind="stable")
+        idx_i, idx_j = idx_i[order], idx_j[order]
+        js, starts = np.unique(idx_j, return_index=True)
+        groups = np.split(idx_i, starts[1:])
+
+        n_threads = config["abinitio"]["clmatrix_threads"].get()
+        if n_threads is None:
+            n_threads = physical_core_cpu_suggestion() or 1
+        # Correlations part1, part2 and their sum for each pair in a tile.
+        tile_bytes = config["abinitio"]["clmatrix_tile_bytes"].get()
+        tile_size = max(1, tile_bytes // (3 * n_theta_half**2 * pf.real.itemsize))
+
+        pf_real = np.ascontiguousarray(pf.real)
+        pf_imag = np.ascontiguousarray(pf.imag)
+
+        def search(j, subset_i):
+            cl1, cl2, shift, found = self._search_cl_pairs(
+                pf_real, pf_imag, pf[j], subset_i, shift_phases, tile_size
+            )
+            i = subset_i[found]
+            clmatrix[i, j] = cl1[found]
+            clmatrix[j, i] = cl2[found]
+            shifts_1d[i, j] = shifts[shift[found]]
+            return len(subset_i)
 
-            for j in subset_j:
-                p2_flipped = np.conj(pf[j])
-
-                for shift in range(len(shifts)):
-                    shift_phase = shift_phases[shift]
-                    p2_shifted_flipped = (shift_phase * p2_flipped).T
-                    # Compute correlations in the positive r direction
-                    part1 = p1_real.dot(np.real(p2_shifted_flipped))
-                    # Compute correlations in the negative r direction
-                    part2 = p1_imag.dot(np.imag(p2_shifted_flipped))
-
-                    c1 = part1 - part2
-                    sidx = c1.argmax()
-                    cl1, cl2 = np.unravel_index(sidx, c1.shape)
-                    sval = c1[cl1, cl2]
-
-                    c2 = part1 + part2
-                    sidx = c2.argmax()
-                    cl1_2, cl2_2 = np.unravel_index(sidx, c2.shape)
-                    sval2 = c2[cl1_2, cl2_2]
-
-                    if sval2 > sval:
-                        cl1 = cl1_2
-                        cl2 = cl2_2 + n_theta_half
-                        sval = sval2
-                    sval = 2 * sval
-                    if sval > cl_dist[i, j]:
-                        clmatrix[i, j] = cl1
-                        clmatrix[j, i] = cl2
-                        cl_dist[i, j] = sval
-                        shifts_1d[i, j] = shifts[shift]
-                pbar.update()
+        # Setup a progress bar
+        pbar = tqdm(desc="Searching over common line pairs", total=len(idx_i))
+
+        # Search for common lines between [i, j] pairs of images.
+        # Threads write disjoint entries, (i, j) and (j, i) for i < j.
+        with futures.ThreadPoolExecutor(max_workers=n_threads) as executor:
+            for n_pairs in executor.map(search, js, groups):
+                pbar.update(n_pairs)
         pbar.close()
 
         return shifts_1d, clmatrix
 
+    @staticmethod
+    def _search_cl_pairs(pf_real, pf_imag, p2, subset_i, shift_phases, tile_size):
+        """
+        Find the common lines between a j image and each of `subset_i`.
+
+        For each pair, the common line and shift with the largest
+        correlation are selected, ties resolving to the first line and
+        shift found.  Each matrix product and comparison matches a
+        pair by pair search, so results are identical.
+
+        :param pf_real: Real part of the filtered polar Fourier
+            transforms of all images, n_img x n_theta_half x r_max.
+        :param pf_imag: Imaginary part of `pf_real`'s transforms.
+        :param p2: Filtered polar Fourier transform of the j image.
+        :param subset_i: Indices of the i images.
+        :param shift_phases: Phases of the 1D shifts searched,
+            n_shifts x r_max.
+        :param tile_size: Number of i images correlated at once.
+        :return: Tuple of common line indices in the i and j images,
+            index of the best shift, and a mask of the pairs with
+            correlation above the no common line sentinel of -1.
+        """
+        n_theta_half, r_max = p2.shape
+        n_pairs = len(subset_i)
+
+        # Shift and flip the j image for all shifts.
+        p2_shifted_flipped = (shift_phases[:, None, :] * np.conj(p2)).swapaxes(1, 2)
+        p2_real = np.ascontiguousarray(p2_shifted_flipped.real)
+        p2_imag = np.ascontiguousarray(p2_shifted_flipped.imag)
+
+        n_shifts = len(shift_phases)
+        sidx1 = np.empty((n_pairs, n_shifts), dtype=int)
+        sidx2 = np.empty_like(sidx1)
+        sval1 = np.empty((n_pairs, n_shifts), dtype=pf_real.dtype)
+        sval2 = np.empty_like(sval1)
+
+        # Work buffers reused across tiles and shifts.
+        shape = (min(tile_size, n_pairs) * n_theta_half, n_theta_half)
+        part1 = np.empty(shape, dtype=pf_real.dtype)
+        part2 = np.empty_like(part1)
+        c2 = np.empty_like(part1)
+
+        for start in range(0, n_pairs, tile_size):
+            tile = slice(start, min(start + tile_size, n_pairs))
+            n_tile = tile.stop - tile.start
+            rows = n_tile * n_theta_half
+            p1_real = pf_real[subset_i[tile]].reshape(rows, r_max)
+            p1_imag = pf_imag[subset_i[tile]].reshape(rows, r_max)
+            tile_pairs = np.arange(n_tile)
+
+            for shift in range(n_shifts):
+                # Compute correlations in the positive r direction
+                np.matmul(p1_real, p2_real[shift], out=part1[:rows])
+                # Compute correlations in the negative r direction
+                np.matmul(p1_imag, p2_imag[shift], out=part2[:rows])
+
+                c2_tile = np.add(part1[:rows], part2[:rows], out=c2[:rows])
+                c1_tile = np.subtract(part1[:rows], part2[:rows], out=part1[:rows])
+
+                c1_tile = c1_tile.reshape(n_tile, -1)
+                c2_tile = c2_tile.reshape(n_tile, -1)
+                sidx = c1_tile.argmax(axis=1)
+                sidx1[tile, shift] = sidx
+                sval1[tile, shift] = c1_tile[tile_pairs, sidx]
+                sidx = c2_tile.argmax(axis=1)
+                sidx2[tile, shift] = sidx
+                sval2[tile, shift] = c2_tile[tile_pairs, sidx]
+
+        use2 = sval2 > sval1
+        sval = 2 * np.where(use2, sval2, sval1)
+        sidx = np.where(use2, sidx2, sidx1)
+
+        # The first shift attaining the largest correlation.
+        best_shift = sval.argmax(axis=1)
+        pairs = np.arange(n_pairs)
+        sidx = sidx[pairs, best_shift]
+        cl1 = sidx // n_theta_half
+        cl2 = sidx % n_theta_half + n_theta_half * use2[pairs, best_shift]
+        found = sval[pairs, best_shift] > -1
+
+        return cl1, cl2, best_shift, found
+
     def build_clmatrix_cu(self):
         """
         Build common-lines matrix from Fourier stack of 2D images
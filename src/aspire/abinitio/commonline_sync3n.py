@@ -1,17 +1,24 @@
+import hashlib
 import logging
+import math
 import os.path
+import tempfile
+import threading
 import warnings
+from concurrent import futures
 
 import numpy as np
 from numpy.linalg import norm
 from scipy.optimize import curve_fit
 
+from aspire import config
 from aspire.abinitio import CLOrient3D, SyncVotingMixin
 from aspire.utils import (
     J_conjugate,
     Rotation,
     all_pairs,
     nearest_rotations,
+    physical_core_cpu_suggestion,
     random,
     tqdm,
     trange,
@@ -123,6 +130,8 @@ class CLSync3N(CLOrient3D, SyncVotingMixin):
         self.J_weighting = J_weighting
         self._D_null = 1e-13
         self.hist_intervals = int(hist_intervals)
+        # Fingerprint and discrepancies of triangles, see `_triangle_data`.
+        self._triangle_cache = None
         # Warn if histogram may be too sparse for curve fitting
         if self.S_weighting and (src.n < hist_intervals):
             logger.warning(
@@ -178,6 +187,9 @@ class CLSync3N(CLOrient3D, SyncVotingMixin):
         if self.S_weighting is True:
             W = self._syncmatrix_weights(Rijs)
 
+        # Release triangles shared by J-synchronization and weighting.
+        self._triangle_cache = None
+
         # Yield rotations from S
         self.rotations = self._sync3n_S_to_rot(S, W)
 
@@ -403,76 +415,30 @@ class CLSync3N(CLOrient3D, SyncVotingMixin):
         """
         See _triangle_scores_inner.
 
-        CPU implementation.
+        CPU implementation, reducing over `_triangle_data`.
         """
 
         # The following is adopted from Matlab triangle_scores_mex.c
 
-        # Initialize probability result arrays
-        scores_hist = np.zeros(self.hist_intervals, dtype=np.uint32)
-
-        c = np.empty((4), dtype=Rijs.dtype)
-        s = np.empty((3), dtype=Rijs.dtype)
-        for i in trange(self.n_img - 2, desc="Computing triangle scores"):
-            for j in range(
-                i + 1, self.n_img - 1
-            ):  # check bound (taken from MATLAB mex)
-                ij = self._pairs_to_linear[i, j]
-                Rij = Rijs[ij]
-                for k in range(j + 1, self.n_img):
-                    ik = self._pairs_to_linear[i, k]
-                    jk = self._pairs_to_linear[j, k]
-                    Rik = Rijs[ik]
-                    Rjk = Rijs[jk]
-
-                    # Compute conjugated rotats
-                    Rij_J = J_conjugate(Rij)
-                    Rik_J = J_conjugate(Rik)
-                    Rjk_J = J_conjugate(Rjk)
-
-                    # Compute R muls and norms
-                    c[0] = np.sum(((Rij @ Rjk) - Rik) ** 2)
-                    c[1] = np.sum(((Rij_J @ Rjk) - Rik) ** 2)
-                    c[2] = np.sum(((Rij @ Rjk_J) - Rik) ** 2)
-                    c[3] = np.sum(((Rij @ Rjk) - Rik_J) ** 2)
-
-                    # Find best match
-                    best_i = np.argmin(c)
-                    best_val = c[best_i]
-
-                    # For each triangle side, find the best alternative
-                    alt_ij_jk = c[self._ALTS[0][best_i][0]]
-                    if c[self._ALTS[1][best_i][0]] < alt_ij_jk:
-                        alt_ij_jk = c[self._ALTS[1][best_i][0]]
-
-                    alt_ik_jk = c[self._ALTS[0][best_i][1]]
-                    if c[self._ALTS[1][best_i][1]] < alt_ik_jk:
-                        alt_ik_jk = c[self._ALTS[1][best_i][1]]
-
-                    alt_ij_ik = c[self._ALTS[0][best_i][2]]
-                    if c[self._ALTS[1][best_i][2]] < alt_ij_ik:
-                        alt_ij_ik = c[self._ALTS[1][best_i][2]]
-
-                    # Compute scores
-                    s[0] = 1 - np.sqrt(best_val / alt_ij_jk)  # s_ij_jk
-                    s[1] = 1 - np.sqrt(best_val / alt_ik_jk)  # s_ik_jk
-                    s[2] = 1 - np.sqrt(best_val / alt_ij_ik)  # s_ij_ik
-
-                    # Update histogram
-                    # Find integer bin [0,self.hist_intervals)
-                    _l1, _l2, _l3 = np.maximum(
-                        np.minimum(
-                            (self.hist_intervals * s).astype(int),  # implicit floor
-                            self.hist_intervals - 1,  # clamp upper bound
-                        ),
-                        0,  # clamp lower bound
-                    )
+        def accumulate(scores_hist, ij, ik, jk, c):
+            s = self._triangle_scores_from_discrepancies(c, np.argmin(c, axis=1))
 
-                    scores_hist[_l1] += 1
-                    scores_hist[_l2] += 1
-                    scores_hist[_l3] += 1
+            # Find integer bin [0,self.hist_intervals)
+            bins = np.clip(
+                (self.hist_intervals * s).astype(int),  # implicit floor
+                0,
+                self.hist_intervals - 1,
+            )
+            scores_hist += np.bincount(bins.ravel(), minlength=self.hist_intervals)
 
-        return scores_hist
+        scores_hist = self._reduce_triangles(
+            Rijs,
+            accumulate,
+            np.zeros(self.hist_intervals, dtype=np.int64),
+            desc="Computing triangle scores",
+        )
+
+        return scores_hist.astype(np.uint32)
 
     def _triangle_scores_inner_cupy(self, Rijs):
         """
@@ -545,97 +511,33 @@ class CLSync3N(CLOrient3D, SyncVotingMixin):
         """
         See _pairs_probabilities.
 
-        CPU implementation.
+        CPU implementation, reducing over `_triangle_data`.
         """
         # The following is adopted from Matlab pairs_probabilities_mex.c `looper`
 
-        # Initialize probability result arrays
-        ln_f_ind = np.zeros(len(Rijs), dtype=Rijs.dtype)
-        ln_f_arb = np.zeros(len(Rijs), dtype=Rijs.dtype)
-
-        c = np.empty((4), dtype=Rijs.dtype)
-        for i in trange(self.n_img - 2, desc="Computing pair probabilities"):
-            for j in range(i + 1, self.n_img - 1):
-                ij = self._pairs_to_linear[i, j]
-                Rij = Rijs[ij]
-                for k in range(j + 1, self.n_img):
-                    ik = self._pairs_to_linear[i, k]
-                    jk = self._pairs_to_linear[j, k]
-                    Rik = Rijs[ik]
-                    Rjk = Rijs[jk]
-
-                    # Compute conjugated rotats
-                    Rij_J = J_conjugate(Rij)
-                    Rik_J = J_conjugate(Rik)
-                    Rjk_J = J_conjugate(Rjk)
-
-                    # Compute R muls and norms
-                    c[0] = np.sum(((Rij @ Rjk) - Rik) ** 2)
-                    c[1] = np.sum(((Rij_J @ Rjk) - Rik) ** 2)
-                    c[2] = np.sum(((Rij @ Rjk_J) - Rik) ** 2)
-                    c[3] = np.sum(((Rij @ Rjk) - Rik_J) ** 2)
-
-                    # Find best match
-                    best_i = np.argmin(c)
-                    best_val = c[best_i]
-
-                    # For each triangle side, find the best alternative
-                    alt_ij_jk = c[self._ALTS[0][best_i][0]]
-                    if c[self._ALTS[1][best_i][0]] < alt_ij_jk:
-                        alt_ij_jk = c[self._ALTS[1][best_i][0]]
-                    alt_ik_jk = c[self._ALTS[0][best_i][1]]
-                    if c[self._ALTS[1][best_i][1]] < alt_ik_jk:
-                        alt_ik_jk = c[self._ALTS[1][best_i][1]]
-                    alt_ij_ik = c[self._ALTS[0][best_i][2]]
-                    if c[self._ALTS[1][best_i][2]] < alt_ij_ik:
-                        alt_ij_ik = c[self._ALTS[1][best_i][2]]
-
-                    # Compute scores
-                    s_ij_jk = 1 - np.sqrt(best_val / alt_ij_jk)
-                    s_ik_jk = 1 - np.sqrt(best_val / alt_ik_jk)
-                    s_ij_ik = 1 - np.sqrt(best_val / alt_ij_ik)
-
-                    # Update probabilities
-                    # # Probability of pair ij having score given indicicative common line
-                    # P2, B, b, x0, A, a
-                    f_ij_jk = np.log(
-                        P2
-                        * (
-                            B
-                            * np.power(1 - s_ij_jk, b)
-                            * np.exp(-b / (1 - x0) * (1 - s_ij_jk))
-                        )
-                        + (1 - P2) * A * np.power((1 - s_ij_jk), a)
-                    )
-                    f_ik_jk = np.log(
-                        P2
-                        * (
-                            B
-                            * np.power(1 - s_ik_jk, b)
-                            * np.exp(-b / (1 - x0) * (1 - s_ik_jk))
-                        )
-                        + (1 - P2) * A * np.power((1 - s_ik_jk), a)
-                    )
-                    f_ij_ik = np.log(
-                        P2
-                        * (
-                            B
-                            * np.power(1 - s_ij_ik, b)
-                            * np.exp(-b / (1 - x0) * (1 - s_ij_ik))
-                        )
-                        + (1 - P2) * A * np.power((1 - s_ij_ik), a)
-                    )
-                    ln_f_ind[ij] += f_ij_jk + f_ij_ik
-                    ln_f_ind[jk] += f_ij_jk + f_ik_jk
-                    ln_f_ind[ik] += f_ik_jk + f_ij_ik
-
-                    # # Probability of pair ij having score given arbitrary common line
-                    f_ij_jk = np.log(A * np.power((1 - s_ij_jk), a))
-                    f_ik_jk = np.log(A * np.power((1 - s_ik_jk), a))
-                    f_ij_ik = np.log(A * np.power((1 - s_ij_ik), a))
-                    ln_f_arb[ij] += f_ij_jk + f_ij_ik
-                    ln_f_arb[jk] += f_ij_jk + f_ik_jk
-                    ln_f_arb[ik] += f_ik_jk + f_ij_ik
+        def accumulate(ln_f, ij, ik, jk, c):
+            s = self._triangle_scores_from_discrepancies(c, np.argmin(c, axis=1))
+
+            # Probability of pair ij having score given indicicative common line
+            f_ind = np.log(
+                P2 * (B * np.power(1 - s, b) * np.exp(-b / (1 - x0) * (1 - s)))
+                + (1 - P2) * A * np.power((1 - s), a)
+            )
+            # Probability of pair ij having score given arbitrary common line
+            f_arb = np.log(A * np.power((1 - s), a))
+
+            for ln_f_x, f in zip(ln_f, (f_ind, f_arb)):
+                f_ij_jk, f_ik_jk, f_ij_ik = f.T
+                np.add.at(ln_f_x, ij, f_ij_jk + f_ij_ik)
+                ln_f_x[jk] += f_ij_jk + f_ik_jk
+                np.add.at(ln_f_x, ik, f_ik_jk + f_ij_ik)
+
+        ln_f_ind, ln_f_arb = self._reduce_triangles(
+            Rijs,
+            accumulate,
+            np.zeros((2, len(Rijs)), dtype=Rijs.dtype),
+            desc="Computing pair probabilities",
+        )
 
         return ln_f_ind, ln_f_arb
 
@@ -817,7 +719,7 @@ class CLSync3N(CLOrient3D, SyncVotingMixin):
         # Synchronize Rijs
         logger.info("Applying global handedness synchronization.")
         mask = sign_ij_J == -1
-        Rijs[mask] = J_conjugate(Rijs[mask])
+        self._J_conjugate_pairs(Rijs, mask)
 
         return Rijs
 
@@ -1079,79 +981,286 @@ class CLSync3N(CLOrient3D, SyncVotingMixin):
         """
         See `_signs_times_v`.
 
-        CPU implementation.
+        CPU implementation, reducing over `_triangle_data`.  The
+        triangles are evaluated once and reused by every power
+        method iteration when they fit the triangle cache.
         """
 
-        new_vec = np.zeros_like(vec)
-
         _signs_confs = np.array(
-            [[1, 1, 1], [-1, 1, -1], [-1, -1, 1], [1, -1, -1]], dtype=int
+            [[1, 1, 1], [-1, 1, -1], [-1, -1, 1], [1, -1, -1]], dtype=vec.dtype
         )
 
-        c = np.empty((4))
+        def accumulate(new_vec, ij, ik, jk, c):
+            # Find best match
+            best_i = np.argmin(c, axis=1)
+
+            # MATLAB: scores_as_entries == 0
+            s = _signs_confs[best_i]
+
+            # Note there was a third J_weighting option (2) in MATLAB,
+            # but it was not exposed at top level.
+            if self.J_weighting:
+                # MATLAB: scores_as_entries == 1
+                s *= self._triangle_scores_from_discrepancies(c, best_i)
+            s_ij_jk, s_ik_jk, s_ij_ik = s.T
+
+            # Update vector entries.
+            # Within one `i` each jk occurs once, while ij and ik repeat.
+            np.add.at(new_vec, ij, s_ij_jk * vec[jk] + s_ij_ik * vec[ik])
+            new_vec[jk] += s_ij_jk * vec[ij] + s_ik_jk * vec[ik]
+            np.add.at(new_vec, ik, s_ij_ik * vec[ij] + s_ik_jk * vec[jk])
+
         desc = "Computing signs_times_v"
         if self.J_weighting:
             desc += " with J_weighting"
-        for i in trange(self.n_img - 2, desc=desc):
-            for j in range(
-                i + 1, self.n_img - 1
-            ):  # check bound (taken from MATLAB mex)
-                ij = self._pairs_to_linear[i, j]
-                Rij = Rijs[ij]
-                for k in range(j + 1, self.n_img):
-                    ik = self._pairs_to_linear[i, k]
-                    jk = self._pairs_to_linear[j, k]
-                    Rik = Rijs[ik]
-                    Rjk = Rijs[jk]
-
-                    # Compute conjugated rotats
-                    Rij_J = J_conjugate(Rij)
-                    Rik_J = J_conjugate(Rik)
-                    Rjk_J = J_conjugate(Rjk)
-
-                    # Compute R muls and norms
-                    c[0] = np.sum(((Rij @ Rjk) - Rik) ** 2)
-                    c[1] = np.sum(((Rij_J @ Rjk) - Rik) ** 2)
-                    c[2] = np.sum(((Rij @ Rjk_J) - Rik) ** 2)
-                    c[3] = np.sum(((Rij @ Rjk) - Rik_J) ** 2)
-
-                    # Find best match
-                    best_i = np.argmin(c)
-                    best_val = c[best_i]
-
-                    # MATLAB: scores_as_entries == 0
-                    s_ij_jk = _signs_confs[best_i][0]
-                    s_ik_jk = _signs_confs[best_i][1]
-                    s_ij_ik = _signs_confs[best_i][2]
-
-                    # Note there was a third J_weighting option (2) in MATLAB,
-                    # but it was not exposed at top level.
-                    if self.J_weighting:
-                        # MATLAB: scores_as_entries == 1
-                        # For each triangle side, find the best alternative
-                        alt_ij_jk = c[self._ALTS[0][best_i][0]]
-                        if c[self._ALTS[1][best_i][0]] < alt_ij_jk:
-                            alt_ij_jk = c[self._ALTS[1][best_i][0]]
-
-                        alt_ik_jk = c[self._ALTS[0][best_i][1]]
-                        if c[self._ALTS[1][best_i][1]] < alt_ik_jk:
-                            alt_ik_jk = c[self._ALTS[1][best_i][1]]
-
-                        alt_ij_ik = c[self._ALTS[0][best_i][2]]
-                        if c[self._ALTS[1][best_i][2]] < alt_ij_ik:
-                            alt_ij_ik = c[self._ALTS[1][best_i][2]]
-
-                        # Compute scores
-                        s_ij_jk *= 1 - np.sqrt(best_val / alt_ij_jk)
-                        s_ik_jk *= 1 - np.sqrt(best_val / alt_ik_jk)
-                        s_ij_ik *= 1 - np.sqrt(best_val / alt_ij_ik)
-
-                    # Update vector entries
-                    new_vec[ij] += s_ij_jk * vec[jk] + s_ij_ik * vec[ik]
-                    new_vec[jk] += s_ij_jk * vec[ij] + s_ik_jk * vec[ik]
-                    new_vec[ik] += s_ij_ik * vec[ij] + s_ik_jk * vec[jk]
 
-        return new_vec
+        return self._reduce_triangles(Rijs, accumulate, np.zeros_like(vec), desc)
+
+    ###################################
+    # Triangles of relative rotations #
+    ###################################
+
+    @property
+    def _triangle_threads(self):
+        """
+        Number of threads evaluating triangles.
+        """
+        n_threads = config["abinitio"]["triangle_threads"].get()
+        if n_threads is None:
+            n_threads = physical_core_cpu_suggestion() or 1
+        return n_threads
+
+    def _map_triangles(self, func, desc):
+        """
+        Call `func(i)` for each first image index `i` of the triangles
+        (i, j, k), i < j < k, using `_triangle_threads` threads.
+
+        :param func: Callable taking an image index.
+        :param desc: Progress bar description.
+        """
+        with futures.ThreadPoolExecutor(max_workers=self._triangle_threads) as pool:
+            for _ in tqdm(
+                pool.map(func, range(self.n_img - 2)),
+                total=self.n_img - 2,
+                desc=desc,
+            ):
+                pass
+
+    def _reduce_triangles(self, Rijs, func, init, desc):
+        """
+        Accumulate `func(acc, ij, ik, jk, c)` over all blocks of triangles.
+
+        Blocks are read from `_triangle_data` when cached, otherwise
+        evaluated on the fly by `_triangle_discrepancies`.
+
+        :param Rijs: n-choose-2 x 3 x 3 array of relative rotations.
+        :param func: Callable updating the accumulator `acc` in place
+            given the pair indices and discrepancies of a block.
+        :param init: Array of zeros, each thread accumulates into a copy.
+        :param desc: Progress bar description.
+        :return: Sum of the thread accumulators.
+        """
+        data = self._triangle_data(Rijs)
+
+        # Each thread accumulates into its own array.
+        local = threading.local()
+        partials = []
+
+        def accumulate(i):
+            if not hasattr(local, "acc"):
+                local.acc = np.zeros_like(init)
+                partials.append(local.acc)
+
+            if data is None:
+                blocks = self._triangle_discrepancies(Rijs, i)
+            else:
+                blocks = self._cached_triangle_discrepancies(data, i)
+            for ij, ik, jk, c in blocks:
+                func(local.acc, ij, ik, jk, c)
+
+        self._map_triangles(accumulate, desc)
+
+        return np.sum(partials, axis=0) if partials else np.zeros_like(init)
+
+    def _triangle_data(self, Rijs):
+        """
+        Return the discrepancies of the four J-configurations of all
+        triangles of `Rijs`, evaluating them once.
+
+        Discrepancies up to `config["abinitio"]["triangle_cache_max_bytes"]`
+        are held in memory, larger ones are memory-mapped to a temporary
+        file in `config["abinitio"]["triangle_cache_dir"]` when set.
+
+        :param Rijs: n-choose-2 x 3 x 3 array of relative rotations.
+        :return: Discrepancies, n_triangles x 4, ordered by `i` and
+            then as `_triangles(i)`.  `None` when they are not cached.
+        """
+        key = _fingerprint(Rijs)
+        if self._triangle_cache is not None:
+            if self._triangle_cache[0] == key:
+                return self._triangle_cache[1]
+            # Release stale discrepancies before evaluating new ones.
+            self._triangle_cache = None
+
+        shape = (self._triangle_offset(self.n_img - 2), 4)
+        nbytes = shape[0] * shape[1] * Rijs.dtype.itemsize
+        cache_dir = config["abinitio"]["triangle_cache_dir"].get()
+        if nbytes <= config["abinitio"]["triangle_cache_max_bytes"].get():
+            data = np.empty(shape, dtype=Rijs.dtype)
+        elif cache_dir is not None:
+            logger.info(f"Memory mapping {nbytes} bytes of triangles to {cache_dir}.")
+            data = np.memmap(
+                tempfile.TemporaryFile(dir=cache_dir),
+                dtype=Rijs.dtype,
+                mode="w+",
+                shape=shape,
+            )
+        else:
+            return None
+
+        def evaluate(i):
+            start = self._triangle_offset(i)
+            for ij, ik, jk, c in self._triangle_discrepancies(Rijs, i):
+                data[start : start + len(c)] = c
+                start += len(c)
+
+        self._map_triangles(evaluate, desc="Evaluating triangles")
+        self._triangle_cache = (key, data)
+
+        return data
+
+    def _J_conjugate_pairs(self, Rijs, mask):
+        """
+        J-conjugate `Rijs[mask]` in place, keeping cached triangle
+        discrepancies of `Rijs` valid.
+
+        Conjugating pair ij, jk or ik of a triangle maps its
+        J-configurations `m` to `m ^ 1`, `m ^ 2` or `m ^ 3`
+        respectively, so the cache is permuted instead of evaluated again.
+
+        :param Rijs: n-choose-2 x 3 x 3 array of relative rotations.
+        :param mask: Boolean mask of pairs to conjugate.
+        """
+        cached = self._triangle_cache is not None and self._triangle_cache[
+            0
+        ] == _fingerprint(Rijs)
+
+        Rijs[mask] = J_conjugate(Rijs[mask])
+
+        if not cached:
+            return
+
+        data = self._triangle_cache[1]
+        flips = mask.astype(np.uint8)
+        confs = np.arange(4, dtype=np.uint8)
+
+        def permute(i):
+            start = self._triangle_offset(i)
+            for _, _, ij, ik, jk in self._triangles(i):
+                stop = start + len(ij)
+                perm = confs ^ (flips[ij] ^ 2 * flips[jk] ^ 3 * flips[ik])[:, None]
+                data[start:stop] = np.take_along_axis(data[start:stop], perm, axis=1)
+                start = stop
+
+        self._map_triangles(permute, desc="Permuting triangles")
+        self._triangle_cache = (_fingerprint(Rijs), data)
+
+    def _triangle_offset(self, i):
+        """
+        Number of triangles (i, j, k), i < j < k, preceding those of `i`.
+        """
+        return math.comb(self.n_img, 3) - math.comb(self.n_img - i, 3)
+
+    def _cached_triangle_discrepancies(self, data, i):
+        """
+        Yield the discrepancies of the triangles of a given `i` from
+        `_triangle_data`, in the blocks of `_triangle_discrepancies`.
+        """
+        start = self._triangle_offset(i)
+        for _, _, ij, ik, jk in self._triangles(i):
+            stop = start + len(ij)
+            yield ij, ik, jk, data[start:stop]
+            start = stop
+
+    def _triangles(self, i):
+        """
+        Yield the triangles (i, j, k), i < j < k, for a given `i` in blocks.
+
+        Blocks hold about `config["abinitio"]["triangle_block_size"]`
+        triangles, ordered by `j` then `k`.
+
+        :param i: Index of the first image.
+        :return: Generator of index arrays (j, k) of the images and
+            (ij, ik, jk) of the pairs in each triangle.
+        """
+        n = self.n_img
+        block_size = config["abinitio"]["triangle_block_size"].get()
+
+        j = np.arange(i + 1, n - 1)
+        counts = n - j - 1
+        ends = np.cumsum(counts)
+        # Split the j images into groups of about `block_size` triangles.
+        splits = np.searchsorted(ends, np.arange(block_size, ends[-1], block_size))
+        for j_block, counts_block in zip(
+            np.split(j, np.unique(splits + 1)), np.split(counts, np.unique(splits + 1))
+        ):
+            if len(j_block) == 0:
+                continue
+            # Expand to all k > j for each j.
+            j_tri = np.repeat(j_block, counts_block)
+            starts = np.cumsum(counts_block) - counts_block
+            k_tri = j_tri + 1 + np.arange(len(j_tri)) - np.repeat(starts, counts_block)
+
+            yield (
+                j_tri,
+                k_tri,
+                self._pairs_to_linear[i, j_tri],
+                self._pairs_to_linear[i, k_tri],
+                self._pairs_to_linear[j_tri, k_tri],
+            )
+
+    def _triangle_discrepancies(self, Rijs, i):
+        """
+        Yield the discrepancies of the four J-configurations of the
+        triangles (i, j, k), i < j < k, for a given `i` in blocks.
+
+        :param Rijs: n-choose-2 x 3 x 3 array of relative rotations.
+        :param i: Index of the first image.
+        :return: Generator of linear pair index arrays (ij, ik, jk)
+            and squared norms, n_triangles x 4, for each block.
+        """
+        JJop = np.array([[1, 1, -1], [1, 1, -1], [-1, -1, 1]], dtype=Rijs.dtype)
+
+        # Relative rotations of all pairs (i, j), j > i.
+        Ri = Rijs[self._pairs_to_linear[i, i + 1 :]]
+
+        for j, k, ij, ik, jk in self._triangles(i):
+            Rij, Rik, Rjk = Ri[j - i - 1], Ri[k - i - 1], Rijs[jk]
+            Rij_Rjk = Rij @ Rjk
+
+            # Compute R muls and norms, J-conjugating as J@A@J = A * JJop.
+            c = np.empty((len(ij), 4), dtype=Rijs.dtype)
+            c[:, 0] = _sum_squares(Rij_Rjk - Rik)
+            c[:, 1] = _sum_squares((Rij * JJop) @ Rjk - Rik)
+            c[:, 2] = _sum_squares(Rij @ (Rjk * JJop) - Rik)
+            c[:, 3] = _sum_squares(Rij_Rjk - Rik * JJop)
+
+            yield ij, ik, jk, c
+
+    def _triangle_scores_from_discrepancies(self, c, best_i):
+        """
+        Compute triangle scores comparing the best J-configuration to
+        the best alternative for each triangle side.
+
+        :param c: Discrepancies, n_triangles x 4.
+        :param best_i: Index of the best configuration of each triangle.
+        :return: Scores (s_ij_jk, s_ik_jk, s_ij_ik), n_triangles x 3.
+        """
+        rows = np.arange(len(c))[:, None]
+        best_val = c[rows[:, 0], best_i][:, None]
+        alt = np.minimum(c[rows, self._ALTS[0][best_i]], c[rows, self._ALTS[1][best_i]])
+
+        return 1 - np.sqrt(best_val / alt)
 
     def _signs_times_v_cupy(self, Rijs, vec):
         """
@@ -1197,3 +1306,22 @@ class CLSync3N(CLOrient3D, SyncVotingMixin):
 
         # CUPY compile the CUDA code
         return cp.RawModule(code=module_code, backend="nvcc")
+
+
+def _sum_squares(A):
+    """
+    Return the squared Frobenius norms of a stack of 3x3 matrices.
+    """
+    A = A.reshape(-1, 9)
+    return np.einsum("ni,ni->n", A, A)
+
+
+def _fingerprint(A):
+    """
+    Return a digest identifying the contents of array `A`.
+    """
+    A = np.ascontiguousarray(A)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{A.dtype.str}{A.shape}".encode())
+    h.update(A)
+    return h.hexdigest()
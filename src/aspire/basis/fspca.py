@@ -248,12 +248,10 @@ class FSPCABasis(SteerableBasis2D):
         zero_ell_mask = self.basis.angular_indices == 0
 
         # Apply Data matrix batchwise
-        num_batches = (self.src.n + self.batch_size - 1) // self.batch_size
-        for i in range(num_batches):
+        for start, images in self.src.iter_batches(self.batch_size):
             # Compute the coefficients for this batch
-            start = i * self.batch_size
-            finish = min((i + 1) * self.batch_size, self.src.n)
-            batch_coef = self.basis.evaluate_t(self.src.images[start:finish])
+            finish = start + images.n_images
+            batch_coef = self.basis.evaluate_t(images)
             batch_coef = batch_coef.asnumpy()
 
             # Make the Data matrix (A_k)
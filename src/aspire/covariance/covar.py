@@ -36,7 +36,11 @@ class CovarianceEstimator(Estimator):
         L = self.src.L
         _2L = 2 * self.src.L
 
-        kernel = np.zeros((_2L, _2L, _2L, _2L, _2L, _2L), dtype=self.dtype)
+        # The kernel is a sum of outer products of real `factors`, so its
+        # Fourier transform is the sum of outer products of their transforms.
+        # This is accumulated directly in half spectrum (`rfftn`) layout,
+        # avoiding a full size real kernel and its 6D FFT.
+        kernel_h = np.zeros((_2L,) * 5 + (_2L // 2 + 1,), dtype=self.dtype)
         sq_filters_f = np.square(evaluate_src_filters_on_grid(self.src))
 
         for i in trange(0, n, self.batch_size):
@@ -59,24 +63,25 @@ class CovarianceEstimator(Estimator):
             for j in range(batch_n):
                 factors[j] = anufft(weights[j], pts_rot[j], (_2L, _2L, _2L), real=True)
 
-            factors = Volume(factors).to_vec()
-            kernel += (factors.T @ factors).reshape((_2L,) * 6) / (n * L**8)
-
-        # Ensure symmetric kernel
-        kernel[0, :, :, :, :, :] = 0
-        kernel[:, 0, :, :, :, :] = 0
-        kernel[:, :, 0, :, :, :] = 0
-        kernel[:, :, :, 0, :, :] = 0
-        kernel[:, :, :, :, 0, :] = 0
-        kernel[:, :, :, :, :, 0] = 0
-
-        logger.info("Computing non-centered Fourier Transform")
-        kernel = fft.mdim_ifftshift(kernel, range(0, 6))
-        kernel_f = fft.fftn(kernel)
-        # Kernel is always symmetric in spatial domain and therefore real in Fourier
-        kernel_f = np.real(kernel_f)
-
-        return FourierKernel(kernel_f)
+            # Ensure symmetric kernel
+            factors[:, 0, :, :] = 0
+            factors[:, :, 0, :] = 0
+            factors[:, :, :, 0] = 0
+
+            factors = fft.mdim_ifftshift(factors, range(1, 4))
+            factors_f = fft.fftn(factors, axes=(1, 2, 3))
+            # Contiguous copies keep the products below in BLAS.
+            re_f = np.ascontiguousarray(factors_f.real).reshape(batch_n, -1)
+            im_f = np.ascontiguousarray(factors_f.imag).reshape(batch_n, -1)
+            re_h = np.ascontiguousarray(factors_f.real[..., : _2L // 2 + 1])
+            im_h = np.ascontiguousarray(factors_f.imag[..., : _2L // 2 + 1])
+
+            # Kernel is always symmetric in spatial domain and therefore real in Fourier
+            kernel_h += (
+                re_f.T @ re_h.reshape(batch_n, -1) - im_f.T @ im_h.reshape(batch_n, -1)
+            ).reshape(kernel_h.shape) / (n * L**8)
+
+        return FourierKernel(kernel_h, half_spectrum=True)
 
     def estimate(self, mean_vol, noise_variance, tol=1e-5, regularizer=0):
         logger.info("Running Covariance Estimator")
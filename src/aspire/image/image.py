@@ -212,6 +212,17 @@ class Image:
         self.__array_interface__ = self._data.__array_interface__
         self.__array__ = self._data
 
+    def __getstate__(self):
+        # `__array_interface__` holds a raw data pointer,
+        # which is rebuilt on unpickling instead of being serialized.
+        state = self.__dict__.copy()
+        del state["__array_interface__"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__array_interface__ = self._data.__array_interface__
+
     def project(self, angles):
         """
         Computes the Radon Transform on an Image Stack using
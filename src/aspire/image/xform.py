@@ -5,10 +5,33 @@ import numpy as np
 from joblib import Memory
 
 from aspire.image import Image
+from aspire.numeric import fft, xp
+from aspire.utils import crop_pad_2d
 
 logger = logging.getLogger(__name__)
 
 
+def _real_self_conjugate(mult):
+    """
+    Replace entries of a centered Fourier multiplier at self-conjugate
+    frequencies (zero and, for even sizes, Nyquist) by their real part.
+
+    Applying the result to the spectrum of a real image and taking the
+    real part of the inverse transform once is then identical to taking
+    the real part after applying `mult` alone.  This allows a run of
+    Fourier multipliers to be fused into a single FFT pair.
+
+    :param mult: Array of shape (..., L, L) in centered Fourier layout.
+    :return: `mult`, modified in place.
+    """
+    L = mult.shape[-1]
+    idx = [L // 2] + ([0] if L % 2 == 0 else [])
+    for i in idx:
+        for j in idx:
+            mult[..., i, j] = mult[..., i, j].real
+    return mult
+
+
 class Xform(abc.ABC):
     """
     An Xform is anything that implements a `forward` method (and an `adjoint` method, in the case of a LinearXform),
@@ -45,6 +68,11 @@ class Xform(abc.ABC):
         def __exit__(self, exc_type, exc_value, exc_traceback):
             self.xform.active = self.xform_old_state
 
+    # Xforms that act on each image as a multiplier (or a crop) in
+    # Fourier space set this, and implement `_forward_fourier`, so that
+    # `Pipeline` may fuse consecutive runs of them into one FFT pair.
+    fourier_diagonal = False
+
     def __init__(self, active=True):
         """
         Create a Xform object that works at a specific resolution.
@@ -73,6 +101,19 @@ class Xform(abc.ABC):
         Subclasses must implement the _forward method applicable to im/indices.
         """
 
+    def _forward_fourier(self, im_f, indices):
+        """
+        Apply the forward transformation to a stack of centered 2D Fourier
+        transforms.  Only used when `fourier_diagonal` is set.
+
+        :param im_f: Complex array of shape (n, L, L), as from `fft.centered_fft2`.
+        :param indices: The indices of the images within this Xform.
+        :return: Transformed array of shape (n, L', L').
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not act diagonally in Fourier space."
+        )
+
     def enabled(self):
         """
         Enable this Xform in a context manager, regardless of its `active` attribute value.
@@ -151,6 +192,13 @@ class Multiply(SymmetricXform):
 
         return im_new
 
+    fourier_diagonal = True
+
+    def _forward_fourier(self, im_f, indices):
+        if self.multipliers.size == 1:
+            return im_f * self.multipliers.item()
+        return im_f * xp.asarray(self.multipliers[indices]).reshape(-1, 1, 1)
+
     def __str__(self):
         if self.multipliers.size == 1:
             return f"Multiply ({self.multipliers})"
@@ -188,6 +236,26 @@ class Shift(LinearXform):
 
         return im_new
 
+    fourier_diagonal = True
+
+    def _forward_fourier(self, im_f, indices):
+        # Matches the phase convention of `Image.shift`,
+        # expressed on the centered frequency grid.
+        L = im_f.shape[-1]
+        dtype = im_f.real.dtype
+        shifts = self.shifts if self.shifts.ndim == 2 else self.shifts[np.newaxis]
+        if shifts.shape[0] > 1:
+            shifts = shifts[indices]
+        shifts = xp.asarray(shifts, dtype=dtype)
+
+        grid_1d = xp.ceil(xp.arange(-L / 2, L / 2, dtype=dtype)) * 2 * xp.pi / L
+        om_x, om_y = xp.meshgrid(grid_1d, grid_1d, indexing="xy")
+        phase_shifts = om_x[np.newaxis] * -shifts[:, 0].reshape(-1, 1, 1) + om_y[
+            np.newaxis
+        ] * -shifts[:, 1].reshape(-1, 1, 1)
+        mult = _real_self_conjugate(xp.exp(-1j * phase_shifts))
+        return im_f * mult
+
     def __str__(self):
         if self.shifts.ndim == 1:
             return f"Shift ({self.shifts})"
@@ -206,6 +274,17 @@ class Downsample(LinearXform):
     def _forward(self, im, indices):
         return im.downsample(self.resolution)
 
+    fourier_diagonal = True
+
+    def _forward_fourier(self, im_f, indices):
+        # Mirrors `Image.downsample` with `zero_nyquist=True`.
+        L = im_f.shape[-1]
+        crop_f = crop_pad_2d(im_f, self.resolution).copy()
+        if self.resolution % 2 == 0:
+            crop_f[:, 0, :] = 0
+            crop_f[:, :, 0] = 0
+        return crop_f * (self.resolution**2 / L**2)
+
     def _adjoint(self, im, indices):
         # TODO: Implement up-sampling with zero-padding
         raise NotImplementedError("Adjoint of downsampling not implemented yet.")
@@ -262,6 +341,15 @@ class FilterXform(SymmetricXform):
     def _forward(self, im, indices):
         return im.filter(self.filter)
 
+    fourier_diagonal = True
+
+    def _forward_fourier(self, im_f, indices):
+        # As in `Image.filter`, filter values are cast to the image dtype.
+        filter_values = xp.asarray(
+            self.filter.evaluate_grid(im_f.shape[-1]), dtype=im_f.real.dtype
+        )
+        return im_f * filter_values
+
     def __str__(self):
         return f"FilterXform ({self.filter})"
 
@@ -383,11 +471,27 @@ class IndexedXform(Xform):
                 fn_handle = getattr(xform, which)
                 im_data[im_data_indices] = fn_handle(im[im_data_indices]).asnumpy()
 
-        return Image(im_data)
+        return Image(im_data, pixel_size=im.pixel_size)
 
     def _forward(self, im, indices):
         return self._indexed_operation(im, indices, "forward")
 
+    @property
+    def fourier_diagonal(self):
+        return all(
+            xform.fourier_diagonal and xform.active for xform in self.unique_xforms
+        )
+
+    def _forward_fourier(self, im_f, indices):
+        out = xp.empty_like(im_f)
+        xform_ids = self.indices[indices]
+        for i in np.unique(xform_ids):
+            rows = np.flatnonzero(xform_ids == i)
+            out[rows] = self.unique_xforms[i]._forward_fourier(
+                im_f[rows], np.arange(len(rows))
+            )
+        return out
+
 
 class LinearIndexedXform(IndexedXform, LinearXform):
     def _adjoint(self, im, indices):
@@ -407,6 +511,30 @@ def _apply_xform(xform, im, indices, adjoint=False):
         return xform.adjoint(im, indices=indices)
 
 
+def _apply_fused(xforms, im, indices):
+    """
+    Apply a run of `fourier_diagonal` Xforms with a single FFT pair.
+
+    :param xforms: List of Xforms with `fourier_diagonal` set.
+    :param im: Image stack.
+    :param indices: Indices of `im` within the Xforms.
+    :return: Transformed Image.
+    """
+    logger.debug("  Applying fused " + " ".join(str(xform) for xform in xforms))
+    stack_shape = im.stack_shape
+    L = im.resolution
+    im_f = fft.centered_fft2(xp.asarray(im.stack_reshape(-1)._data))
+    for xform in xforms:
+        im_f = xform._forward_fourier(im_f, indices)
+    out = xp.asnumpy(fft.centered_ifft2(im_f).real).astype(im.dtype, copy=False)
+
+    pixel_size = im.pixel_size
+    if pixel_size is not None:
+        pixel_size *= L / out.shape[-1]
+
+    return Image(out, pixel_size=pixel_size).stack_reshape(stack_shape)
+
+
 class Pipeline(Xform):
     """
     A `Pipeline` is a `Xform` made up of individual transformation steps (i.e. multiple `Xform` objects).
@@ -419,16 +547,21 @@ class Pipeline(Xform):
     This caching uses `joblib.Memory` object behind the scenes, but is disabled by default.
     """
 
-    def __init__(self, xforms=None, memory=None):
+    def __init__(self, xforms=None, memory=None, fuse=True):
         """
         Initialize a `Pipeline` with `Xform` objects.
 
         :param xforms: An iterable of Xform objects to use in the Pipeline.
         :param memory: None for no caching (default), or the location of a directory to use to cache steps of the
             pipeline.
+        :param fuse: Fuse consecutive `Xform`s acting diagonally in Fourier space
+            (eg. `Shift`, `FilterXform`, phase flipping and `Downsample`) into a
+            single forward and inverse FFT.  Only applies when `memory` is None,
+            since fused steps cannot be cached individually.  Default True.
         """
         self.xforms = xforms or []
         self.memory = memory
+        self.fuse = fuse
         self.active = True
 
     def __str__(self):
@@ -465,12 +598,40 @@ class Pipeline(Xform):
         _apply_transform_cached = memory.cache(_apply_xform)
 
         logger.debug("Applying forward transformations in pipeline")
-        for xform in self.xforms:
-            im = _apply_transform_cached(xform, im, indices, False)
+        for run in self._runs():
+            if len(run) > 1:
+                im = _apply_fused(run, im, indices)
+            else:
+                im = _apply_transform_cached(run[0], im, indices, False)
         logger.debug("All forward transformations applied")
 
         return im
 
+    def _runs(self):
+        """
+        Partition active `xforms` into runs to be applied together.
+
+        Consecutive `fourier_diagonal` Xforms are grouped when fusing is
+        enabled; all other Xforms form runs of length one.
+
+        :return: List of lists of `Xform`s.
+        """
+        xforms = [xform for xform in self.xforms if xform.active]
+        if not self.fuse or self.memory is not None:
+            return [[xform] for xform in xforms]
+
+        runs = []
+        for xform in xforms:
+            if (
+                xform.fourier_diagonal
+                and runs
+                and all(x.fourier_diagonal for x in runs[-1])
+            ):
+                runs[-1].append(xform)
+            else:
+                runs.append([xform])
+        return runs
+
 
 class LinearPipeline(Pipeline, LinearXform):
     def _adjoint(self, im, indices):
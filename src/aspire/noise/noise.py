@@ -299,9 +299,8 @@ class WhiteNoiseEstimator(NoiseEstimator):
 
         first_moment = 0
         second_moment = 0
-        for i in trange(0, self.src.n, self.batch_size):
-            images = self.src.images[i : i + self.batch_size].asnumpy()
-            images_masked = images * mask
+        for _, images in self.src.iter_batches(self.batch_size, desc="Noise"):
+            images_masked = images.asnumpy() * mask
 
             _denominator = self.src.n * np.sum(mask)
             first_moment += np.sum(images_masked) / _denominator
@@ -341,9 +340,8 @@ class AnisotropicNoiseEstimator(NoiseEstimator):
 
         mean_est = 0
         noise_psd_est = np.zeros((self.src.L, self.src.L)).astype(self.src.dtype)
-        for i in trange(0, self.src.n, self.batch_size):
-            images = self.src.images[i : i + self.batch_size].asnumpy()
-            images_masked = images * mask
+        for _, images in self.src.iter_batches(self.batch_size, desc="Noise PSD"):
+            images_masked = images.asnumpy() * mask
 
             _denominator = self.src.n * np.sum(mask)
             mean_est += np.sum(images_masked) / _denominator
@@ -6,6 +6,8 @@ from aspire import config
 from aspire.numeric import xp
 from aspire.utils import LogFilterByCount, complex_type, real_type
 
+from .plan_cache import PlanCache
+
 cp = None
 try:
     import cupy as cp
@@ -21,6 +23,8 @@ logger = logging.getLogger(__name__)
 backends = None
 # Default preferred Plan subclass
 default_plan_class = None
+# Plans reused by `anufft` and `nufft`.
+plan_cache = PlanCache(max_bytes=config["nufft"]["plan_cache_max_bytes"].get())
 
 
 def check_backends(raise_errors=True):
@@ -132,6 +136,17 @@ def backend_available(backend):
     return backend in all_backends()
 
 
+def _get_default_plan_class():
+    """
+    Return the default (best) Plan subclass, checking backends on first use.
+    """
+    if default_plan_class is None:
+        # Limit log noise to once
+        with LogFilterByCount(logger, 1):
+            check_backends(raise_errors=True)
+    return default_plan_class
+
+
 class Plan:
     # TODO: move common functionality up the hierarchy
     def __new__(cls, *args, **kwargs):
@@ -143,11 +158,7 @@ class Plan:
                     raise RuntimeError("Requested backend unavailable")
             else:
                 # If a Plan was constructed as a generic Plan(), use the default (best) Plan class
-                if default_plan_class is None:
-                    # Limit log noise to once
-                    with LogFilterByCount(logger, 1):
-                        check_backends(raise_errors=True)
-                return super(Plan, cls).__new__(default_plan_class)
+                return super(Plan, cls).__new__(_get_default_plan_class())
         else:
             # If a Plan-subclass was constructed directly, invoke default behavior
             return super(Plan, cls).__new__(cls)
@@ -159,6 +170,7 @@ def anufft(sig_f, fourier_pts, sz, real=False, epsilon=1e-8):
     Dimension is based on the dimension of fourier_pts and checked against sig_f.
 
     Selects best available package from `nfft` `backends` configuration list.
+    Plans are reused across calls through `plan_cache`.
 
     When sig_f is provided as a CuPy GPU array with a cufinufft
     backend, result is maintained on GPU.
@@ -192,8 +204,12 @@ def anufft(sig_f, fourier_pts, sz, real=False, epsilon=1e-8):
     if len(sig_f.shape) == 2:
         ntransforms = sig_f.shape[0]
 
-    plan = Plan(
-        sz=sz, fourier_pts=fourier_pts, ntransforms=ntransforms, epsilon=epsilon
+    plan = plan_cache.get(
+        _get_default_plan_class(),
+        sz=sz,
+        fourier_pts=fourier_pts,
+        ntransforms=ntransforms,
+        epsilon=epsilon,
     )
     adjoint = plan.adjoint(sig_f)
 
@@ -211,6 +227,7 @@ def nufft(sig_f, fourier_pts, real=False, epsilon=1e-8):
     Dimension is based on the dimension of fourier_pts and checked against sig_f.
 
     Selects best available package from `nfft` `backends` configuration list.
+    Plans are reused across calls through `plan_cache`.
 
     When sig_f is provided as a CuPy GPU array with a cufinufft
     backend, result is maintained on GPU.
@@ -253,8 +270,12 @@ def nufft(sig_f, fourier_pts, real=False, epsilon=1e-8):
     if len(sig_f.shape) == dimension + 1:
         ntransforms = sig_f.shape[0]
 
-    plan = Plan(
-        sz=sz, fourier_pts=fourier_pts, ntransforms=ntransforms, epsilon=epsilon
+    plan = plan_cache.get(
+        _get_default_plan_class(),
+        sz=sz,
+        fourier_pts=fourier_pts,
+        ntransforms=ntransforms,
+        epsilon=epsilon,
     )
     transform = plan.transform(sig_f)
 
@@ -58,21 +58,30 @@ class CufinufftPlan(Plan):
         self.num_pts = self.fourier_pts.shape[1]
         self.epsilon = max(epsilon, np.finfo(self.dtype).eps)
 
-        self._transform_plan = cufPlan(
-            2, self.sz, self.ntransforms, self.epsilon, -1, dtype=self.complex_dtype
-        )
+        # cufinufft plans for each direction are built on first use.
+        self._plans = {}
 
-        self._adjoint_plan = cufPlan(
-            1,
-            self.sz,
-            self.ntransforms,
-            self.epsilon,
-            1,
-            dtype=self.complex_dtype,
-        )
+    def _plan(self, nufft_type):
+        """
+        Return the cufinufft plan of `nufft_type`, building it on first use.
 
-        self._transform_plan.setpts(*self.fourier_pts)
-        self._adjoint_plan.setpts(*self.fourier_pts)
+        :param nufft_type: 2 for the transform, 1 for the adjoint.
+        :return: `cufinufft.Plan` with points set.
+        """
+        plan = self._plans.get(nufft_type)
+        if plan is None:
+            isign = -1 if nufft_type == 2 else 1
+            plan = cufPlan(
+                nufft_type,
+                self.sz,
+                self.ntransforms,
+                self.epsilon,
+                isign,
+                dtype=self.complex_dtype,
+            )
+            plan.setpts(*self.fourier_pts)
+            self._plans[nufft_type] = plan
+        return plan
 
     def transform(self, signal):
         """
@@ -126,7 +135,7 @@ class CufinufftPlan(Plan):
         if signal.dtype != self.complex_dtype:
             signal = signal.astype(self.complex_dtype)
 
-        self._transform_plan.execute(signal, out=result)
+        self._plan(2).execute(signal, out=result)
 
         # ASPIRE-Python/703
         if result.dtype != complex_type(self._original_dtype):
@@ -175,7 +184,7 @@ class CufinufftPlan(Plan):
         if signal.dtype != self.complex_dtype:
             signal = signal.astype(self.complex_dtype)
 
-        self._adjoint_plan.execute(signal, out=result)
+        self._plan(1).execute(signal, out=result)
 
         # ASPIRE-Python/703
         if result.dtype != complex_type(self._original_dtype):
@@ -45,24 +45,28 @@ class FinufftPlan(Plan):
                 f"FinufftPlan adjusted eps={self.epsilon}" f" from requested {epsilon}."
             )
 
-        self._transform_plan = finufft.Plan(
-            nufft_type=2,
-            n_modes_or_dim=self.sz,
-            eps=self.epsilon,
-            n_trans=self.ntransforms,
-            dtype=self.complex_dtype,
-        )
+        # finufft plans for each direction are built on first use.
+        self._plans = {}
 
-        self._adjoint_plan = finufft.Plan(
-            nufft_type=1,
-            n_modes_or_dim=self.sz,
-            eps=self.epsilon,
-            n_trans=self.ntransforms,
-            dtype=self.complex_dtype,
-        )
+    def _plan(self, nufft_type):
+        """
+        Return the finufft plan of `nufft_type`, building it on first use.
 
-        self._transform_plan.setpts(*self.fourier_pts)
-        self._adjoint_plan.setpts(*self.fourier_pts)
+        :param nufft_type: 2 for the transform, 1 for the adjoint.
+        :return: `finufft.Plan` with points set.
+        """
+        plan = self._plans.get(nufft_type)
+        if plan is None:
+            plan = finufft.Plan(
+                nufft_type=nufft_type,
+                n_modes_or_dim=self.sz,
+                eps=self.epsilon,
+                n_trans=self.ntransforms,
+                dtype=self.complex_dtype,
+            )
+            plan.setpts(*self.fourier_pts)
+            self._plans[nufft_type] = plan
+        return plan
 
     def transform(self, signal):
         """
@@ -101,7 +105,7 @@ class FinufftPlan(Plan):
         # FINUFFT was designed for a complex input array
         signal = np.asarray(signal, dtype=self.complex_dtype, order="C")
 
-        result = self._transform_plan.execute(signal)
+        result = self._plan(2).execute(signal)
 
         return result
 
@@ -132,6 +136,6 @@ class FinufftPlan(Plan):
         # FINUFFT was designed for a complex input array
         signal = np.asarray(signal, dtype=self.complex_dtype, order="C")
 
-        result = self._adjoint_plan.execute(signal)
+        result = self._plan(1).execute(signal)
 
         return result
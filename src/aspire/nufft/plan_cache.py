@@ -0,0 +1,161 @@
+import hashlib
+from collections import OrderedDict
+from threading import RLock
+
+import numpy as np
+
+from aspire.numeric import xp
+
+
+class PlanCache:
+    """
+    Byte bounded LRU cache of NUFFT plans.
+
+    Plans are keyed by backend plan class, signal geometry, dtype, precision,
+    number of transforms and a fingerprint of the Fourier points, so that
+    repeatedly transforming the same point set skips planning entirely.
+
+    Plan sizes are estimated, see `PlanCache.plan_nbytes`.
+    """
+
+    def __init__(self, max_bytes=None):
+        """
+        Initialize a PlanCache.
+
+        :param max_bytes: Upper bound on the estimated total size of cached plans
+            in bytes. `None` is unlimited, while 0 disables caching.
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = RLock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        Return cache statistics.
+
+        :return: Dictionary of hit, miss and eviction counters,
+            along with current entry count and estimated size in bytes.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "nbytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self):
+        """
+        Remove all entries and reset statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def fingerprint(fourier_pts):
+        """
+        Return a digest identifying the contents of `fourier_pts`.
+
+        :param fourier_pts: NumPy or CuPy array of Fourier points.
+        :return: Hex digest string.
+        """
+        pts = np.ascontiguousarray(xp.asnumpy(fourier_pts))
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{pts.dtype.str}{pts.shape}".encode())
+        h.update(pts)
+        return h.hexdigest()
+
+    @staticmethod
+    def plan_nbytes(plan):
+        """
+        Estimate the memory held by `plan` with both directions planned.
+
+        The estimate counts the stored Fourier points, a sort index per point
+        and an upsampled (factor 2 per dimension) complex grid per transform,
+        for each of the transform and adjoint plans.
+
+        :param plan: `Plan` instance.
+        :return: Estimated size in bytes.
+        """
+        pts_nbytes = plan.fourier_pts.nbytes
+        num_pts = plan.fourier_pts.shape[-1]
+        grid_nbytes = (
+            2 ** len(plan.sz)
+            * int(np.prod(plan.sz))
+            * getattr(plan, "ntransforms", 1)
+            * np.dtype(getattr(plan, "complex_dtype", np.complex128)).itemsize
+        )
+        return int(pts_nbytes + 2 * (num_pts * 8 + grid_nbytes))
+
+    def get(self, plan_class, sz, fourier_pts, ntransforms=1, epsilon=1e-8):
+        """
+        Return a plan of `plan_class` for the given arguments,
+        constructing and caching it on a miss.
+
+        :param plan_class: `Plan` subclass used to construct plans.
+        :param sz: A tuple indicating the geometry of the signal.
+        :param fourier_pts: The points in Fourier space, arranged as a dimension-by-K array.
+        :param ntransforms: Number of transforms in a batch.
+        :param epsilon: The desired precision of the NUFFT.
+        :return: `Plan` instance.
+        """
+
+        def build():
+            return plan_class(
+                sz=sz,
+                fourier_pts=fourier_pts,
+                ntransforms=ntransforms,
+                epsilon=epsilon,
+            )
+
+        if self.max_bytes == 0:
+            return build()
+
+        key = (
+            plan_class,
+            tuple(sz),
+            np.dtype(fourier_pts.dtype).str,
+            float(epsilon),
+            int(ntransforms),
+            self.fingerprint(fourier_pts),
+        )
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        plan = build()
+        self._insert(key, plan)
+
+        return plan
+
+    def _insert(self, key, plan):
+        nbytes = self.plan_nbytes(plan)
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (plan, nbytes)
+            self.nbytes += nbytes
+
+            while self.max_bytes is not None and self.nbytes > self.max_bytes:
+                _, (_, old_nbytes) = self._entries.popitem(last=False)
+                self.nbytes -= old_nbytes
+                self.evictions += 1
@@ -30,6 +30,12 @@ class FFT:
     def irfft2(self, x, axes=(-2, -1), workers=-1):
         raise NotImplementedError("subclasses must implement this")
 
+    def rfftn(self, x, **kwargs):
+        raise NotImplementedError("subclasses must implement this")
+
+    def irfftn(self, x, **kwargs):
+        raise NotImplementedError("subclasses must implement this")
+
     def fftn(self, x, axes=None, workers=-1):
         raise NotImplementedError("subclasses must implement this")
 
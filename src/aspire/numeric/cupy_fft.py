@@ -119,3 +119,11 @@ class CupyFFT(FFT):
     @_preserve_host
     def rfft2(self, x, **kwargs):
         return cufft.rfft2(x, **kwargs)
+
+    @_preserve_host
+    def irfftn(self, x, **kwargs):
+        return cufft.irfftn(x, **kwargs)
+
+    @_preserve_host
+    def rfftn(self, x, **kwargs):
+        return cufft.rfftn(x, **kwargs)
@@ -69,6 +69,12 @@ class MKLFFT(FFT):
     def irfft2(self, x, **kwargs):
         return mkl_fft._numpy_fft.irfft2(x, **kwargs)
 
+    def rfftn(self, x, **kwargs):
+        return mkl_fft._numpy_fft.rfftn(x, **kwargs)
+
+    def irfftn(self, x, **kwargs):
+        return mkl_fft._numpy_fft.irfftn(x, **kwargs)
+
     # These are not currently exposed in mkl_fft,
     #   fall back to scipy.
     def dct(self, x, **kwargs):
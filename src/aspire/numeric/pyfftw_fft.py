@@ -166,6 +166,12 @@ class PyfftwFFT(FFT):
     def irfft2(self, x, **kwargs):
         return pyfftw.interfaces.numpy_fft.irfft2(x, **kwargs)
 
+    def rfftn(self, x, **kwargs):
+        return pyfftw.interfaces.numpy_fft.rfftn(x, **kwargs)
+
+    def irfftn(self, x, **kwargs):
+        return pyfftw.interfaces.numpy_fft.irfftn(x, **kwargs)
+
     def fftshift(self, a, axes=None):
         return scipy_fft.fftshift(a, axes=axes)
 
@@ -54,3 +54,9 @@ class ScipyFFT(FFT):
 
     def rfft2(self, x, **kwargs):
         return sp.fft.rfft2(x, **kwargs)
+
+    def irfftn(self, x, **kwargs):
+        return sp.fft.irfftn(x, **kwargs)
+
+    def rfftn(self, x, **kwargs):
+        return sp.fft.rfftn(x, **kwargs)
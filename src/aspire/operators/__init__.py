@@ -1,5 +1,6 @@
 from .blk_diag_matrix import BlkDiagMatrix, is_scalar_type
 from .diag_matrix import DiagMatrix
+from .filter_cache import FilterGridCache
 from .filters import (
     ArrayFilter,
     BlueFilter,
@@ -16,7 +17,9 @@ from .filters import (
     ScalarFilter,
     ScaledFilter,
     ZeroFilter,
+    evaluate_filters_on_grid,
     evaluate_src_filters_on_grid,
+    filter_grid_cache,
 )
 from .polar_ft import PolarFT
 from .wemd import wemd_embed, wemd_norm
@@ -0,0 +1,153 @@
+import functools
+import weakref
+from collections import OrderedDict
+from threading import RLock
+
+import numpy as np
+
+
+class FilterGridCache:
+    """
+    Byte bounded LRU cache of filter values evaluated on grids.
+
+    Entries are keyed by filter, method, resolution, dtype and any extra
+    arguments.  Filters are held by weak reference, so caching never
+    extends a filter's lifetime; entries are dropped once their filter
+    is garbage collected.
+    """
+
+    def __init__(self, max_bytes=None):
+        """
+        Initialize a FilterGridCache.
+
+        :param max_bytes: Upper bound on the total `nbytes` of cached arrays.
+            `None` is unlimited, while 0 disables caching.
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        # Maps id(filter) -> (weakref, set of entry keys).
+        self._owners = {}
+        self._lock = RLock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        Return cache statistics.
+
+        :return: Dictionary of hit, miss and eviction counters,
+            along with current entry count and size in bytes.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "nbytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self):
+        """
+        Remove all entries and reset statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._owners.clear()
+            self.nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def cached(self, method):
+        """
+        Decorate a `Filter.evaluate_grid` style method with this cache.
+
+        The decorated method must have the signature
+        `method(self, L, *args, dtype=np.float32, **kwargs)`.
+        """
+
+        @functools.wraps(method)
+        def wrapper(filt, L, *args, dtype=np.float32, **kwargs):
+            key = (
+                id(filt),
+                method.__qualname__,
+                L,
+                np.dtype(dtype).str,
+                args,
+                tuple(sorted(kwargs.items())),
+            )
+            try:
+                hash(key)
+            except TypeError:
+                # Unhashable arguments are evaluated without caching.
+                key = None
+
+            if key is not None:
+                with self._lock:
+                    res = self._entries.get(key)
+                    if res is not None:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return res
+                    self.misses += 1
+
+            res = method(filt, L, *args, dtype=dtype, **kwargs)
+
+            if key is not None:
+                self._insert(filt, key, res)
+
+            return res
+
+        return wrapper
+
+    def _insert(self, filt, key, value):
+        nbytes = getattr(value, "nbytes", 0)
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return
+
+        oid = key[0]
+        with self._lock:
+            if key in self._entries:
+                return
+            owner = self._owners.get(oid)
+            if owner is None:
+                try:
+                    ref = weakref.ref(filt, functools.partial(self._release, oid))
+                except TypeError:
+                    # Objects without weakref support are not cached.
+                    return
+                owner = self._owners[oid] = (ref, set())
+            owner[1].add(key)
+
+            self._entries[key] = value
+            self.nbytes += nbytes
+
+            while self.max_bytes is not None and self.nbytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _pop(self, key):
+        value = self._entries.pop(key)
+        self.nbytes -= getattr(value, "nbytes", 0)
+        owner = self._owners.get(key[0])
+        if owner is not None:
+            owner[1].discard(key)
+            if not owner[1]:
+                del self._owners[key[0]]
+
+    def _release(self, oid, ref):
+        """
+        Weakref callback dropping entries of a collected filter.
+        """
+        with self._lock:
+            owner = self._owners.get(oid)
+            # Guard against the id having been reused by a live filter.
+            if owner is None or owner[0] is not ref:
+                return
+            for key in list(owner[1]):
+                self._pop(key)
@@ -1,6 +1,5 @@
 import inspect
 import logging
-from functools import lru_cache
 
 import numpy as np
 from scipy.interpolate import RegularGridInterpolator
@@ -8,8 +7,15 @@ from scipy.interpolate import RegularGridInterpolator
 from aspire import config
 from aspire.utils import grid_2d, voltage_to_wavelength
 
+from .filter_cache import FilterGridCache
+
 logger = logging.getLogger(__name__)
 
+# Shared cache of `evaluate_grid` results, see `FilterGridCache.stats`.
+filter_grid_cache = FilterGridCache(
+    max_bytes=config["cache"]["filter_cache_max_bytes"].get()
+)
+
 
 def evaluate_src_filters_on_grid(src, indices=None):
     """
@@ -27,18 +33,51 @@ def evaluate_src_filters_on_grid(src, indices=None):
     if indices is None:
         indices = np.arange(src.n, dtype=int)
 
-    grid2d = grid_2d(src.L, indexing="yx", dtype=src.dtype)
-    omega = np.pi * np.vstack((grid2d["x"].flatten(), grid2d["y"].flatten()))
+    # Unfiltered sources have no unique_filters, yielding IdentityFilter values.
+    h = evaluate_filters_on_grid(
+        src.unique_filters or [],
+        src.filter_indices[indices],
+        src.L,
+        dtype=src.dtype,
+    )
+
+    return np.moveaxis(h, 0, -1)
+
+
+def evaluate_filters_on_grid(filters, filter_indices, L, dtype=np.float32):
+    """
+    Evaluate a stack of transfer functions, one per entry of `filter_indices`.
 
-    # Initialize h as ones to mimic an IdentityFilter when src.unique_filters is None.
-    h = np.ones((omega.shape[-1], len(indices)), dtype=src.dtype)
-    for i, filt in enumerate(src.unique_filters):
-        idx_k = np.where(src.filter_indices[indices] == i)[0]
-        if len(idx_k) > 0:
-            filter_values = filt.evaluate(omega)
-            h[:, idx_k] = np.column_stack((filter_values,) * len(idx_k))
+    Each filter referenced by `filter_indices` is evaluated on the grid
+    once, regardless of how many entries share it.  Entries outside
+    `range(len(filters))` are assigned the identity transfer function.
 
-    h = np.reshape(h, grid2d["x"].shape + (len(indices),))
+    :param filters: A list of `Filter` objects.
+    :param filter_indices: A 1d array of indices into `filters`.
+    :param L: Number of grid points (L by L).
+    :param dtype: dtype of grid, defaults np.float32.
+    :return: An `len(filter_indices) x L x L` array of filter values.
+    """
+    filter_indices = np.asarray(filter_indices, dtype=int).reshape(-1)
+
+    h = np.ones((len(filter_indices), L, L), dtype=dtype)
+    valid = (filter_indices >= 0) & (filter_indices < len(filters))
+    used, inverse = np.unique(filter_indices[valid], return_inverse=True)
+    if len(used) > 0:
+        used_filters = [filters[i] for i in used]
+        if all(type(f) in (CTFFilter, RadialCTFFilter) for f in used_filters):
+            # Evaluate all CTFs in one vectorized pass.
+            h_used = CTFFilter.evaluate_grid_batch(
+                L,
+                **{
+                    k: [getattr(f, k) for f in used_filters]
+                    for k in CTFFilter._batch_params
+                },
+                dtype=dtype,
+            )
+        else:
+            h_used = np.stack([f.evaluate_grid(L, dtype=dtype) for f in used_filters])
+        h[valid] = h_used[inverse]
 
     return h
 
@@ -112,7 +151,7 @@ class Filter:
         """
         return ScaledFilter(self, c)
 
-    @lru_cache(maxsize=config["cache"]["filter_cache_size"].get())  # noqa: B019
+    @filter_grid_cache.cached
     def evaluate_grid(self, L, *args, dtype=np.float32, **kwargs):
         """
         Generates a two dimensional grid with prescribed dtype,
@@ -204,7 +243,7 @@ class PowerFilter(Filter):
     def _evaluate(self, omega):
         return self._filter.evaluate(omega) ** self._power
 
-    @lru_cache(maxsize=config["cache"]["filter_cache_size"].get())  # noqa: B019
+    @filter_grid_cache.cached
     def evaluate_grid(self, L, *args, dtype=np.float32, **kwargs):
         """
         Calls the provided filter's evaluate_grid method in case there is an optimization.
@@ -406,6 +445,18 @@ class IdentityFilter(ScalarFilter):
 
 
 class CTFFilter(Filter):
+    # Parameters accepted as arrays by `evaluate_grid_batch`.
+    _batch_params = (
+        "pixel_size",
+        "voltage",
+        "defocus_u",
+        "defocus_v",
+        "defocus_ang",
+        "Cs",
+        "alpha",
+        "B",
+    )
+
     def __init__(
         self,
         pixel_size=1,
@@ -482,6 +533,90 @@ class CTFFilter(Filter):
 
         return h.squeeze()
 
+    @staticmethod
+    def evaluate_grid_batch(
+        L,
+        pixel_size=1,
+        voltage=200,
+        defocus_u=15000,
+        defocus_v=15000,
+        defocus_ang=0,
+        Cs=2.26,
+        alpha=0.07,
+        B=0,
+        dtype=np.float32,
+    ):
+        """
+        Evaluate a batch of CTFs on an L by L grid in one vectorized pass.
+
+        Parameters are as for `CTFFilter`, but each may be given as an
+        array of length n.  Scalars are broadcast across the batch.
+        The radial and angular grid terms are computed once and shared
+        by all n CTFs.
+
+        :param L: Number of grid points (L by L).
+        :param dtype: dtype of grid, defaults np.float32.
+        :return: An `n x L x L` array of CTF values.
+        """
+        params = np.broadcast_arrays(
+            *(
+                np.atleast_1d(np.asarray(p, dtype=np.float64))
+                for p in (
+                    pixel_size,
+                    voltage,
+                    defocus_u,
+                    defocus_v,
+                    defocus_ang,
+                    Cs,
+                    alpha,
+                    B,
+                )
+            )
+        )
+        # Each parameter becomes an n x 1 column broadcasting against the grid.
+        pixel_size, voltage, defocus_u, defocus_v, defocus_ang, Cs, alpha, B = (
+            p.reshape(-1, 1) for p in params
+        )
+        n = pixel_size.shape[0]
+
+        # Grid terms shared by all CTFs.
+        # Note this follows the omega ordering used by `evaluate_grid`.
+        grid2d = grid_2d(L, indexing="yx", dtype=dtype)
+        om_y, om_x = np.pi * grid2d["x"].flatten(), np.pi * grid2d["y"].flatten()
+        angles = np.arctan2(om_y, om_x)
+        cos2, sin2 = np.cos(2 * angles), np.sin(2 * angles)
+        r2 = om_x**2 + om_y**2
+
+        # Per CTF coefficients, see `_evaluate`.
+        # Note the grid is wrt nm, and `Cs` is converted from mm to nm.
+        scale2 = (10 / (2 * np.pi * pixel_size)) ** 2
+        lambda_nm = np.array([voltage_to_wavelength(v) for v in voltage.flat]) / 10
+        lambda_nm = lambda_nm.reshape(-1, 1)
+        coefs = (
+            0.05 * (defocus_u + defocus_v),
+            0.05 * (defocus_u - defocus_v) * np.cos(2 * defocus_ang),
+            0.05 * (defocus_u - defocus_v) * np.sin(2 * defocus_ang),
+            -np.pi * lambda_nm * scale2,
+            0.5 * np.pi * (Cs * 1e6) * lambda_nm**3 * scale2**2,
+            np.sqrt(1 - alpha**2),
+            alpha,
+            B * scale2,
+        )
+        # Compute on the grid in `dtype`.
+        mean_nm, diff_cos, diff_sin, c2, c4, a_sin, a_cos, b = (
+            c.astype(dtype) for c in coefs
+        )
+
+        # Expand cos(2 * (angles - defocus_ang)) to reuse the grid angles.
+        defocus = mean_nm + diff_cos * cos2 + diff_sin * sin2
+        gamma = c2 * defocus * r2 + c4 * r2**2
+        h = a_sin * np.sin(gamma) - a_cos * np.cos(gamma)
+
+        if np.any(b):
+            h *= np.exp(-b * r2)
+
+        return h.reshape(n, L, L)
+
     def scale(self, c=1):
         return CTFFilter(
             pixel_size=self.pixel_size * c,
@@ -1,14 +1,25 @@
+import copy
 import logging
 import os
+import time
+from concurrent import futures
 from pathlib import Path
 
+import joblib
+import numpy as np
+
+from aspire import config
 from aspire.basis import Coef, FFBBasis3D
 from aspire.reconstruction.kernel import FourierKernel
+from aspire.utils import num_procs_suggestion
 
 logger = logging.getLogger(__name__)
 
 
 class Estimator:
+    # Supported `preconditioner` names.
+    _preconditioners = ("circulant",)
+
     def __init__(
         self,
         src,
@@ -19,6 +30,9 @@ class Estimator:
         checkpoint_prefix="volume_checkpoint",
         maxiter=50,
         boost=True,
+        num_procs=None,
+        cache_dir=None,
+        checkpoint_batches=16,
     ):
         """
         An object representing a 2*L-by-2*L-by-2*L array containing the non-centered Fourier transform of the mean
@@ -33,7 +47,8 @@ class Estimator:
         :param batch_size: Optional batch size of images drawn from
             `src` during back projection and kernel estimation steps.
         :param preconditioner: Optional kernel preconditioner (`string`).
-            Currently supported options are "circulant" or None.
+            Currently supported options are "circulant" or None, and
+            any additional names in the `_preconditioners` of a subclass.
         :param checkpoint_iterations: Optionally save `cg` estimated
             `basis` coefficients periodically each
             `checkpoint_iterations`.  Setting to `None` disables,
@@ -50,6 +65,21 @@ class Estimator:
             `None` disables.
         :param boost: Option to use `src` symmetry to boost number of images used for mean estimation (Boolean).
             Default of `True` employs symmetry boosting.
+        :param num_procs: Optional number of local processes used to
+            accumulate the kernel and back projection, each working on
+            its own contiguous range of image batches.  Defaults to
+            `config["reconstruction"]["num_procs"]`, where `None`
+            selects a count from the available cores and memory.
+        :param cache_dir: Optional directory where the sums accumulated
+            over images for the kernel and back projection are stored,
+            named by a hash of the inputs they depend on.  Matching
+            files from this or an earlier session are reused, so runs
+            differing only in `cg` settings skip recomputation, and
+            interrupted accumulations resume from their last checkpoint.
+            Default `None` disables.
+        :param checkpoint_batches: Optionally save partial sums to
+            `cache_dir` after this many batches per process.  `None`
+            only stores completed sums.
         """
 
         self.src = src
@@ -62,7 +92,7 @@ class Estimator:
         if not preconditioner or preconditioner.lower() == "none":
             # Resolve None and string nones to None
             preconditioner = None
-        elif preconditioner not in ["circulant"]:
+        elif preconditioner not in self._preconditioners:
             raise ValueError(
                 f"Supplied preconditioner {preconditioner} is not supported."
             )
@@ -114,6 +144,29 @@ class Estimator:
                 raise ValueError("`maxiter` should be a positive integer or `None`.")
         self.maxiter = maxiter
 
+        # Multiprocessing configuration
+        if num_procs is None:
+            num_procs = config["reconstruction"]["num_procs"].get()
+        if num_procs is None:
+            num_procs = num_procs_suggestion()
+        if not int(num_procs) > 0:
+            raise ValueError("`num_procs` should be a positive integer or `None`.")
+        self.num_procs = int(num_procs)
+
+        # Accumulation cache configuration
+        if checkpoint_batches is not None:
+            try:
+                checkpoint_batches = int(checkpoint_batches)
+            except ValueError:
+                # Sentinel value to emit a more descriptive message below.
+                checkpoint_batches = -1
+            if not checkpoint_batches > 0:
+                raise ValueError(
+                    "`checkpoint_batches` should be a positive integer or `None`."
+                )
+        self.checkpoint_batches = checkpoint_batches
+        self.cache_dir = cache_dir
+
     def __getattr__(self, name):
         """Lazy attributes instantiated on first-access"""
 
@@ -138,6 +191,177 @@ class Estimator:
     def compute_kernel(self):
         raise NotImplementedError("Subclasses must implement the compute_kernel method")
 
+    def _accumulate(self, func, name=None):
+        """
+        Sum `func(start, stop)` over ranges of image indices covering `src`.
+
+        Ranges are aligned to `batch_size` and shared among
+        `num_procs` processes, partial results are summed pairwise.
+
+        When `cache_dir` is set, the sum is stored under `name` and
+        reused by later calls with the same inputs, see `_cache_key`.
+        Partial sums are saved every `checkpoint_batches` batches per
+        process, along with the index of the next image, and an
+        interrupted accumulation resumes from there.
+
+        :param func: Picklable callable returning an array for the
+            images in `[start, stop)`.
+        :param name: Optional name of the sum, used for caching.
+        :return: Sum of `func` over all images.
+        """
+        n = self.src.n
+        batch_starts = np.arange(0, n, self.batch_size)
+
+        total, start = None, 0
+        filepath = self._cache_path(name)
+        if filepath is not None:
+            if os.path.exists(filepath):
+                logger.info(f"Loading cached {name} from {filepath}")
+                return np.load(filepath)
+            total, start = self._load_checkpoint(filepath)
+
+        # Number of batches summed between checkpoints.
+        chunk = len(batch_starts)
+        if filepath is not None and self.checkpoint_batches is not None:
+            chunk = self.checkpoint_batches * self.num_procs
+
+        batch_starts = batch_starts[batch_starts >= start]
+        executor = None
+        if self.num_procs > 1 and len(batch_starts) > 1:
+            logger.info(f"Accumulating image batches in {self.num_procs} processes.")
+            executor = futures.ProcessPoolExecutor(self.num_procs)
+
+        try:
+            for i in range(0, len(batch_starts), chunk):
+                starts = batch_starts[i : i + chunk]
+                stop = min(n, int(starts[-1]) + self.batch_size)
+                part = self._accumulate_range(func, starts, stop, executor)
+                total = part if total is None else total + part
+                if filepath is not None and stop < n:
+                    self._save_checkpoint(filepath, total, stop)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        if filepath is not None:
+            _save_atomic(filepath, np.save, total)
+            if os.path.exists(_checkpoint_path(filepath)):
+                os.remove(_checkpoint_path(filepath))
+            logger.info(f"Cached {name} to {filepath}")
+
+        return total
+
+    def _accumulate_range(self, func, batch_starts, stop, executor=None):
+        """
+        Sum `func` over the batches starting at `batch_starts`, ending at `stop`.
+
+        :param func: Callable, see `_accumulate`.
+        :param batch_starts: Array of contiguous batch start indices.
+        :param stop: Index one past the last image.
+        :param executor: Optional `Executor` used to share the batches.
+        :return: Sum of `func` over the batches.
+        """
+        shards = [b for b in np.array_split(batch_starts, self.num_procs) if len(b)]
+
+        if executor is None or len(shards) == 1:
+            return func(int(batch_starts[0]), stop)
+
+        starts = [int(b[0]) for b in shards]
+        stops = starts[1:] + [stop]
+        parts = list(executor.map(func, starts, stops))
+
+        while len(parts) > 1:
+            pairs = [parts[i] + parts[i + 1] for i in range(0, len(parts) - 1, 2)]
+            parts = pairs + parts[len(pairs) * 2 :]
+
+        return parts[0]
+
+    def _cache_key_state(self, name):
+        """
+        Return the state identifying the sum accumulated under `name`.
+
+        The kernel only depends on the geometry, filters and amplitudes
+        of `src`, while other sums also depend on its images.
+        Settings of `cg`, such as `maxiter` and `preconditioner`, are
+        deliberately excluded.
+
+        :param name: Name of the sum.
+        :return: Dictionary of picklable values.
+        """
+        src = self.src
+        state = {
+            "__class__": self.__class__.__qualname__,
+            "name": name,
+            "dtype": np.dtype(self.dtype).str,
+            "weights": getattr(self, "weights", None),
+            "symmetry": src.symmetry_group.matrices if self.boost else None,
+        }
+        if name == "kernel":
+            state.update(
+                L=src.L,
+                rotations=src.rotations,
+                amplitudes=src.amplitudes,
+                unique_filters=src.unique_filters,
+                filter_indices=src.filter_indices,
+            )
+        else:
+            state["src"] = src._cache_key()
+
+        return state
+
+    def _cache_path(self, name):
+        """
+        Return the cache file path for the sum `name`, or `None` when not caching.
+
+        :param name: Name of the sum.
+        :return: Path string or `None`.
+        """
+        if self.cache_dir is None or name is None:
+            return None
+
+        try:
+            key = joblib.hash(self._cache_key_state(name))
+        except Exception as e:
+            logger.warning(f"Unable to derive a cache key for {name}, not caching: {e}")
+            return None
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        return os.path.join(
+            self.cache_dir, f"{self.__class__.__name__}_{name}_{key}.npy"
+        )
+
+    def _load_checkpoint(self, filepath):
+        """
+        Load the partial sum saved for `filepath`, if any.
+
+        :param filepath: Cache file path of the sum.
+        :return: Tuple of partial sum, or `None`, and the next image index.
+        """
+        checkpoint = _checkpoint_path(filepath)
+        if not os.path.exists(checkpoint):
+            return None, 0
+
+        try:
+            with np.load(checkpoint) as f:
+                total, stop = f["total"], int(f["stop"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {checkpoint}: {e}")
+            return None, 0
+
+        logger.info(f"Resuming from checkpoint {checkpoint} at image {stop}")
+        return total, stop
+
+    def _save_checkpoint(self, filepath, total, stop):
+        """
+        Save the partial sum of images before `stop` for `filepath`.
+
+        :param filepath: Cache file path of the sum.
+        :param total: Partial sum.
+        :param stop: Index one past the last image in `total`.
+        """
+        _save_atomic(_checkpoint_path(filepath), np.savez, total=total, stop=stop)
+        logger.debug(f"Checkpointed {filepath} at image {stop}")
+
     def estimate(self, b_coef=None, x0=None, tol=1e-5, regularizer=0):
         """Return an estimate as a Volume instance."""
         if b_coef is None:
@@ -147,6 +371,68 @@ class Estimator:
 
         return est
 
+    def estimate_multiresolution(self, factors=(4, 2), tol=1e-5, regularizer=0):
+        """
+        Return an estimate as a Volume instance, solved coarse to fine.
+
+        The problem is first solved with `src` downsampled by each of
+        `factors`, from coarsest to finest, and finally at `src.L`.
+        Each level's kernel and back projection are computed from its
+        downsampled `src`, and the previous solution, upsampled with
+        `Volume.downsample`, is the initial `cg` guess.
+
+        Wall time and `cg` iterations of each level are logged and
+        stored in `self.level_stats`.
+
+        :param factors: Downsampling factors of the coarse levels.
+            Factors leaving fewer than 4 pixels are skipped.
+        :param tol: `cg` tolerance used at every level.
+        :param regularizer: Regularizer used at every level.
+        :return: Volume at resolution `src.L`.
+        """
+        resolutions = sorted(
+            {self.src.L // f for f in factors if f > 1 and self.src.L // f >= 4}
+        )
+        resolutions.append(self.src.L)
+
+        self.level_stats = []
+        x0 = None
+        est = None
+        for L in resolutions:
+            level = self if L == self.src.L else self._level_estimator(L)
+            if est is not None:
+                x0 = level.basis.evaluate_t(est.downsample(L)).asnumpy().flatten()
+
+            tic = time.perf_counter()
+            est = level.estimate(x0=x0, tol=tol, regularizer=regularizer)
+            stats = dict(L=L, iterations=level.i, time=time.perf_counter() - tic)
+            self.level_stats.append(stats)
+            logger.info(
+                f"Resolution {L}: {stats['iterations']} iterations"
+                f" in {stats['time']:.2f}s"
+            )
+
+        return est
+
+    def _level_estimator(self, L):
+        """
+        Return a copy of this estimator for `src` downsampled to `L`.
+
+        :param L: Resolution of the level.
+        :return: Estimator instance.
+        """
+        level = copy.copy(self)
+        # Drop lazy attributes of the full resolution problem.
+        level.__dict__.pop("kernel", None)
+        level.__dict__.pop("precond_kernel", None)
+
+        level.src = self.src.downsample(L)
+        level.basis = self.basis.__class__(L, dtype=self.basis.dtype)
+        if self.checkpoint_prefix:
+            level.checkpoint_prefix = f"{self.checkpoint_prefix}_L{L}"
+
+        return level
+
     def apply_kernel(self, vol_coef, kernel=None):
         """
         Applies the kernel represented by convolution
@@ -164,3 +450,23 @@ class Estimator:
         vol = kernel.convolve_volume(vol)  # returns a Volume
         vol_coef = self.basis.evaluate_t(vol)
         return vol_coef
+
+
+def _checkpoint_path(filepath):
+    """
+    Return the partial sum checkpoint path for the cache file `filepath`.
+    """
+    return f"{os.path.splitext(filepath)[0]}.partial.npz"
+
+
+def _save_atomic(filepath, save, *args, **kwargs):
+    """
+    Write `filepath` using `save(file, *args, **kwargs)`.
+
+    Data is written to a temporary file and moved into place when
+    complete, so interrupted runs never leave a partial file behind.
+    """
+    tmp_filepath = f"{filepath}.{os.getpid()}.tmp"
+    with open(tmp_filepath, "wb") as f:
+        save(f, *args, **kwargs)
+    os.replace(tmp_filepath, filepath)
@@ -13,11 +13,29 @@ class Kernel:
 
 
 class FourierKernel(Kernel):
-    def __init__(self, kernel):
+    def __init__(self, kernel, half_spectrum=False):
+        """
+        Initialize a FourierKernel.
+
+        Only the half spectrum (`rfftn` layout) of the kernel is stored.
+
+        :param kernel: Kernel in Fourier space, an M-by-...-by-M array.
+        :param half_spectrum: Optionally indicate `kernel` is already given
+            as a half spectrum, truncated to `M//2+1` along its last axis.
+        """
         self.ndim = kernel.ndim
-        self.kernel = kernel
         self.M = kernel.shape[0]
         self.dtype = kernel.dtype
+        if not half_spectrum:
+            kernel = _half_spectrum(kernel, axes=tuple(range(self.ndim)))
+        self.kernel_h = kernel
+
+    @property
+    def kernel(self):
+        """
+        Full spectrum kernel, reconstructed from `kernel_h`.
+        """
+        return _full_spectrum(self.kernel_h, self.M, axes=tuple(range(self.ndim)))
 
     def __add__(self, delta):
         """
@@ -31,12 +49,12 @@ class FourierKernel(Kernel):
             to be able to use it within optimization loops. This operator allows one to use the FourierKernel object
             with the underlying 'kernel' attribute tweaked with a regularization parameter.
         """
-        new_kernel = self.kernel + float(delta)
-        return FourierKernel(new_kernel)
+        new_kernel = self.kernel_h + float(delta)
+        return FourierKernel(new_kernel, half_spectrum=True)
 
     def circularize(self):
         logger.info("Circularizing kernel")
-        kernel = np.real(fft.ifftn(self.kernel))
+        kernel = fft.irfftn(self.kernel_h, s=(self.M,) * self.ndim)
         kernel = fft.mdim_fftshift(kernel)
 
         for dim in range(self.ndim):
@@ -70,21 +88,22 @@ class FourierKernel(Kernel):
         """
         Convolve volume with kernel
 
-        :param x: A Volume instance
+        :param x: A Volume instance, may be a stack of volumes.
         :param in_plane: Operate on Volume `x` in place.  Optional bool, defaults False.
             This saves memory in exchange for mutating the input data.
         :return: Volume instance convolved by the kernel with the same dimensions as before.
         """
 
-        kernel_f = self.kernel[..., np.newaxis]
-        return self._convolve_volume(x, kernel_f, in_place=in_place)
+        return self._convolve_volume(x, self.kernel_h, in_place=in_place)
 
-    def _convolve_volume(self, x, kernel_f, in_place=False):
+    def _convolve_volume(self, x, kernel_h, in_place=False):
         """
-        Private method for convolving volume with kernel_f.
+        Private method for convolving volume with kernel_h.
 
-        :param x: A Volume instance
-        :param kernel_f: Kernel as numpy array.
+        Each volume in the stack is transformed once with `rfftn`.
+
+        :param x: A Volume instance, may be a stack of volumes.
+        :param kernel_h: Half spectrum kernel as numpy array, see `kernel_h`.
         :param in_plane: Operate on Volume `x` in place.  Optional bool, defaults False.
             This saves memory in exchange for mutating the input data.
         :return: Volume instance convolved by the kernel with the same dimensions as before.
@@ -94,33 +113,57 @@ class FourierKernel(Kernel):
             x = Volume(x)
 
         N = x.resolution
-        N_ker = kernel_f.shape[0]
-
-        assert kernel_f.shape[3] == 1, "Convolution kernel must be cubic"
-        assert len(set(kernel_f.shape[:3])) == 1, "Convolution kernel must be cubic"
-
-        is_singleton = len(x) == 1
+        N_ker = kernel_h.shape[0]
 
-        if is_singleton:
-            pad_width = [(0, N_ker - N)] * 3
-            _x = np.pad(x.asnumpy()[0], pad_width)
-            x_f = fft.fftn(_x)[..., np.newaxis]
-        else:
-            raise NotImplementedError("not yet")
+        assert kernel_h.shape == (
+            N_ker,
+            N_ker,
+            N_ker // 2 + 1,
+        ), "Convolution kernel must be cubic"
 
-        x_f = x_f * kernel_f
+        x_f = self._padded_fft(x.asnumpy().reshape(-1, N, N, N), N_ker)
+        x_f *= kernel_h
 
         # `in_place` mutates the original volume
         if not in_place:
             x = Volume.empty_like(x)
 
-        if is_singleton:
-            x[0] = np.real(fft.ifftn(x_f[..., 0])[:N, :N, :N])
-        else:
-            raise NotImplementedError("not yet")
+        x._data[...] = self._crop_ifft(x_f, N_ker, N).reshape(x.shape)
 
         return x
 
+    def _padded_fft(self, x, N_ker):
+        """
+        Zero pad a stack of volumes to `N_ker` and apply `rfftn`.
+
+        The padded buffer is kept between calls, only the `N`-cube
+        corner is ever written so the padding remains zero.  Kernels
+        should therefore not be shared between threads.
+
+        :param x: Array of volumes, shape (n, N, N, N).
+        :param N_ker: Padded resolution.
+        :return: Half spectrum array, shape (n, N_ker, N_ker, N_ker//2+1).
+        """
+        n, N = x.shape[:2]
+        shape = (n,) + (N_ker,) * 3
+        buf = getattr(self, "_pad_buffer", None)
+        if buf is None or buf.shape != shape or buf.dtype != x.dtype:
+            buf = self._pad_buffer = np.zeros(shape, dtype=x.dtype)
+        buf[:, :N, :N, :N] = x
+
+        return fft.rfftn(buf, axes=(1, 2, 3))
+
+    def _crop_ifft(self, x_f, N_ker, N):
+        """
+        Apply `irfftn` to a stack of half spectra and crop to `N`.
+
+        :param x_f: Half spectrum array, shape (n, N_ker, N_ker, N_ker//2+1).
+        :param N_ker: Padded resolution.
+        :param N: Output resolution.
+        :return: Array of volumes, shape (n, N, N, N).
+        """
+        return fft.irfftn(x_f, s=(N_ker,) * 3, axes=(1, 2, 3))[:, :N, :N, :N]
+
     def convolve_volume_matrix(self, x):
         """
         Convolve volume matrix with kernel
@@ -130,30 +173,35 @@ class FourierKernel(Kernel):
         """
         shape = x.shape
         N = shape[0]
-        kernel_f = self.kernel
+        kernel_h = self.kernel_h
         assert (
             len(set(shape[i] for i in range(5))) == 1
         ), "Volume matrix must be cubic and square"
 
         # TODO from MATLAB code: Deal with rolled dimensions
-        N_ker = kernel_f.shape[0]
+        N_ker = self.M
+
+        # The real input is transformed along the last axis first,
+        # halving the size of every following transform.
+        _pad_width = [(0, 0)] * 5 + [(0, N_ker - N)]
+        x = fft.rfft(np.pad(x, _pad_width), axis=5)
 
         # Note from MATLAB code:
         # Order is important here.  It's about 20% faster to run from 1 through 6 compared with 6 through 1.
         # TODO: Experiment with fft axis order
-        for i in range(6):
+        for i in range(5):
             _pad_width = [(0, 0)] * 6
             _pad_width[i] = (0, N_ker - N)
             x = fft.fft(np.pad(x, _pad_width), axis=i)
 
-        x *= kernel_f
+        x *= kernel_h
 
         indices = list(range(N))
-        for i in range(5, -1, -1):
+        for i in range(4, -1, -1):
             x = fft.ifft(x, axis=i)
             x = x.take(indices, axis=i)
 
-        return np.real(x)
+        return fft.irfft(x, n=N_ker, axis=5)[..., :N]
 
     def toeplitz(self, L=None):
         """
@@ -176,24 +224,44 @@ class FourierKernel(Kernel):
 
 
 class FourierKernelMatrix(FourierKernel):
-    def __init__(self, kermat):
+    def __init__(self, kermat, half_spectrum=False):
+        """
+        Initialize a FourierKernelMatrix.
+
+        Only the half spectrum (`rfftn` layout) of each kernel is stored.
+
+        :param kermat: r-by-r matrix of Fourier kernels, shaped (r, r, M, M, M).
+        :param half_spectrum: Optionally indicate `kermat` is already given
+            as half spectra, shaped (r, r, M, M, M//2+1).
+        """
         self.ndim = kermat.ndim - 2
-        self.kermat = kermat
         self.r = kermat.shape[0]
         assert kermat.shape[1] == self.r
         self.dtype = kermat.dtype
-        self.M = kermat.shape[-1]
+        self.M = kermat.shape[2]
+        if not half_spectrum:
+            kermat = _half_spectrum(kermat, axes=(2, 3, 4))
+        self.kermat_h = kermat
+
+    @property
+    def kermat(self):
+        """
+        Full spectrum kernel matrix, reconstructed from `kermat_h`.
+        """
+        return _full_spectrum(self.kermat_h, self.M, axes=(2, 3, 4))
 
     def __add__(self, delta):
-        new_kermat = self.kermat + delta
-        return FourierKernelMatrix(new_kermat)
+        new_kermat = self.kermat_h + delta
+        return FourierKernelMatrix(new_kermat, half_spectrum=True)
 
     def circularize(self):
         _L = self.M // 2
         xx = np.empty((self.r, self.r, _L, _L, _L), self.dtype)
         for k in range(self.r):
             for j in range(self.r):
-                xx[k, j] = FourierKernel(self.kermat[k, j]).circularize().real
+                xx[k, j] = FourierKernel(
+                    self.kermat_h[k, j], half_spectrum=True
+                ).circularize()
         return xx
 
     def convolve_volume(self, x, k, j, in_place=False):
@@ -208,8 +276,37 @@ class FourierKernelMatrix(FourierKernel):
         :return: Volume instance convolved by the kernel with the same dimensions as before.
         """
 
-        kernel_f = self.kermat[k, j, ..., np.newaxis]
-        return self._convolve_volume(x, kernel_f, in_place=in_place)
+        return self._convolve_volume(x, self.kermat_h[k, j], in_place=in_place)
+
+    def convolve_volumes(self, x):
+        """
+        Apply the kernel matrix to a stack of `r` volumes.
+
+        Computes `out[k] = sum_j kermat[k, j] * x[j]`, where `*` is
+        convolution.  Each volume is transformed once and the kernel
+        matrix is applied as a batched matrix product per frequency,
+        requiring `2r` FFTs instead of `2r^2`.
+
+        :param x: A Volume instance holding a stack of `r` volumes.
+        :return: Volume instance holding `r` convolved volumes.
+        """
+
+        if not isinstance(x, Volume):
+            x = Volume(x)
+
+        assert len(x) == self.r, f"Expected a stack of {self.r} volumes."
+
+        N = x.resolution
+        N_ker = self.M
+        kermat_h = self.kermat_h
+
+        x_f = self._padded_fft(x.asnumpy().reshape(self.r, N, N, N), N_ker)
+        x_f = np.einsum("kj...,j...->k...", kermat_h, x_f)
+
+        return Volume(
+            self._crop_ifft(x_f, N_ker, N).astype(x.dtype, copy=False),
+            pixel_size=x.pixel_size,
+        )
 
     def convolve_volume_matrix(self, x):
         raise NotImplementedError("Not implemented for Fourier Kernel Matrix")
@@ -221,6 +318,50 @@ class FourierKernelMatrix(FourierKernel):
         Amat = np.empty((self.r, self.r, self.L, self.L, self.L))
         for k in range(self.r):
             for j in range(self.r):
-                Amat[k, j] = FourierKernel(self.kermat[k, j]).toeplitz(L)
+                Amat[k, j] = FourierKernel(
+                    self.kermat_h[k, j], half_spectrum=True
+                ).toeplitz(L)
 
         return Amat
+
+
+def _half_spectrum(kernel_f, axes):
+    """
+    Return the Hermitian part of `kernel_f` in `rfftn` layout.
+
+    Convolving a real volume only sees the Hermitian part,
+    `(K(w) + conj(K(-w))) / 2`, of a Fourier kernel `K`, which is
+    fully described by the half spectrum over the last of `axes`.
+    For the real, symmetric kernels used in reconstruction this is
+    just a slice of `kernel_f`.
+
+    :param kernel_f: Fourier kernel array.
+    :param axes: Consecutive frequency axes of `kernel_f`.
+    :return: Array with the last of `axes` truncated to `M//2+1`.
+    """
+    M = kernel_f.shape[axes[-1]]
+    # K(-w) on the FFT grid, index 0 maps to itself.
+    flipped = np.roll(np.flip(kernel_f, axis=axes), 1, axis=axes)
+    kernel_h = (kernel_f + np.conj(flipped)) / 2
+    if not np.iscomplexobj(kernel_f):
+        kernel_h = kernel_h.real
+    return np.ascontiguousarray(np.take(kernel_h, np.arange(M // 2 + 1), axis=axes[-1]))
+
+
+def _full_spectrum(kernel_h, M, axes):
+    """
+    Expand a half spectrum kernel to the full `M`-cube spectrum.
+
+    Inverse of `_half_spectrum`, using `K(-w) = conj(K(w))`.
+
+    :param kernel_h: Half spectrum kernel array.
+    :param M: Full size of the last of `axes`.
+    :param axes: Consecutive frequency axes of `kernel_h`.
+    :return: Array with the last of `axes` of size `M`.
+    """
+    H = kernel_h.shape[axes[-1]]
+    # Negate the frequencies of all but the last axis.
+    flipped = np.roll(np.flip(kernel_h, axis=axes[:-1]), 1, axis=axes[:-1])
+    # Negative frequencies `M-H+1, ..., M-1` of the last axis.
+    rest = np.conj(np.take(flipped, np.arange(M - H, 0, -1), axis=axes[-1]))
+    return np.concatenate((kernel_h, rest), axis=axes[-1])
@@ -18,6 +18,11 @@ logger = logging.getLogger(__name__)
 
 
 class WeightedVolumesEstimator(Estimator):
+    _preconditioners = ("circulant", "block_circulant", "jacobi", "multigrid")
+
+    # Upper bound on the size of the dense coarse `multigrid` operator.
+    _max_coarse_count = 2048
+
     def __init__(self, weights, *args, **kwargs):
         """
         Weighted mean volume estimation.
@@ -50,6 +55,17 @@ class WeightedVolumesEstimator(Estimator):
         Special Issue on Cryo-Electron Microscopy and Inverse Problems
         https://doi.org/10.1088/1361-6420/ab4f55
 
+        In addition to "circulant", the following `preconditioner`
+        options are supported:
+
+        - "block_circulant": Inverts the r x r matrix of circularized
+          kernels at each frequency, accounting for cross terms
+          between volumes.
+        - "jacobi": Inverse diagonal of the operator in `basis`
+          coefficient space, estimated by random probing.
+        - "multigrid": "block_circulant" with an additive coarse
+          correction, solving a downsampled problem exactly.
+
         :param weights: Matrix of weights, n x r.
         """
 
@@ -82,79 +98,99 @@ class WeightedVolumesEstimator(Estimator):
         """
         Compute and return FourierKernelMatrix instance.
         """
-        return FourierKernelMatrix(self._compute_kernel())
+        return FourierKernelMatrix(self._compute_kernel(), half_spectrum=True)
 
     def _compute_kernel(self):
         """
-        :return: r x r matrix of volumes, shaped (r, r, 2L, 2L, 2L).
+        :return: r x r matrix of half spectrum (`rfftn` layout) kernels,
+            shaped (r, r, 2L, 2L, L+1).
         """
 
         _2L = 2 * self.src.L
-        # Note, because we're iteratively summing it is critical we zero this array.
-        kernel = np.zeros((self.r, self.r, _2L, _2L, _2L), dtype=self.dtype)
+        kernel = np.empty((self.r, self.r, _2L, _2L, _2L), dtype=self.dtype)
+
+        # Upper triangle (k, j), j <= k, of the symmetric r x r kernel.
+        ks, js = np.tril_indices(self.r)
+        kernel[ks, js] = self._accumulate(self._compute_kernel_pairs, "kernel")
+
+        # r x r symmetric
+        # copy accumulated entries of kernel[k,j] to kernel[j,k]
+        for k, j in zip(ks, js):
+            if j != k:
+                kernel[j, k] = kernel[k, j]
+
+        kermat_f = np.zeros((self.r, self.r, _2L, _2L, _2L // 2 + 1), dtype=self.dtype)
+        logger.info("Computing non-centered Fourier Transform Kernel Mat")
+        for k in range(self.r):
+            for j in range(self.r):
+                # Ensure symmetric kernel
+                kernel[k, j, 0, :, :] = 0
+                kernel[k, j, :, 0, :] = 0
+                kernel[k, j, :, :, 0] = 0
+
+                kernel[k, j] = fft.mdim_ifftshift(kernel[k, j], range(0, 3))
+                kernel_f = fft.rfftn(kernel[k, j], axes=(0, 1, 2))
+
+                kernel_f = np.real(kernel_f)
+                kermat_f[k, j] = kernel_f
+
+        return kermat_f
+
+    def _compute_kernel_pairs(self, start, stop):
+        """
+        Accumulate the spatial kernel of images in `[start, stop)`.
+
+        :param start: Index of the first image.
+        :param stop: Index one past the last image.
+        :return: Kernel of each (k, j) pair of `np.tril_indices(r)`,
+            shaped (n_pairs, 2L, 2L, 2L).
+        """
+        _2L = 2 * self.src.L
 
         # Handle symmetry boosting.
         sym_rots = np.eye(3, dtype=self.dtype)[None]
         if self.boost:
             sym_rots = self.src.symmetry_group.matrices.astype(self.dtype, copy=False)
 
-        for i in range(0, self.src.n, self.batch_size):
-            _range = np.arange(i, min(self.src.n, i + self.batch_size), dtype=int)
+        ks, js = np.tril_indices(self.r)
+        n_pairs = len(ks)
+        # Note, because we're iteratively summing it is critical we zero this array.
+        kernel_pairs = np.zeros((n_pairs, _2L, _2L, _2L), dtype=self.dtype)
+
+        for i in range(start, stop, self.batch_size):
+            _range = np.arange(i, min(stop, i + self.batch_size), dtype=int)
             sq_filters_f = evaluate_src_filters_on_grid(self.src, _range) ** 2
             amplitudes_sq = (self.src.amplitudes[_range] ** 2).astype(
                 self.dtype, copy=False
             )
 
-            for k in range(self.r):
-                for j in range(k + 1):
-                    weights = sq_filters_f * amplitudes_sq
-
-                    if self.src.L % 2 == 0:
-                        weights[0, :, :] = 0
-                        weights[:, 0, :] = 0
+            weights = sq_filters_f * amplitudes_sq
 
-                    weights *= (
-                        self.weights[_range, j] * self.weights[_range, k]
-                    ).reshape(1, 1, len(_range))
+            if self.src.L % 2 == 0:
+                weights[0, :, :] = 0
+                weights[:, 0, :] = 0
 
-                    weights = np.transpose(weights, (2, 0, 1)).flatten()
+            weights = np.transpose(weights, (2, 0, 1)).reshape(len(_range), -1)
 
-                    # Apply boosting.
-                    batch_kernel = np.zeros((_2L, _2L, _2L), dtype=self.dtype)
-                    for sym_rot in sym_rots:
-                        rotations = sym_rot @ self.src.rotations[_range]
-                        pts_rot = rotated_grids(self.src.L, rotations)
-                        pts_rot = pts_rot.reshape((3, -1))
+            # Weight vectors of every (k, j) pair, transformed together
+            # as one batch sharing the points of each symmetry rotation.
+            pair_weights = self.weights[_range][:, ks] * self.weights[_range][:, js]
+            pair_weights = (pair_weights.T[:, :, None] * weights).reshape(n_pairs, -1)
 
-                        batch_kernel += (
-                            1
-                            / (self.r * self.src.L**4)
-                            * anufft(weights, pts_rot, (_2L, _2L, _2L), real=True)
-                        )
+            # Apply boosting.
+            for sym_rot in sym_rots:
+                rotations = sym_rot @ self.src.rotations[_range]
+                pts_rot = rotated_grids(self.src.L, rotations)
+                pts_rot = pts_rot.reshape((3, -1))
 
-                    kernel[k, j] += batch_kernel
+                batch_kernel = anufft(
+                    pair_weights, pts_rot, (_2L, _2L, _2L), real=True
+                ).reshape(n_pairs, _2L, _2L, _2L)
+                batch_kernel *= 1 / (self.r * self.src.L**4)
 
-                    # r x r symmetric
-                    # accumulate batch entries of kernel[k,j] to kernel[j,k]
-                    if j != k:
-                        kernel[j, k] += batch_kernel
+                kernel_pairs += batch_kernel
 
-        kermat_f = np.zeros((self.r, self.r, _2L, _2L, _2L), dtype=self.dtype)
-        logger.info("Computing non-centered Fourier Transform Kernel Mat")
-        for k in range(self.r):
-            for j in range(self.r):
-                # Ensure symmetric kernel
-                kernel[k, j, 0, :, :] = 0
-                kernel[k, j, :, 0, :] = 0
-                kernel[k, j, :, :, 0] = 0
-
-                kernel[k, j] = fft.mdim_ifftshift(kernel[k, j], range(0, 3))
-                kernel_f = fft.fftn(kernel[k, j], axes=(0, 1, 2))
-
-                kernel_f = np.real(kernel_f)
-                kermat_f[k, j] = kernel_f
-
-        return kermat_f
+        return kernel_pairs
 
     def src_backward(self):
         """
@@ -164,21 +200,42 @@ class WeightedVolumesEstimator(Estimator):
             as coefficients of `basis`.
         """
         # Handle symmetry boosting.
+        sym_order = 1
+        if self.boost:
+            sym_order = len(self.src.symmetry_group.matrices)
+
+        # src_vols_wt_backward
+        vol_rhs = Volume(self._accumulate(self._src_backward_range, "src_backward"))
+
+        res = np.sqrt(self.src.n * sym_order, dtype=self.dtype) * self.basis.evaluate_t(
+            vol_rhs
+        )
+        logger.info(f"Determined weighted adjoint mappings. Shape = {res.shape}")
+
+        return res
+
+    def _src_backward_range(self, start, stop):
+        """
+        Accumulate the weighted back projections of images in `[start, stop)`.
+
+        :param start: Index of the first image.
+        :param stop: Index one past the last image.
+        :return: Array of `r` volumes, shaped (r, L, L, L).
+        """
+        # Handle symmetry boosting.
         symmetry_group = None
         sym_order = 1
         if self.boost:
             symmetry_group = self.src.symmetry_group
             sym_order = len(symmetry_group.matrices)
 
-        # src_vols_wt_backward
         vol_rhs = Volume(
             np.zeros((self.r, self.src.L, self.src.L, self.src.L), dtype=self.dtype)
         )
 
-        for i in range(0, self.src.n, self.batch_size):
+        # Each batch is loaded once and shared by all `r` volumes.
+        for i, im in self.src.iter_batches(self.batch_size, start=start, stop=stop):
             for k in range(self.r):
-                im = self.src.images[i : i + self.batch_size]
-
                 batch_vol_rhs = self.src.im_backward(
                     im,
                     i,
@@ -187,12 +244,7 @@ class WeightedVolumesEstimator(Estimator):
                 ) / float(self.src.n * sym_order)
                 vol_rhs[k] += batch_vol_rhs.astype(self.dtype)
 
-        res = np.sqrt(self.src.n * sym_order, dtype=self.dtype) * self.basis.evaluate_t(
-            vol_rhs
-        )
-        logger.info(f"Determined weighted adjoint mappings. Shape = {res.shape}")
-
-        return res
+        return vol_rhs.asnumpy()
 
     def conj_grad(self, b_coef, x0=None, tol=1e-5, regularizer=0):
         count = b_coef.shape[-1]  # b_coef should be (r, basis.count)
@@ -206,15 +258,12 @@ class WeightedVolumesEstimator(Estimator):
             matvec=partial(self.apply_kernel, kernel=kernel),
             dtype=self.dtype,
         )
-        if self.precond_kernel is None:
-            M = None
-        else:
-            precond_kernel = self.precond_kernel
-            if regularizer > 0:
-                precond_kernel += regularizer
+        precond = self._precond_matvec(kernel, regularizer)
+        M = None
+        if precond is not None:
             M = LinearOperator(
                 (self.r * count, self.r * count),
-                matvec=partial(self.apply_kernel, kernel=precond_kernel),
+                matvec=precond,
                 dtype=self.dtype,
             )
 
@@ -266,6 +315,162 @@ class WeightedVolumesEstimator(Estimator):
 
         return x.reshape(self.r, self.basis.count).astype(self.dtype, copy=False)
 
+    def _precond_matvec(self, kernel, regularizer=0):
+        """
+        Return a function applying the configured preconditioner.
+
+        :param kernel: Regularized kernel of the system being solved.
+        :param regularizer: Regularization added to `kernel`.
+        :return: Callable mapping flattened coefficients to flattened
+            coefficients, or `None` when not preconditioning.
+        """
+        if self.preconditioner == "circulant":
+            precond_kernel = self.precond_kernel
+            if regularizer > 0:
+                precond_kernel += regularizer
+            return partial(self._apply_flat, kernel=precond_kernel)
+
+        elif self.preconditioner == "block_circulant":
+            precond_kernel = self._block_circulant_kernel(kernel)
+            return partial(self._apply_flat, kernel=precond_kernel)
+
+        elif self.preconditioner == "jacobi":
+            diag = self._jacobi_diagonal(kernel)
+            return lambda x: x / diag
+
+        elif self.preconditioner == "multigrid":
+            precond_kernel = self._block_circulant_kernel(kernel)
+            coarse = self._coarse_correction(kernel)
+            return lambda x: self._apply_flat(x, precond_kernel) + coarse(x)
+
+        return None
+
+    def _apply_flat(self, vol_coef, kernel):
+        """
+        `apply_kernel` returning a flat array.
+        """
+        return np.asarray(self.apply_kernel(vol_coef, kernel=kernel)).reshape(-1)
+
+    def _kermat(self, kernel):
+        """
+        Return the full spectrum kernel matrix of `kernel`, shaped (r, r, M, M, M).
+        """
+        if isinstance(kernel, FourierKernelMatrix):
+            return kernel.kermat
+        return kernel.kernel[None, None]
+
+    def _from_kermat(self, kermat):
+        """
+        Return a kernel object of the type used by this estimator.
+        """
+        if self.r == 1 and not isinstance(self.kernel, FourierKernelMatrix):
+            return FourierKernel(kermat[0, 0])
+        return FourierKernelMatrix(kermat)
+
+    def _block_circulant_kernel(self, kernel):
+        """
+        Return the block circulant preconditioner kernel for `kernel`.
+
+        The r x r matrix of circularized kernels is pseudo-inverted
+        independently at each frequency.
+
+        :param kernel: Kernel of the system being solved.
+        :return: Kernel object.
+        """
+        logger.info("Computing block circulant preconditioner kernel")
+        circ = kernel.circularize()
+        circ = circ.reshape(self.r, self.r, *circ.shape[-3:])
+        shape = circ.shape
+
+        circ = np.moveaxis(circ.reshape(self.r, self.r, -1), -1, 0)
+        circ_inv = np.linalg.pinv(circ, hermitian=True)
+        circ_inv = np.moveaxis(circ_inv, 0, -1).reshape(shape)
+
+        return self._from_kermat(circ_inv.astype(self.dtype, copy=False))
+
+    def _jacobi_diagonal(self, kernel, n_probes=16):
+        """
+        Estimate the diagonal of the operator in coefficient space.
+
+        Uses the probing estimator `sum(v * A v) / sum(v * v)` over
+        `n_probes` random sign vectors `v`.  Estimates are floored at a
+        small fraction of the largest, keeping the preconditioner
+        positive definite.
+
+        :param kernel: Kernel of the system being solved.
+        :param n_probes: Number of probe vectors.
+        :return: Array of diagonal entries, length `r * basis.count`.
+        """
+        logger.info(f"Estimating Jacobi preconditioner from {n_probes} probes")
+        rng = np.random.default_rng(0)
+        num = np.zeros(self.r * self.basis.count, dtype=np.float64)
+        for _ in range(n_probes):
+            v = rng.choice([-1.0, 1.0], size=num.size).astype(self.dtype)
+            num += v * self._apply_flat(v, kernel)
+        diag = num / n_probes
+
+        return np.maximum(diag, 1e-3 * diag.max()).astype(self.dtype)
+
+    def _coarse_correction(self, kernel):
+        """
+        Return the coarse grid correction for the `multigrid` preconditioner.
+
+        The problem is restricted to a coarse resolution with
+        `Volume.downsample`, where the kernel is obtained by cropping the
+        low frequencies of `kernel`.  The coarse operator is formed
+        densely and pseudo-inverted once, after scaling it to match the
+        fine operator on a random probe.
+
+        :param kernel: Kernel of the system being solved.
+        :return: Callable mapping flattened fine coefficients to the
+            flattened coarse correction.
+        """
+        L = self.src.L
+        L_c = max(L // 2, 2)
+        basis_c = self.basis.__class__(L_c, dtype=self.dtype)
+        while L_c > 2 and self.r * basis_c.count > self._max_coarse_count:
+            L_c //= 2
+            basis_c = self.basis.__class__(L_c, dtype=self.dtype)
+        count_c = basis_c.count
+        logger.info(f"Computing coarse correction at resolution {L_c}")
+
+        # Crop the centered low frequencies of the kernel.
+        kermat = fft.mdim_fftshift(self._kermat(kernel), range(2, 5))
+        start = L - L_c
+        crop = slice(start, start + 2 * L_c)
+        kermat_c = fft.mdim_ifftshift(kermat[:, :, crop, crop, crop], range(2, 5))
+
+        # Dense coarse operator, one basis function per column.
+        vols = Coef(basis_c, np.eye(count_c, dtype=self.dtype)).evaluate()
+        A_c = np.zeros((self.r, count_c, self.r, count_c), dtype=np.float64)
+        for k in range(self.r):
+            for j in range(self.r):
+                conv = FourierKernel(kermat_c[k, j]).convolve_volume(vols)
+                A_c[k, :, j, :] = basis_c.evaluate_t(conv).asnumpy().T
+        A_c = A_c.reshape(self.r * count_c, self.r * count_c)
+
+        def prolong(c):
+            vol = Coef(basis_c, c.reshape(self.r, count_c)).evaluate()
+            return self.basis.evaluate_t(vol.downsample(L)).asnumpy()
+
+        def restrict(x):
+            vol = Coef(self.basis, x.reshape(self.r, self.basis.count)).evaluate()
+            vol = vol.downsample(L_c) * (L / L_c) ** 3
+            return basis_c.evaluate_t(vol).asnumpy()
+
+        # Match the scale of the coarse and fine operators.
+        v = np.random.default_rng(0).standard_normal(self.r * count_c)
+        v = v.astype(self.dtype)
+        fine = np.vdot(restrict(self._apply_flat(prolong(v), kernel)), v)
+        A_c *= fine / np.vdot(v, A_c @ v)
+
+        A_c_inv = np.linalg.pinv(A_c, hermitian=True).astype(self.dtype)
+
+        def coarse(x):
+            return prolong(A_c_inv @ restrict(x).reshape(-1)).reshape(-1)
+
+        return coarse
+
     def apply_kernel(self, vol_coef, kernel=None):
         """
         Applies the kernel represented by convolution
@@ -282,15 +487,11 @@ class WeightedVolumesEstimator(Estimator):
         if vol_coef.ndim == 1:
             vol_coef = vol_coef.reshape(self.r, self.basis.count)
 
-        vols_out = Volume(
-            np.zeros((self.r, self.src.L, self.src.L, self.src.L), dtype=self.dtype)
-        )
         vol = Coef(self.basis, vol_coef.astype(self.dtype, copy=False)).evaluate()
 
-        for k in range(self.r):
-            for j in range(self.r):
-                vols_out[k] = vols_out[k] + kernel.convolve_volume(vol[j], j, k)
-                # Note this is where we would add mask_gamma
+        # The kernel matrix is symmetric, `kermat[k, j] == kermat[j, k]`.
+        vols_out = kernel.convolve_volumes(vol)
+        # Note this is where we would add mask_gamma
 
         vol_coef = self.basis.evaluate_t(vols_out)
 
@@ -327,4 +528,4 @@ class MeanEstimator(WeightedVolumesEstimator):
         Compute and return `FourierKernel` instance.
         """
         # Note for the r=1 we select and return a single kernel.
-        return FourierKernel(self._compute_kernel()[0][0])
+        return FourierKernel(self._compute_kernel()[0][0], half_spectrum=True)
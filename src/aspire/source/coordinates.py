@@ -1,9 +1,12 @@
 import logging
 import os
 from abc import ABC, abstractmethod
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from collections.abc import Iterable
+from concurrent import futures
 from math import floor
+from multiprocessing import cpu_count
+from threading import Lock
 
 import mrcfile
 import numpy as np
@@ -17,6 +20,107 @@ from aspire.utils import RelionStarFile
 logger = logging.getLogger(__name__)
 
 
+class _MicrographPool:
+    """
+    Thread-safe, bounded LRU of opened micrographs keyed by file path.
+
+    MRC micrographs are memory-mapped, so cropping a particle only reads
+    the rows spanned by its box.  Other formats (eg, TIFF) are loaded
+    into memory.  When more than `max_open` micrographs are held, the
+    least recently used one is released.
+    """
+
+    def __init__(self, max_open=32):
+        """
+        :param max_open: Maximum number of micrographs held open.
+        """
+        self.max_open = int(max_open)
+        self._micrographs = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _open(filepath):
+        """
+        Open `filepath`, returning a (handle, 2D array) pair.
+        The handle is None for micrographs loaded into memory.
+        """
+        if os.path.splitext(filepath)[1] in (".mrc", ".mrcs"):
+            mrc = mrcfile.mmap(filepath, mode="r", permissive=True)
+            arr = mrc.data
+        else:
+            mrc = None
+            arr = Image.load(filepath).asnumpy()
+        # A micrograph may be stored as a stack containing one image.
+        if arr.ndim == 3:
+            arr = arr[0]
+        return mrc, arr
+
+    def data(self, filepath):
+        """
+        Return the micrograph stored at `filepath` as a 2D array.
+
+        :param filepath: Path to micrograph file.
+        :return: Array of shape (Y, X), memory-mapped for MRC files.
+        """
+        with self._lock:
+            entry = self._micrographs.get(filepath)
+            if entry is not None:
+                self._micrographs.move_to_end(filepath)
+                return entry[1]
+
+        # Open outside the lock so that threads reading other
+        # micrographs are not serialized behind a slow load.
+        entry = self._open(filepath)
+
+        with self._lock:
+            existing = self._micrographs.get(filepath)
+            if existing is not None:
+                # Another thread opened the same file first.
+                self._close(entry)
+                return existing[1]
+            self._micrographs[filepath] = entry
+            # Evict least recently used micrographs.  Arrays already
+            # handed out remain valid after their handle is closed.
+            while len(self._micrographs) > self.max_open:
+                _, old = self._micrographs.popitem(last=False)
+                self._close(old)
+        return entry[1]
+
+    @staticmethod
+    def _close(entry):
+        if entry[0] is not None:
+            entry[0].close()
+
+    def close(self):
+        """
+        Release all held micrographs.
+        """
+        with self._lock:
+            while self._micrographs:
+                _, entry = self._micrographs.popitem()
+                self._close(entry)
+
+    def __len__(self):
+        return len(self._micrographs)
+
+    def __deepcopy__(self, memo):
+        # Open micrographs are not shared between copies of a source.
+        return _MicrographPool(self.max_open)
+
+    def __getstate__(self):
+        return {"max_open": self.max_open}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __del__(self):
+        # Interpreter shutdown may have already torn down attributes.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
 class CoordinateSource(ImageSource, ABC):
     """
     Base class defining common methods for data sources consisting of full
@@ -44,9 +148,27 @@ class CoordinateSource(ImageSource, ABC):
     The `_images()` method, called via `ImageSource.images()` crops
     the particle images out of the micrograph and returns them as a stack.
     This also allows the CoordinateSource to be saved to an `.mrcs` stack.
+    Micrographs are cropped in a thread pool, and a bounded pool of
+    recently used micrographs is kept open between calls.
     """
 
-    def __init__(self, files, particle_size, max_rows, B, symmetry_group):
+    _cache_key_exclude = ImageSource._cache_key_exclude + (
+        "n_workers",
+        "_micrograph_pool",
+    )
+
+    def __init__(
+        self,
+        files,
+        particle_size,
+        max_rows,
+        B,
+        symmetry_group,
+        n_workers=-1,
+        max_open_micrographs=32,
+    ):
+        self.n_workers = n_workers
+        self._micrograph_pool = _MicrographPool(max_open_micrographs)
         mrc_paths, coord_paths = [f[0] for f in files], [f[1] for f in files]
         # the particle_size parameter is the *user-specified* argument
         # and is used in self._populate_particles
@@ -136,17 +258,24 @@ class CoordinateSource(ImageSource, ABC):
 
         ImageSource.__init__(self, L=L, n=n, dtype=dtype, symmetry_group=symmetry_group)
 
+        # Array copies of self.particles used when cropping.
+        self._particle_mrc_indices = np.array(
+            [particle[0] for particle in self.particles], dtype=int
+        )
+        self._particle_boxes = np.array(
+            [particle[1] for particle in self.particles], dtype=int
+        ).reshape(n, 4)
+
         # map mrc indices to particle indices
         # i'th element contains a list of particle indices corresponding to i'th mrc
-        self.mrc_index_to_particles = []
-        for mrc_idx in range(self.num_micrographs):
-            self.mrc_index_to_particles.append(
-                [
-                    particle_idx
-                    for particle_idx, particle in enumerate(self.particles)
-                    if particle[0] == mrc_idx
-                ]
-            )
+        order = np.argsort(self._particle_mrc_indices, kind="stable")
+        bounds = np.cumsum(
+            np.bincount(self._particle_mrc_indices, minlength=self.num_micrographs)
+        )
+        self.mrc_index_to_particles = [
+            order[start:stop].tolist()
+            for start, stop in zip(np.r_[0, bounds[:-1]], bounds)
+        ]
 
         # CTF envelope decay factor
         self.B = B
@@ -157,15 +286,10 @@ class CoordinateSource(ImageSource, ABC):
         self.set_metadata("__filter_indices", np.zeros(self.n, dtype=int))
 
         # populate __mrc_filename and __mrc_index
-        for mrc_index, particle_indices in enumerate(self.mrc_index_to_particles):
-            self.set_metadata(
-                "__mrc_index",
-                mrc_index,
-                particle_indices,
-            )
-            self.set_metadata(
-                "__mrc_filepath", self.mrc_paths[mrc_index], particle_indices
-            )
+        self.set_metadata("__mrc_index", self._particle_mrc_indices)
+        self.set_metadata(
+            "__mrc_filepath", np.array(self.mrc_paths)[self._particle_mrc_indices]
+        )
 
         # Any further operations should not mutate this instance.
         self._mutable = False
@@ -275,29 +399,25 @@ class CoordinateSource(ImageSource, ABC):
 
         :return: Number of particles removed
         """
-        out_of_range = []
-        for i, particle in enumerate(self.particles):
-            start_x, start_y, size_x, size_y = particle[1]
-            # get shape of corresponding micrograph
-            mrc_index = particle[0]
-            mrc_shape = self.mrc_shapes[mrc_index]
-            if (
-                start_x < 0
-                or start_y < 0
-                or (start_x + size_x >= mrc_shape[1])
-                or (start_y + size_y >= mrc_shape[0])
-            ):
-                out_of_range.append(i)
-
-        # out_of_range stores the indices of the particles in the
-        # unmodified coord_list that we must remove.
-        # If we pop these indices of _coord list going forward, the
-        # following indices will be shifted. Thus we pop in reverse, since
-        # the indices prior to each removed index are unchanged
-        for j in reversed(out_of_range):
-            self.particles.pop(j)
-
-        return len(out_of_range)
+        if not self.particles:
+            return 0
+        mrc_indices = np.array([particle[0] for particle in self.particles])
+        boxes = np.array([particle[1] for particle in self.particles])
+        start_x, start_y, size_x, size_y = boxes.T
+        # get shape of corresponding micrograph
+        mrc_shapes = self.mrc_shapes[mrc_indices]
+        out_of_range = (
+            (start_x < 0)
+            | (start_y < 0)
+            | (start_x + size_x >= mrc_shapes[:, 1])
+            | (start_y + size_y >= mrc_shapes[:, 0])
+        )
+
+        self.particles = [
+            particle for particle, out in zip(self.particles, out_of_range) if not out
+        ]
+
+        return int(np.count_nonzero(out_of_range))
 
     def _get_mrc_shapes(self):
         """
@@ -308,7 +428,12 @@ class CoordinateSource(ImageSource, ABC):
 
         mrc_shapes = np.zeros((self.num_micrographs, 2), dtype=int)
         for i, mrc in enumerate(self.mrc_paths):
-            mrc_shapes[i, :] = Image.load(mrc).resolution
+            if os.path.splitext(mrc)[1] in (".mrc", ".mrcs"):
+                # Only the header is needed, avoid reading the data block.
+                with mrcfile.open(mrc, header_only=True, permissive=True) as f:
+                    mrc_shapes[i, :] = f.header.ny, f.header.nx
+            else:
+                mrc_shapes[i, :] = Image.load(mrc).resolution
 
         return mrc_shapes
 
@@ -449,46 +574,49 @@ class CoordinateSource(ImageSource, ABC):
 
         logger.info(f"Loading {len(indices)} images from micrographs")
 
-        selected_particles = [self.particles[i] for i in indices]
+        n_workers = self.n_workers
+        if n_workers < 0:
+            n_workers = cpu_count() - 1
+
         # initialize empty array to hold particle stack
         im = np.empty(
             (len(indices), self._original_resolution, self._original_resolution),
             dtype=self.dtype,
         )
 
-        # group particles by micrograph in order to
-        # only open each one once
-        grouped = defaultdict(list)
-        # this creates a dict of the form
-        # { mrc_index : list of coords in that mrc, with relative order preserved }
-        for mrc_index, coord in selected_particles:
-            grouped[mrc_index].append(coord)
-
-        # this loops over the micrographs
-        # now that the particles have been grouped by
-        # their origin micrograph
-        for mrc_index, coord_list in grouped.items():
-            # Load file as 2D numpy array.
-            arr = Image.load(self.mrc_paths[mrc_index]).asnumpy()[0]
-
-            # create iterable of the coordinates in this mrc
-            # we don't need to worry about exhausting this iter
-            # because we know it contains the exact number of particles
-            # selected from this micrograph.
-            # the next()  method on this iterable will give us the next
-            # particle from this micrograph to appear in selected_particles
-            coord = iter(coord_list)
-            # iterate through selected particles
-            # we are potentially populating the particles
-            # out of order, to optimize the slower operation
-            # of opening the micrograph file
-            for i, particle in enumerate(selected_particles):
-                idx = particle[0]
-                # we stop and populate the image stack every time
-                # we hit a particle whose location is this micrograph
-                if idx == mrc_index:
-                    cropped = self._crop_micrograph(arr, next(coord))
-                    im[i] = cropped
+        # Group the requested particles by micrograph in order to
+        # only open each one once.  `order` permutes `indices` so that
+        # particles from the same micrograph are contiguous, with
+        # `bounds` marking the end of each micrograph's group.
+        mrc_indices, mrc_groups = np.unique(
+            self._particle_mrc_indices[indices], return_inverse=True
+        )
+        order = np.argsort(mrc_groups, kind="stable")
+        bounds = np.cumsum(np.bincount(mrc_groups, minlength=len(mrc_indices)))
+        boxes = self._particle_boxes[indices]
+
+        def crop_single_micrograph(mrc_index, positions):
+            arr = self._micrograph_pool.data(self.mrc_paths[mrc_index])
+            # Crop in order of box position so reads are monotone in the file.
+            positions = positions[np.argsort(boxes[positions, 1], kind="stable")]
+            for i in positions:
+                im[i] = self._crop_micrograph(arr, boxes[i])
+
+        n_workers = max(1, min(n_workers, len(mrc_indices)))
+
+        with futures.ThreadPoolExecutor(n_workers) as executor:
+            to_do = []
+            for i, mrc_index in enumerate(mrc_indices):
+                start = bounds[i - 1] if i > 0 else 0
+                future = executor.submit(
+                    crop_single_micrograph, mrc_index, order[start : bounds[i]]
+                )
+                to_do.append(future)
+
+            for future in futures.as_completed(to_do):
+                # Surface any exceptions raised while cropping.
+                future.result()
+
         # Finally, apply transforms to resulting Image
         return self.generation_pipeline.forward(
             Image(im, pixel_size=self.pixel_size), indices
@@ -516,16 +644,29 @@ class BoxesCoordinateSource(CoordinateSource):
         max_rows=None,
         B=0,
         symmetry_group=None,
+        n_workers=-1,
+        max_open_micrographs=32,
     ):
         """
         :param files: A list of tuples of the form (path_to_mrc, path_to_coord)
         :particle_size: Desired size of cropped particles (will override the size specified in coordinate file)
         :param max_rows: Maximum number of particles to read. (If `None`, will attempt to load all particles)
         :param symmetry_group: A `SymmetryGroup` object or string corresponding to the symmetry of the molecule.
+        :param n_workers: Number of threads used to crop particles from micrographs (Default -1 to auto detect)
+        :param max_open_micrographs: Maximum number of recently used micrographs kept open
+            between requests (Default 32). MRC micrographs are memory-mapped,
+            other formats are held in memory.
         """
         # instantiate super
         CoordinateSource.__init__(
-            self, files, particle_size, max_rows, B, symmetry_group
+            self,
+            files,
+            particle_size,
+            max_rows,
+            B,
+            symmetry_group,
+            n_workers=n_workers,
+            max_open_micrographs=max_open_micrographs,
         )
 
     def _extract_box_size(self, box_file):
@@ -629,17 +770,37 @@ class CentersCoordinateSource(CoordinateSource):
     Represents a data source consisting of micrographs and coordinate files specifying particle centers only. Files can be text (.coord) or STAR files.
     """
 
-    def __init__(self, files, particle_size, max_rows=None, B=0, symmetry_group=None):
+    def __init__(
+        self,
+        files,
+        particle_size,
+        max_rows=None,
+        B=0,
+        symmetry_group=None,
+        n_workers=-1,
+        max_open_micrographs=32,
+    ):
         """
         :param files: A list of tuples of the form (path_to_mrc, path_to_coord)
         :particle_size: Desired size of cropped particles (mandatory)
         :param max_rows: Maximum number of particles to read. (If `None`, will
         attempt to load all particles)
         :param symmetry_group: A `SymmetryGroup` object or string corresponding to the symmetry of the molecule.
+        :param n_workers: Number of threads used to crop particles from micrographs (Default -1 to auto detect)
+        :param max_open_micrographs: Maximum number of recently used micrographs kept open
+            between requests (Default 32). MRC micrographs are memory-mapped,
+            other formats are held in memory.
         """
         # instantiate super
         CoordinateSource.__init__(
-            self, files, particle_size, max_rows, B, symmetry_group
+            self,
+            files,
+            particle_size,
+            max_rows,
+            B,
+            symmetry_group,
+            n_workers=n_workers,
+            max_open_micrographs=max_open_micrographs,
         )
 
     def _validate_centers_file(self, coord_file):
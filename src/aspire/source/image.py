@@ -3,9 +3,11 @@ import functools
 import logging
 import os.path
 from abc import ABC, abstractmethod
-from collections import OrderedDict
+from collections import OrderedDict, deque
 from collections.abc import Iterable
+from concurrent import futures
 
+import joblib
 import mrcfile
 import numpy as np
 
@@ -21,15 +23,24 @@ from aspire.image.xform import (
     Pipeline,
 )
 from aspire.noise import LegacyNoiseEstimator, NoiseEstimator, WhiteNoiseEstimator
+from aspire.numeric import fft, xp
 from aspire.operators import (
     CTFFilter,
     Filter,
     IdentityFilter,
     MultiplicativeFilter,
     PowerFilter,
+    evaluate_filters_on_grid,
 )
 from aspire.storage import MrcStats, StarFile
-from aspire.utils import Rotation, grid_2d, rename_with_timestamp, support_mask, trange
+from aspire.utils import (
+    Rotation,
+    grid_2d,
+    rename_with_timestamp,
+    support_mask,
+    tqdm,
+    trange,
+)
 from aspire.volume import IdentitySymmetryGroup, SymmetryGroup
 
 logger = logging.getLogger(__name__)
@@ -103,6 +114,46 @@ class _ImageAccessor:
         return self.fun(indices)
 
 
+class _DiskImageCache:
+    """
+    Read-only, memory-mapped image stack backing `ImageSource.cache` on disk.
+
+    Indexing returns in-memory `Image` objects, so only the requested
+    images are read from the scratch file.  Copies of a source share the
+    same underlying file instead of duplicating its contents in memory.
+    """
+
+    def __init__(self, filepath, pixel_size=None):
+        """
+        :param filepath: Path to a `.npy` file holding an (n, L, L) stack.
+        :param pixel_size: Optional pixel size in angstroms of returned images.
+        """
+        self.filepath = filepath
+        self.pixel_size = pixel_size
+        self._data = np.load(filepath, mmap_mode="r")
+
+    @property
+    def shape(self):
+        return self._data.shape
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    def __getitem__(self, key):
+        return Image(np.array(self._data[key]), pixel_size=self.pixel_size)
+
+    def __deepcopy__(self, memo):
+        # The backing file is read-only, so it is safe to share.
+        return self
+
+    def __getstate__(self):
+        return {"filepath": self.filepath, "pixel_size": self.pixel_size}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
 def _as_copy(func):
     """
     Method decorator that invokes the decorated method on a deepcopy of the object,
@@ -149,6 +200,10 @@ class ImageSource(ABC):
     # disable _mutable as the last step in __init__.
     _mutable = True
 
+    # Attributes that do not affect generated images,
+    # and are excluded from `_cache_key`.
+    _cache_key_exclude = ("_mutable",)
+
     def __init__(
         self,
         L,
@@ -723,10 +778,19 @@ class ImageSource(ABC):
 
         im = im_orig.copy()
 
-        for i, filt in enumerate(filters):
-            idx_k = np.where(indices == i)[0]
-            if len(idx_k) > 0:
-                im[idx_k] = im[idx_k].filter(filt).asnumpy()
+        # Only images with an associated filter are transformed.
+        indices = np.atleast_1d(indices)
+        idx = np.flatnonzero((indices >= 0) & (indices < len(filters)))
+        if len(idx) == 0:
+            return im
+
+        # Build the per-image transfer function stack, evaluating each
+        # distinct filter once, then convolve the batch in one FFT pair.
+        # Note, as in `Image.filter`, filter dtype may not match image dtype.
+        h = evaluate_filters_on_grid(filters, indices[idx], im.resolution)
+        im_f = fft.centered_fft2(xp.asarray(im.asnumpy()[idx]))
+        im_f *= xp.asarray(h, dtype=im.dtype)
+        im[idx] = xp.asnumpy(fft.centered_ifft2(im_f).real)
 
         return im
 
@@ -737,22 +801,101 @@ class ImageSource(ABC):
             self.filter_indices[indices],
         )
 
+    def _cache_key_state(self):
+        """
+        Return the state identifying the images generated by this source.
+
+        Subclasses whose images depend on external resources, such as
+        files on disk, should extend this with a description of those
+        resources.
+
+        :return: Dictionary of picklable values.
+        """
+        state = {
+            k: v
+            for k, v in self.__dict__.items()
+            if k not in self._cache_key_exclude and not isinstance(v, _ImageAccessor)
+        }
+        state["__class__"] = self.__class__.__qualname__
+        return state
+
+    def _cache_key(self):
+        """
+        Return a hash identifying the images generated by this source.
+
+        The key is derived from `_cache_key_state`, including the
+        metadata, filters and `generation_pipeline` of the source, so
+        that sources producing the same images yield the same key across
+        sessions.
+
+        :return: Hex digest string.
+        """
+        return joblib.hash(self._cache_key_state())
+
     @_as_copy
-    def cache(self, batch_size=512):
+    def cache(self, batch_size=512, cache_dir=None):
         """
         Computes all queued pipeline transformations and stores the
         generated images in an array.  This trades memory for fast
         image access, and is useful when images will be repeatedly
         queried since it avoids recomputing on-the-fly.
-        """
-        logger.info("Caching source images")
-        im = np.empty((len(self), self.L, self.L), self.dtype)
-        for start in trange(0, len(self), batch_size):
-            end = min(start + batch_size, len(self))
-            im[start:end] = self.images[start:end]
-        self._cached_im = Image(im)
+
+        When `cache_dir` is provided, images are instead written to a
+        memory-mapped `.npy` scratch file in `cache_dir`, named by a hash
+        of the source and its `generation_pipeline`.  If a matching file
+        already exists, from this or an earlier session, it is reused
+        without recomputing any images.
+
+        :param batch_size: Batch size of images to query.
+        :param cache_dir: Optional directory for an on-disk cache.
+            Default `None` caches images in memory.
+        """
+        if cache_dir is None:
+            logger.info("Caching source images")
+            im = np.empty((len(self), self.L, self.L), self.dtype)
+            for start, batch in self.iter_batches(batch_size, desc="Caching"):
+                im[start : start + batch.n_images] = batch
+            self._cached_im = Image(im, pixel_size=self.pixel_size)
+        else:
+            self._cached_im = self._disk_cache(cache_dir, batch_size)
         self.generation_pipeline.reset()
 
+    def _disk_cache(self, cache_dir, batch_size):
+        """
+        Load, or compute and store, the images of this source in `cache_dir`.
+
+        :param cache_dir: Directory holding cache files.
+        :param batch_size: Batch size of images to query.
+        :return: `_DiskImageCache` instance.
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        filepath = os.path.join(
+            cache_dir, f"{self.__class__.__name__}_{self._cache_key()}.npy"
+        )
+        shape = (len(self), self.L, self.L)
+
+        if os.path.exists(filepath):
+            cached = _DiskImageCache(filepath, pixel_size=self.pixel_size)
+            if cached.shape == shape and cached.dtype == self.dtype:
+                logger.info(f"Loading cached source images from {filepath}")
+                return cached
+            logger.warning(f"Ignoring mismatched image cache file {filepath}")
+
+        logger.info(f"Caching source images to {filepath}")
+        # Write to a temporary file and move into place when complete,
+        # so interrupted runs never leave a partial cache behind.
+        tmp_filepath = f"{filepath}.{os.getpid()}.tmp"
+        im = np.lib.format.open_memmap(
+            tmp_filepath, mode="w+", dtype=self.dtype, shape=shape
+        )
+        for start, batch in self.iter_batches(batch_size, desc="Caching"):
+            im[start : start + batch.n_images] = batch
+        im.flush()
+        del im
+        os.replace(tmp_filepath, filepath)
+
+        return _DiskImageCache(filepath, pixel_size=self.pixel_size)
+
     @property
     def images(self):
         """
@@ -761,6 +904,59 @@ class ImageSource(ABC):
         """
         return self._img_accessor
 
+    def iter_batches(self, batch_size=512, prefetch=1, start=0, stop=None, desc=None):
+        """
+        Iterate over contiguous batches of images.
+
+        While the caller works on the current batch, up to `prefetch`
+        upcoming batches are loaded and transformed by the
+        `generation_pipeline` on background threads, overlapping I/O
+        and transform work with computation.  Batches are always
+        yielded in order.
+
+        :param batch_size: Number of images per batch.
+        :param prefetch: Number of batches to load ahead of the consumer.
+            `0` loads each batch synchronously when requested.
+        :param start: Index of the first image, default 0.
+        :param stop: Index one past the last image, defaults to `self.n`.
+        :param desc: Optional description, enables a progress bar when provided.
+        :return: Generator of `(batch_start, Image)` tuples.
+        """
+        stop = self.n if stop is None else min(stop, self.n)
+        batch_starts = range(start, stop, batch_size)
+        if desc is not None:
+            batch_starts = tqdm(batch_starts, desc=desc)
+
+        def _load(i):
+            return self.images[i : min(i + batch_size, stop)]
+
+        if prefetch < 1:
+            for i in batch_starts:
+                yield i, _load(i)
+            return
+
+        batch_starts = iter(batch_starts)
+        pending = deque()
+        with futures.ThreadPoolExecutor(prefetch) as executor:
+            try:
+                # Queue the current batch and `prefetch` batches ahead.
+                for _ in range(prefetch + 1):
+                    i = next(batch_starts, None)
+                    if i is None:
+                        break
+                    pending.append((i, executor.submit(_load, i)))
+
+                while pending:
+                    i, future = pending.popleft()
+                    nxt = next(batch_starts, None)
+                    if nxt is not None:
+                        pending.append((nxt, executor.submit(_load, nxt)))
+                    yield i, future.result()
+            finally:
+                # Consumer stopped early or raised, drop queued work.
+                for _, future in pending:
+                    future.cancel()
+
     @abstractmethod
     def _images(self, indices):
         """
@@ -921,8 +1117,8 @@ class ImageSource(ABC):
         noise_mean = 0.0
 
         logger.info("Computing signal vs background contrast on source object")
-        for i in trange(0, self.n, batch_size):
-            images = self.images[i : i + batch_size].asnumpy()
+        for _, images in self.iter_batches(batch_size, desc="Contrast"):
+            images = images.asnumpy()
             signal = images * signal_mask
             noise = images * noise_mask
             signal_mean += np.sum(signal)
@@ -1225,12 +1421,12 @@ class ImageSource(ABC):
             ) as mrc:
                 stats = MrcStats()
                 # Loop over source setting data into mrc file
-                for i_start in np.arange(0, self.n, batch_size):
-                    i_end = min(self.n, i_start + batch_size)
+                for i_start, im in self.iter_batches(batch_size):
+                    i_end = i_start + im.n_images
                     logger.info(
                         f"Saving ImageSource[{i_start}-{i_end-1}] to {mrcs_filepath}"
                     )
-                    datum = self.images[i_start:i_end].asnumpy().astype("float32")
+                    datum = im.asnumpy().astype("float32")
 
                     # Assign to mrcfile
                     mrc.data[i_start:i_end] = datum
@@ -1249,8 +1445,8 @@ class ImageSource(ABC):
 
         else:
             # save all images into multiple mrc files in batch size
-            for i_start in np.arange(0, self.n, batch_size):
-                i_end = min(self.n, i_start + batch_size)
+            for i_start, im in self.iter_batches(batch_size):
+                i_end = i_start + im.n_images
 
                 mrcs_filepath = os.path.join(
                     os.path.dirname(starfile_filepath), filename_indices[i_start]
@@ -1259,7 +1455,6 @@ class ImageSource(ABC):
                 logger.info(
                     f"Saving ImageSource[{i_start}-{i_end-1}] to {mrcs_filepath}"
                 )
-                im = self.images[i_start:i_end]
                 im.save(mrcs_filepath, overwrite=overwrite)
 
     def estimate_signal_mean_energy(
@@ -1565,6 +1760,14 @@ class IndexedSource(ImageSource):
 
         return self.generation_pipeline.forward(im, indices)
 
+    def _cache_key_state(self):
+        """
+        Extend the cache key state, identifying the parent source by its own key.
+        """
+        state = super()._cache_key_state()
+        state["src"] = self.src._cache_key()
+        return state
+
     def __repr__(self):
         return f"{self.__class__.__name__} mapping {self.n} of {self.src.n} indices from {self.src.__class__.__name__}."
 
@@ -1,7 +1,11 @@
 import logging
 import os.path
+import tempfile
+import zipfile
+from collections import OrderedDict
 from concurrent import futures
 from multiprocessing import cpu_count
+from threading import Lock
 
 import mrcfile
 import numpy as np
@@ -14,6 +18,158 @@ from aspire.utils import RelionStarFile
 logger = logging.getLogger(__name__)
 
 
+class _MrcHandlePool:
+    """
+    Thread-safe, bounded pool of memory-mapped `.mrcs` handles keyed by file path.
+
+    Handles are opened lazily and kept open across image requests so that
+    reading a batch only touches the requested rows of each stack.  When more
+    than `max_open` files are open, the least recently used handle is closed.
+    """
+
+    def __init__(self, max_open=128):
+        """
+        :param max_open: Maximum number of simultaneously open handles.
+        """
+        self.max_open = int(max_open)
+        self._handles = OrderedDict()
+        self._lock = Lock()
+
+    def data(self, filepath):
+        """
+        Return the memory-mapped data array for `filepath` as a 3D stack.
+
+        :param filepath: Path to `.mrc` or `.mrcs` file.
+        :return: Memory-mapped array of shape (n_images, L, L).
+        """
+        with self._lock:
+            mrc = self._handles.get(filepath)
+            if mrc is None:
+                mrc = mrcfile.mmap(filepath, mode="r")
+                self._handles[filepath] = mrc
+                # Evict least recently used handles.
+                while len(self._handles) > self.max_open:
+                    _, old = self._handles.popitem(last=False)
+                    old.close()
+            else:
+                self._handles.move_to_end(filepath)
+            arr = mrc.data
+
+        # A stack containing a single image is stored as (L, L).
+        if arr.ndim == 2:
+            arr = arr[np.newaxis]
+        return arr
+
+    def close(self):
+        """
+        Close all open handles.
+        """
+        with self._lock:
+            while self._handles:
+                _, mrc = self._handles.popitem()
+                mrc.close()
+
+    def __len__(self):
+        return len(self._handles)
+
+    def __deepcopy__(self, memo):
+        # Open file handles are not shared between copies of a source.
+        return _MrcHandlePool(self.max_open)
+
+    def __getstate__(self):
+        return {"max_open": self.max_open}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __del__(self):
+        # Interpreter shutdown may have already torn down attributes.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+# Bump when the layout of the metadata index changes.
+_METADATA_INDEX_VERSION = 1
+_METADATA_INDEX_KEY = "__aspire_index_key"
+_METADATA_INDEX_CODES = "__aspire_codes"
+
+
+def _load_metadata_index(index_path, key):
+    """
+    Load metadata columns from a sidecar index written by `_save_metadata_index`.
+
+    :param index_path: Path to `.npz` index file.
+    :param key: Array of strings identifying the STAR file the index must describe.
+    :return: Dictionary of metadata columns, or None when the index is
+        missing, unreadable or stale.
+    """
+    try:
+        with np.load(index_path, allow_pickle=False) as npz:
+            if not np.array_equal(npz[_METADATA_INDEX_KEY], key):
+                logger.info(f"Metadata index {index_path} is stale.")
+                return None
+            metadata = {}
+            for k in npz.files:
+                if k == _METADATA_INDEX_KEY or k.startswith(_METADATA_INDEX_CODES):
+                    continue
+                col = npz[k]
+                codes = _METADATA_INDEX_CODES + k
+                if codes in npz.files:
+                    col = col[npz[codes]]
+                metadata[k] = col
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        return None
+
+    logger.info(f"Loaded metadata index {index_path}")
+    return metadata
+
+
+def _save_metadata_index(index_path, key, metadata):
+    """
+    Save metadata columns to a sidecar `.npz` index.
+
+    String columns with repeated values are stored as unique values and
+    integer codes.  The index is written to a temporary file and moved
+    into place, so concurrent readers never see a partial file.  Failure
+    to write is logged and otherwise ignored.
+
+    :param index_path: Path to `.npz` index file.
+    :param key: Array of strings identifying the STAR file the index describes.
+    :param metadata: Dictionary of NumPy array metadata columns.
+    """
+    arrays = {_METADATA_INDEX_KEY: key}
+    for k, col in metadata.items():
+        if col.dtype.hasobject:
+            logger.debug(f"Not writing metadata index, column {k} holds objects.")
+            return
+        if col.dtype.kind == "U":
+            uniq, codes = np.unique(col, return_inverse=True)
+            if len(uniq) < len(col):
+                col = uniq
+                arrays[_METADATA_INDEX_CODES + k] = codes.astype(np.int32)
+        arrays[k] = col
+
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(os.path.abspath(index_path)),
+            suffix=".npz",
+            delete=False,
+        ) as fh:
+            tmp_path = fh.name
+            np.savez(fh, **arrays)
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        logger.warning(f"Unable to write metadata index {index_path}: {e}")
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+
+    logger.info(f"Wrote metadata index {index_path}")
+
+
 class RelionSource(ImageSource):
     """
     A RelionSource represents a source of picked and cropped particles stored as slices in a `.mrcs` stack.
@@ -24,6 +180,13 @@ class RelionSource(ImageSource):
     store, for example, Filter objects added during preprocessing.
     """
 
+    _cache_key_exclude = ImageSource._cache_key_exclude + (
+        "n_workers",
+        "mmap",
+        "_mrc_pool",
+        "metadata_index",
+    )
+
     def __init__(
         self,
         filepath,
@@ -35,6 +198,9 @@ class RelionSource(ImageSource):
         symmetry_group=None,
         memory=None,
         dtype=None,
+        mmap=False,
+        max_open_files=128,
+        metadata_index=False,
     ):
         """
         Load STAR file at given filepath
@@ -54,6 +220,18 @@ class RelionSource(ImageSource):
         :param dtype: Optional datatype override.
             Default `None` infers dtype from underlying image (MRC) files.
             Can be used to upcast STAR files for processing in double precision.
+        :param mmap: Optionally memory-map referenced .mrcs files (Default False).
+            When True, a pool of long-lived memory-mapped handles is kept and only the
+            requested particles are read from each stack, so batch latency depends on
+            batch size rather than stack size.
+        :param max_open_files: Maximum number of memory-mapped .mrcs files kept open
+            when `mmap` is True (Default 128). Ignored when `mmap` is False,
+            since each stack is then opened and closed per request.
+        :param metadata_index: Optionally keep a binary sidecar index of the parsed
+            metadata (Default False). When True, the index is stored next to the
+            STAR file as `<filepath>.index.npz`; a string gives an explicit path.
+            The index is keyed on the STAR file's path, size and modification time,
+            and is regenerated transparently when stale.
         """
         logger.info(f"Creating ImageSource from STAR file at path {filepath}")
 
@@ -62,6 +240,9 @@ class RelionSource(ImageSource):
         self.B = B
         self.n_workers = n_workers
         self.max_rows = max_rows
+        self.mmap = mmap
+        self.metadata_index = metadata_index
+        self._mrc_pool = _MrcHandlePool(max_open_files) if mmap else None
 
         metadata = self.populate_metadata()
 
@@ -71,7 +252,10 @@ class RelionSource(ImageSource):
 
         # Peek into the first image and populate some attributes
         first_mrc_filepath = metadata["__mrc_filepath"][0]
-        mrc = mrcfile.open(first_mrc_filepath)
+        if mmap:
+            mrc = mrcfile.mmap(first_mrc_filepath, mode="r")
+        else:
+            mrc = mrcfile.open(first_mrc_filepath)
 
         # Get the 'mode' (data type) - TODO: There's probably a more direct way to do this.
         mode = int(mrc.header.mode)
@@ -90,6 +274,7 @@ class RelionSource(ImageSource):
             dtype = mrc_dtype
 
         shape = mrc.data.shape
+        mrc.close()
         # the code below  accounts for the case where the first MRCS image in the STAR file has one image
         # in that case, the shape will be (resolution, resolution), whereas this code expects
         # (1, resolution, resolution). below, the shape is expanded to accomodate this expectation
@@ -183,7 +368,55 @@ class RelionSource(ImageSource):
         else:
             self.data_folder = os.path.dirname(self.filepath)
 
+        index_path = self._metadata_index_path()
+        metadata = None
+        if index_path is not None:
+            key = self._metadata_index_key()
+            metadata = _load_metadata_index(index_path, key)
+        if metadata is None:
+            metadata = self._read_metadata()
+            if index_path is not None:
+                _save_metadata_index(index_path, key, metadata)
+
+        # finally, chop off the metadata df at max_rows
+        if self.max_rows is None:
+            return metadata
+        else:
+            max_rows = min(self.max_rows, len(metadata["__mrc_filepath"]))
+            return {k: v[:max_rows] for k, v in metadata.items()}
+
+    def _metadata_index_path(self):
+        """
+        Return the path of the metadata index file, or None when disabled.
+        """
+        if not self.metadata_index:
+            return None
+        if self.metadata_index is True:
+            return f"{self.filepath}.index.npz"
+        return os.fspath(self.metadata_index)
+
+    def _metadata_index_key(self):
+        """
+        Return an array of strings identifying the STAR file and data folder
+        the metadata index was generated from.
+        """
+        st = os.stat(self.filepath)
+        return np.array(
+            [
+                str(_METADATA_INDEX_VERSION),
+                os.path.abspath(self.filepath),
+                os.path.abspath(self.data_folder),
+                str(st.st_size),
+                str(st.st_mtime_ns),
+            ]
+        )
+
+    def _read_metadata(self):
+        """
+        Parse the STAR file into a dictionary of NumPy array metadata columns.
+        """
         metadata = RelionStarFile(self.filepath).get_merged_data_block()
+        metadata = {k: np.asarray(v) for k, v in metadata.items()}
 
         # particle locations are stored as e.g. '000001@first_micrograph.mrcs'
         # in the _rlnImageName column. here, we're splitting this information
@@ -196,16 +429,32 @@ class RelionSource(ImageSource):
 
         # Adding a full-filepath field to the Dataframe helps us save time later
         # Note that os.path.join works as expected when the second argument is an absolute path itself
+        # Paths are made absolute so they identify stacks regardless of working directory.
         metadata["__mrc_filepath"] = np.array(
-            [os.path.join(self.data_folder, p) for p in metadata["__mrc_filename"]]
+            [
+                os.path.abspath(os.path.join(self.data_folder, p))
+                for p in metadata["__mrc_filename"]
+            ]
         )
 
-        # finally, chop off the metadata df at max_rows
-        if self.max_rows is None:
-            return metadata
-        else:
-            max_rows = min(self.max_rows, len(metadata["__mrc_filepath"]))
-            return {k: v[:max_rows] for k, v in metadata.items()}
+        return metadata
+
+    def _cache_key_state(self):
+        """
+        Extend the cache key state with the absolute path, size and
+        modification time of the STAR file and each referenced stack,
+        so that cached images are rebuilt when any of them change.
+        """
+        state = super()._cache_key_state()
+        state["filepath"] = os.path.abspath(self.filepath)
+        state["data_folder"] = os.path.abspath(self.data_folder)
+        filepaths = [self.filepath] + list(np.unique(self._metadata["__mrc_filepath"]))
+        stats = []
+        for filepath in filepaths:
+            st = os.stat(filepath)
+            stats.append((os.path.abspath(filepath), st.st_size, st.st_mtime_ns))
+        state["__file_stats"] = stats
+        return state
 
     def __str__(self):
         return f"RelionSource ({self.n} images of size {self.L}x{self.L})"
@@ -230,17 +479,6 @@ class RelionSource(ImageSource):
         # Log the indices in case needed to debug a crash
         logger.debug(f"Indices: {indices}")
 
-        def load_single_mrcs(filepath, indices):
-            arr = mrcfile.open(filepath).data
-            # if the stack only contains one image, arr will have shape (resolution, resolution)
-            # the code below reshapes it to (1, resolution, resolution)
-            if len(arr.shape) == 2:
-                arr = arr.reshape((1,) + arr.shape)
-            # __mrc_index is the 1-based index of the particle in the stack
-            data = arr[self._metadata["__mrc_index"][indices] - 1, :, :]
-
-            return indices, data
-
         n_workers = self.n_workers
         if n_workers < 0:
             n_workers = cpu_count() - 1
@@ -250,24 +488,48 @@ class RelionSource(ImageSource):
             dtype=self.dtype,
         )
 
+        # Group the requested rows by stack.  `order` permutes `indices`
+        # so that rows belonging to the same file are contiguous,
+        # with `bounds` marking the start of each file's group.
         filepaths, filepath_indices = np.unique(
-            self._metadata["__mrc_filepath"], return_inverse=True
+            self._metadata["__mrc_filepath"][indices], return_inverse=True
         )
-        n_workers = min(n_workers, len(filepaths))
+        order = np.argsort(filepath_indices, kind="stable")
+        bounds = np.cumsum(np.bincount(filepath_indices, minlength=len(filepaths)))
+        # __mrc_index is the 1-based index of the particle in the stack
+        mrc_rows = self._metadata["__mrc_index"][indices] - 1
+
+        def load_single_mrcs(filepath, positions):
+            # Sort the stack rows so reads are monotone in the file,
+            # then place them with the inverse of that permutation.
+            rows = mrc_rows[positions]
+            srt = np.argsort(rows, kind="stable")
+            if self._mrc_pool is not None:
+                arr = self._mrc_pool.data(filepath)
+                im[positions[srt]] = arr[rows[srt]]
+            else:
+                with mrcfile.open(filepath) as mrc:
+                    arr = mrc.data
+                    # if the stack only contains one image, arr will have shape (resolution, resolution)
+                    # the code below reshapes it to (1, resolution, resolution)
+                    if arr.ndim == 2:
+                        arr = arr.reshape((1,) + arr.shape)
+                    im[positions[srt]] = arr[rows[srt]]
+
+        n_workers = max(1, min(n_workers, len(filepaths)))
 
         with futures.ThreadPoolExecutor(n_workers) as executor:
             to_do = []
             for i, filepath in enumerate(filepaths):
-                this_filepath_indices = np.where(filepath_indices == i)[0]
+                start = bounds[i - 1] if i > 0 else 0
                 future = executor.submit(
-                    load_single_mrcs, filepath, this_filepath_indices
+                    load_single_mrcs, filepath, order[start : bounds[i]]
                 )
                 to_do.append(future)
 
             for future in futures.as_completed(to_do):
-                data_indices, data = future.result()
-                for idx, d in enumerate(data_indices):
-                    im[np.where(indices == d)] = data[idx, :, :]
+                # Surface any exceptions raised while loading.
+                future.result()
 
         logger.debug(f"Loading {len(indices)} images complete")
 
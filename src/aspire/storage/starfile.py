@@ -2,6 +2,7 @@ import logging
 import os
 from collections import OrderedDict
 
+import numpy as np
 from gemmi import cif
 
 logger = logging.getLogger(__name__)
@@ -11,7 +12,346 @@ class StarFileError(Exception):
     pass
 
 
+class _UnsupportedStarSyntax(Exception):
+    """
+    Raised by `_StarReader` on syntax it does not handle.
+    """
+
+
+def _tokens(line):
+    """
+    Split a STAR file line into tokens, dropping comments.
+    """
+    if line.startswith(";"):
+        raise _UnsupportedStarSyntax("Multi-line text field")
+    tokens = line.split()
+    if "#" in line or "'" in line or '"' in line:
+        for i, tok in enumerate(tokens):
+            if tok[0] == "#":
+                return tokens[:i]
+            if tok[0] in "'\"":
+                raise _UnsupportedStarSyntax("Quoted value")
+    return tokens
+
+
+# Tokens ending a loop.
+_RESERVED = ("_", "data_", "loop_", "save_", "global_", "stop_")
+
+
+class _StarReader:
+    """
+    Line based reader for the STAR files written by RELION and ASPIRE.
+
+    Handles data blocks holding either key/value pairs or a single loop
+    with one row per line.  Other syntax (quoted values, multi-line text
+    fields, save frames, rows spanning lines) raises `_UnsupportedStarSyntax`,
+    and callers fall back to gemmi.
+    """
+
+    def __init__(self, fh):
+        self._fh = fh
+        # Tokens of a line read ahead of the current position.
+        self._pending = None
+        # Width of the loop whose rows are next, if any.
+        self._width = None
+
+    def _next_tokens(self):
+        if self._pending is not None:
+            tokens, self._pending = self._pending, None
+            return tokens
+        for line in self._fh:
+            tokens = _tokens(line)
+            if tokens:
+                return tokens
+        return None
+
+    def blocks(self):
+        """
+        Yield `(name, pairs, tags)` for each non empty data block.
+
+        Exactly one of `pairs` (a dict) and `tags` (a list) is None.
+        After a loop block is yielded its rows may be consumed with `columns`,
+        otherwise they are skipped.
+        """
+        tokens = self._next_tokens()
+        while tokens is not None:
+            if len(tokens) > 1 or not tokens[0].startswith("data_"):
+                raise _UnsupportedStarSyntax(f"Unexpected {tokens[0]}")
+            name = tokens[0][5:]
+            pairs, tags = {}, None
+            tokens = self._next_tokens()
+            while tokens is not None and not tokens[0].startswith("data_"):
+                if (pairs and tokens[0] == "loop_") or tags is not None:
+                    raise StarFileError(
+                        "Blocks with multiple loops and/or pairs are not supported"
+                    )
+                if tokens[0] == "loop_":
+                    if len(tokens) > 1:
+                        raise _UnsupportedStarSyntax("Loop row on loop_ line")
+                    tags = []
+                    tokens = self._next_tokens()
+                    while tokens is not None and tokens[0].startswith("_"):
+                        if len(tokens) > 1:
+                            raise _UnsupportedStarSyntax("Loop row on tag line")
+                        tags.append(tokens[0])
+                        tokens = self._next_tokens()
+                    self._pending = tokens
+                    self._width = len(tags)
+                    yield name, None, tags
+                    for _ in self.columns():
+                        pass
+                elif tokens[0].startswith("_") and len(tokens) == 2:
+                    key, value = tokens
+                    if key in pairs:
+                        raise StarFileError(f"Duplicate key in pair: {key}")
+                    pairs[key] = value
+                else:
+                    raise _UnsupportedStarSyntax(f"Unexpected {tokens[0]}")
+                tokens = self._next_tokens()
+            if pairs:
+                yield name, pairs, None
+
+    def columns(self, chunk_size=65536):
+        """
+        Yield chunks of rows of the current loop as `(n_rows, columns)`,
+        where `columns` is a list holding a list of str per loop column.
+
+        :param chunk_size: Maximum number of rows per chunk.
+        """
+        width, self._width = self._width, None
+        if width is None:
+            return
+
+        # The first row may already have been tokenized.
+        lines, tokens = [], self._pending
+        self._pending = None
+        if tokens is not None:
+            if tokens[0].startswith(_RESERVED):
+                self._pending = tokens
+                return
+            lines.append(" ".join(tokens))
+
+        for line in self._fh:
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if stripped.startswith(_RESERVED) or stripped[0] in ";'\"#":
+                tokens = _tokens(line)
+                if not tokens:
+                    # Comment line.
+                    continue
+                if tokens[0].startswith(_RESERVED):
+                    self._pending = tokens
+                    break
+                raise _UnsupportedStarSyntax("Quoted value")
+            if len(lines) == chunk_size:
+                yield self._split_rows(lines, width)
+                lines = []
+            lines.append(stripped)
+        if lines:
+            yield self._split_rows(lines, width)
+
+    @staticmethod
+    def _split_rows(lines, width):
+        """
+        Tokenize loop `lines` into columns.
+        """
+        text = "\n".join(lines)
+        if "#" in text or "'" in text or '"' in text:
+            flat = [tok for line in lines for tok in _tokens(line)]
+        else:
+            # Plain values, tokenize the chunk at once.
+            flat = text.split()
+        n_rows, remainder = divmod(len(flat), width)
+        if remainder:
+            raise _UnsupportedStarSyntax("Loop row spanning lines")
+        return n_rows, [flat[i::width] for i in range(width)]
+
+
+def _convert_column(values, column_type=None):
+    """
+    Convert a sequence of STAR value strings.
+
+    :param values: Sequence of strings.
+    :param column_type: Type to convert to. Default None returns a list of str.
+    :return: A list of str, or an ndarray of `column_type`.
+    """
+    if column_type is None:
+        return list(values)
+    if column_type in (float, int):
+        return np.fromiter(map(column_type, values), column_type, count=len(values))
+    if column_type is str:
+        return np.array(values, dtype=str)
+    return np.array(list(map(column_type, values)))
+
+
+def _format_column(values):
+    """
+    Format a column of values as a list of str, as `str` would.
+
+    Raises `TypeError` for non iterable `values`.
+    """
+    if (
+        isinstance(values, np.ndarray)
+        and values.ndim == 1
+        and values.dtype.kind in "biufU"
+    ):
+        # Vectorized, NumPy formats scalars as their `str`.
+        return values.astype(str, copy=False).tolist()
+    return [str(v) for v in values]
+
+
+def _gemmi_loops(filepath):
+    """
+    Yield `(name, tags, values)` for the loop blocks of a STAR file read by gemmi,
+    where `values` is the flat, row major list of loop values.
+    """
+    for gemmi_block in cif.read_file(str(filepath)):
+        if gemmi_block.name in (" ", "#"):
+            gemmi_block.name = ""
+        for gemmi_item in gemmi_block:
+            if gemmi_item.loop is not None:
+                yield gemmi_block.name, list(
+                    gemmi_item.loop.tags
+                ), gemmi_item.loop.values
+
+
+def _loop_tags(filepath, block=None):
+    """
+    Return the column names of a loop block, see `iter_star_loop`.
+    """
+    try:
+        with open(filepath, "r") as fh:
+            for name, _, tags in _StarReader(fh).blocks():
+                if tags is not None and (block is None or name == block):
+                    return tags
+    except _UnsupportedStarSyntax:
+        for name, tags, _ in _gemmi_loops(filepath):
+            if block is None or name == block:
+                return tags
+    raise StarFileError(f"No loop block {block or ''} found in {filepath}")
+
+
+def iter_star_loop(
+    filepath,
+    block=None,
+    columns=None,
+    column_types=None,
+    start=0,
+    stop=None,
+    chunk_size=65536,
+):
+    """
+    Stream a loop block of a STAR file as chunks of typed NumPy columns.
+
+    Rows are parsed and converted a chunk at a time, so only `chunk_size`
+    rows of strings are held in memory.
+
+    :param filepath: Path to STAR file.
+    :param block: Name of the loop block to read. Default reads the first loop block.
+    :param columns: Optional list of column names to read. Default reads all columns.
+    :param column_types: Optional dict mapping column names to types.
+        Columns not listed are read as `str`.
+    :param start: First row to read.
+    :param stop: Row to stop reading at (exclusive). Default reads to the end of the loop.
+    :param chunk_size: Maximum number of rows per chunk.
+    :return: Generator of dicts mapping column names to ndarrays.
+    """
+    column_types = column_types or {}
+    n_yielded = 0
+
+    def _select(tags):
+        if columns is None:
+            return list(enumerate(tags))
+        missing = set(columns) - set(tags)
+        if missing:
+            raise StarFileError(f"Columns {sorted(missing)} not found in {filepath}")
+        return [(tags.index(c), c) for c in columns]
+
+    def _convert(cols, selected, lo, hi):
+        return {
+            tag: _convert_column(cols[i][lo:hi], column_types.get(tag, str))
+            for i, tag in selected
+        }
+
+    def _matches(name, tags):
+        return tags is not None and (block is None or name == block)
+
+    try:
+        with open(filepath, "r") as fh:
+            reader = _StarReader(fh)
+            for name, _, tags in reader.blocks():
+                if not _matches(name, tags):
+                    continue
+                selected = _select(tags)
+                row = 0
+                for n_rows, cols in reader.columns(chunk_size):
+                    lo, hi = max(start - row, 0), n_rows
+                    if stop is not None:
+                        hi = min(hi, stop - row)
+                    row += n_rows
+                    if lo < hi:
+                        yield _convert(cols, selected, lo, hi)
+                        n_yielded += hi - lo
+                    if stop is not None and row >= stop:
+                        break
+                return
+    except _UnsupportedStarSyntax as e:
+        logger.debug(f"Falling back to gemmi for {filepath}: {e}")
+    else:
+        raise StarFileError(f"No loop block {block or ''} found in {filepath}")
+
+    # Fallback, resuming after any rows already yielded.
+    for name, tags, values in _gemmi_loops(filepath):
+        if not _matches(name, tags):
+            continue
+        selected = _select(tags)
+        width = len(tags)
+        n_rows = len(values) // width
+        _stop = n_rows if stop is None else min(stop, n_rows)
+        for lo in range(start + n_yielded, _stop, chunk_size):
+            hi = min(lo + chunk_size, _stop)
+            flat = values[lo * width : hi * width]
+            cols = [flat[i::width] for i in range(width)]
+            yield _convert(cols, selected, 0, hi - lo)
+        return
+    raise StarFileError(f"No loop block {block or ''} found in {filepath}")
+
+
+def read_star_loop(
+    filepath, block=None, columns=None, column_types=None, start=0, stop=None
+):
+    """
+    Read a loop block of a STAR file into typed NumPy columns.
+
+    See `iter_star_loop` for parameters.
+
+    :return: Dict mapping column names to ndarrays.
+    """
+    chunks = list(
+        iter_star_loop(
+            filepath,
+            block=block,
+            columns=columns,
+            column_types=column_types,
+            start=start,
+            stop=stop,
+        )
+    )
+    if not chunks:
+        column_types = column_types or {}
+        names = columns or _loop_tags(filepath, block)
+        return {tag: np.empty(0, dtype=column_types.get(tag, str)) for tag in names}
+    return {tag: np.concatenate([c[tag] for c in chunks]) for tag in chunks[0]}
+
+
 class StarFile:
+    # Optional dict mapping loop column names to types.
+    # Default None reads loop columns as lists of str.
+    _column_types = None
+    # Number of loop rows formatted at a time by `write`.
+    _write_chunk_size = 65536
+
     def __init__(self, filepath="", blocks=None):
         """
         Initialize either from a path to a STAR file or from an OrderedDict of ndarrays
@@ -24,7 +364,7 @@ class StarFile:
                     if not isinstance(_v, str):
                         try:
                             # Cast iterable elements to string.
-                            blocks[k][_k] = list(map(str, iter(_v)))
+                            blocks[k][_k] = _format_column(_v)
                         except TypeError:
                             # Singleton, cast to string.
                             blocks[k][_k] = str(_v)
@@ -45,10 +385,60 @@ class StarFile:
 
     def _initialize_blocks(self):
         """
-        Converts a gemmi Document object representing the .star file
-        at self.filepath into an OrderedDict of dicts, each of which represents one block in the .star file
+        Reads the .star file at self.filepath into an OrderedDict of dicts,
+        each of which represents one block in the .star file
         """
         logger.info(f"Parsing star file at: {self.filepath}")
+        try:
+            self._read_blocks()
+        except _UnsupportedStarSyntax as e:
+            logger.debug(f"Falling back to gemmi parser: {e}")
+            self.blocks = OrderedDict()
+            self._read_blocks_gemmi()
+
+    def _add_block(self, name, block):
+        # enforce unique block names (keys of StarFile.block OrderedDict)
+        if name in self.blocks:
+            raise StarFileError(f"Attempted overwrite of existing data block: {name}")
+        self.blocks[name] = block
+
+    def _loop_block(self, tags, chunks):
+        """
+        Convert chunks of loop columns (tuples of str) to a block dict,
+        typed according to `_column_types`.
+        """
+        chunks = list(chunks)
+        block = {}
+        for i, tag in enumerate(tags):
+            column_type = None
+            if self._column_types is not None:
+                column_type = self._column_types.get(tag, str)
+            parts = [_convert_column(cols[i], column_type) for cols in chunks]
+            if column_type is None:
+                block[tag] = [v for part in parts for v in part]
+            elif parts:
+                block[tag] = np.concatenate(parts)
+            else:
+                block[tag] = np.empty(0, dtype=column_type)
+        return block
+
+    def _read_blocks(self):
+        """
+        Populate blocks using `_StarReader`, converting loops a chunk of rows at a time.
+        """
+        with open(self.filepath, "r") as fh:
+            reader = _StarReader(fh)
+            for name, pairs, tags in reader.blocks():
+                if pairs is not None:
+                    self._add_block(name, pairs)
+                else:
+                    chunks = (cols for _, cols in reader.columns())
+                    self._add_block(name, self._loop_block(tags, chunks))
+
+    def _read_blocks_gemmi(self):
+        """
+        Populate blocks from a gemmi Document object representing the .star file.
+        """
         gemmi_doc = cif.read_file(self.filepath)
         # iterate over gemmi Block objects in the gemmi Document
         for gemmi_block in gemmi_doc:
@@ -65,8 +455,7 @@ class StarFile:
             # populated if this block has a pair
             pairs = {}
             # populated if this block as a loop
-            loop_tags = []
-            loop_data = []
+            loop = None
             # Correct for GEMMI default behavior.
             # If a block is called 'data_' in the .star file:
             #   gemmi>=0.6.2 names it ' '
@@ -98,74 +487,64 @@ class StarFile:
                         raise StarFileError(
                             "Blocks with multiple loops and/or pairs are not supported"
                         )
-                    loop_tags = gemmi_item.loop.tags
-                    # convert loop data to a list of lists
-                    loop_data = [None] * gemmi_item.loop.length()
-                    for row in range(gemmi_item.loop.length()):
-                        loop_data[row] = [
-                            gemmi_item.loop[row, col]
-                            for col in range(gemmi_item.loop.width())
-                        ]
+                    loop = gemmi_item.loop
             if block_has_pair:
-                if gemmi_block.name not in self.blocks:
-                    # represent a set of pairs by a dictionary
-                    self.blocks[gemmi_block.name] = pairs
-                else:
-                    # enforce unique block names (keys of StarFile.block OrderedDict)
-                    raise StarFileError(
-                        f"Attempted overwrite of existing data block: {gemmi_block.name}"
-                    )
+                # represent a set of pairs by a dictionary
+                self._add_block(gemmi_block.name, pairs)
             elif block_has_loop:
-                if gemmi_block.name not in self.blocks:
-                    # initialize dict from list of lists
-                    d = {}
-                    for i, loop_tag in enumerate(loop_tags):
-                        d[loop_tag] = [str(x[i]) for x in loop_data]
-                    self.blocks[gemmi_block.name] = d
-                else:
-                    # enforce unique block names (keys of StarFile.block OrderedDict)
-                    raise StarFileError(
-                        f"Attempted overwrite of existing data block: {gemmi_block.name}"
-                    )
+                # loop values are flat and row major, slice out each column
+                values, width = loop.values, loop.width()
+                columns = [values[i::width] for i in range(width)]
+                chunks = [columns] if loop.length() else []
+                self._add_block(gemmi_block.name, self._loop_block(loop.tags, chunks))
 
     def write(self, filepath):
         """
-        Converts `blocks` to a gemmi Document and writes to a starfile at the given filepath.
+        Writes `blocks` to a starfile at the given filepath.
+
+        Output follows gemmi's default formatting. Loop rows are
+        formatted and written in bulk, a chunk of rows at a time.
         """
-        # create an empty Document
-        _doc = cif.Document()
-        filepath = str(filepath)
-        for name, block in self.blocks.items():
-            # construct new empty block
-            _block = _doc.add_new_block(name)
-            # if this block (loop or pair) is empty, continue
-            if len(block) == 0:
-                continue
+        with open(str(filepath), "w") as fh:
+            for i, (name, block) in enumerate(self.blocks.items()):
+                # blocks are separated by a blank line
+                if i > 0:
+                    fh.write("\n")
+                fh.write(f"data_{name}\n")
+                # if this block (loop or pair) is empty, continue
+                if len(block) == 0:
+                    continue
 
-            # look at values to detect if we're dealing with iterables
-            multiple_rows = isinstance(block, dict) and all(
-                not isinstance(v, str) and hasattr(v, "__iter__")
-                for v in block.values()
-            )
+                # look at values to detect if we're dealing with iterables
+                multiple_rows = isinstance(block, dict) and all(
+                    not isinstance(v, str) and hasattr(v, "__iter__")
+                    for v in block.values()
+                )
 
-            if not multiple_rows:
-                for key, value in block.items():
-                    # simply assign one pair item for each dict entry
+                if not multiple_rows:
+                    # simply write one pair item for each dict entry
                     # write out as str because we do not want type conversion
-                    _block.set_pair(key, str(value))
-            else:
+                    fh.writelines(f"{key} {value}\n" for key, value in block.items())
+                    continue
+
+                columns = [
+                    v if isinstance(v, (list, tuple, np.ndarray)) else list(v)
+                    for v in block.values()
+                ]
                 assert (
-                    len(set(len(v) for v in block.values())) == 1
+                    len(set(len(v) for v in columns)) == 1
                 ), "Not all iterables of the block have the same length"
-                _n_rows = len(list(block.values())[0])
-                # initialize loop with column names
-                _keys = list(block.keys())
-                _loop = _block.init_loop("", _keys)
-                for i in range(_n_rows):
-                    row = [str(block[k][i]) for k in _keys]
-                    _loop.add_row(row)
-
-        _doc.write_file(filepath)
+                _n_rows = len(columns[0])
+                # gemmi omits loops without rows
+                if _n_rows == 0:
+                    continue
+                fh.write("loop_\n")
+                fh.writelines(f"{key}\n" for key in block.keys())
+                for start in range(0, _n_rows, self._write_chunk_size):
+                    stop = start + self._write_chunk_size
+                    cols = [_format_column(v[start:stop]) for v in columns]
+                    fh.write("\n".join(map(" ".join, zip(*cols))))
+                    fh.write("\n")
 
     def get_block_by_index(self, index):
         """
@@ -3,6 +3,7 @@ Utilities for controlling and generating random numbers.
 """
 
 import warnings
+from threading import RLock
 
 import numpy as np
 from scipy.special import erfinv
@@ -10,6 +11,10 @@ from scipy.special import erfinv
 # A list of random states, used as a stack
 random_states = []
 
+# Seeded contexts swap the global NumPy random state,
+# so they are serialized across threads.
+_random_lock = RLock()
+
 
 def choice(*args, **kwargs):
     """
@@ -94,6 +99,7 @@ class Random:
 
     def __enter__(self):
         if self.seed is not None:
+            _random_lock.acquire()
             # Push current state on stack
             random_states.append(np.random.get_state())
 
@@ -108,3 +114,4 @@ class Random:
     def __exit__(self, *args):
         if self.seed is not None:
             np.random.set_state(random_states.pop())
+            _random_lock.release()
@@ -64,7 +64,13 @@ def dict_to_relion_types(d):
         not isinstance(v, str) and hasattr(v, "__iter__") for v in d.values()
     )
     if multiple_rows:
-        retval = dict(zip(d, [np.array(list(map(column_types[k], d[k]))) for k in d]))
+        retval = {}
+        for k, v in d.items():
+            if isinstance(v, np.ndarray):
+                # Columns already parsed into arrays are cast in bulk.
+                retval[k] = v.astype(column_types[k], copy=False)
+            else:
+                retval[k] = np.array(list(map(column_types[k], v)))
     else:
         retval = {k: column_types[k](d[k]) for k in d}
     return retval
@@ -75,6 +81,9 @@ class RelionStarFile(StarFile):
     A star file generated by RELION representing particles, micrographs, or movies.
     """
 
+    # Loop columns are parsed directly into typed arrays.
+    _column_types = relion_metadata_fields
+
     def __init__(self, filepath):
         super().__init__(filepath, blocks=None)
 
@@ -170,20 +179,20 @@ class RelionStarFile(StarFile):
             # merge the parameters in the optics block as new columns in the data block
             # based on the corresponding optics group number (returns a new dataframe)
             data_block = self.data_block.copy()
-            # Create a dict from optics_group to individual optics properties
             optics = self.optics_block
-            optics_props_by_group_id = dict(
-                (k, {_k: optics[_k][i] for _k in optics})
-                for i, k in enumerate(optics["_rlnOpticsGroup"])
-            )
+            group_ids = np.asarray(optics["_rlnOpticsGroup"]).astype(int)
             # get a NumPy array of optics indices for each row of data
             optics_indices = self.data_block["_rlnOpticsGroup"].astype(int)
-            for k in optics:
-                data_block[k] = np.array(
-                    [
-                        optics_props_by_group_id[optic_index][k]
-                        for optic_index in optics_indices
-                    ]
+            # find the optics block row of each data row's optics group
+            sorter = np.argsort(group_ids)
+            pos = np.searchsorted(group_ids, optics_indices, sorter=sorter)
+            optics_rows = sorter[np.minimum(pos, len(group_ids) - 1)]
+            missing = group_ids[optics_rows] != optics_indices
+            if np.any(missing):
+                raise KeyError(
+                    f"Optics groups {np.unique(optics_indices[missing])} not in optics block."
                 )
+            for k in optics:
+                data_block[k] = np.asarray(optics[k])[optics_rows]
 
             return data_block
@@ -1,12 +1,14 @@
 import logging
 import os
 import warnings
+from functools import lru_cache
 
 import mrcfile
 import numpy as np
 from numpy.linalg import qr
 
 import aspire.image
+from aspire import config
 from aspire.nufft import nufft
 from aspire.numeric import fft, xp
 from aspire.utils import (
@@ -127,6 +129,17 @@ class Volume:
         self.__array_interface__ = self._data.__array_interface__
         self.__array__ = self._data
 
+    def __getstate__(self):
+        # `__array_interface__` holds a raw data pointer,
+        # which is rebuilt on unpickling instead of being serialized.
+        state = self.__dict__.copy()
+        del state["__array_interface__"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__array_interface__ = self._data.__array_interface__
+
     def asnumpy(self):
         """
         Return volume data as a (<stack>, resolution, resolution,
@@ -359,17 +372,25 @@ class Volume:
             pixel_size=self.pixel_size,
         )
 
-    def project(self, rot_matrices, zero_nyquist=True):
+    def project(self, rot_matrices, zero_nyquist=True, outer=False, max_bytes=2**30):
         """
         Using the stack of rot_matrices, project images of Volume. When projecting
         over a stack of volumes, a singleton Rotation or a Rotation with stack size
         self.n_vols must be used. In the case of a singleton Rotation, each Volume in
         the stack will be projected using the single Rotation. In the case of a Volume stack
         and a Rotation stack, the i'th Volume will be projected using the i'th Rotation.
+        With `outer=True`, every Volume is projected using every Rotation.
+
+        Volumes sharing a point set are projected together as a batch of NUFFT
+        transforms, and rotations are processed in chunks bounded by `max_bytes`.
 
         :param rot_matrices: Stack of rotations. Rotation or ndarray instance.
         :param zero_nyquist: Option to keep or remove Nyquist frequency for even resolution.
             Defaults to zero_nyquist=True, removing the Nyquist frequency.
+        :param outer: Optionally project each of the n Volumes with each of the m
+            Rotations, returning an `Image` with stack shape (n, m). Default False.
+        :param max_bytes: Approximate upper bound on the memory used by the Fourier
+            slices of each chunk of rotations, in bytes. Default 1 GiB.
         :return: `Image` instance.
         """
         # See Issue #727
@@ -396,24 +417,37 @@ class Volume:
 
         data = xp.asarray(self._data)
         n_rots = rot_matrices.shape[0]
-        pts_rot = rotated_grids(self.resolution, rot_matrices)
 
-        if n_rots == self.n_vols:
-            # Apply rotations to Volumes element-wise.
+        if outer or n_rots == 1 or self.n_vols == 1:
+            # All Volumes share the points of every rotation.
+            im_f = self._project_f(data, rot_matrices, max_bytes)
+            if outer:
+                stack_shape = (self.n_vols, n_rots)
+            else:
+                # Broadcast stack with singleton.
+                stack_shape = (self.n_vols * n_rots,)
+        elif n_rots == self.n_vols:
+            # Apply rotations to Volumes element-wise, batching
+            # together Volumes assigned the same rotation.
             im_f = xp.empty(
-                (self.n_vols, self.resolution**2), dtype=complex_type(self.dtype)
+                (self.n_vols, 1, self.resolution**2), dtype=complex_type(self.dtype)
+            )
+            rots, rot_indices = np.unique(
+                rot_matrices.reshape(n_rots, 9), axis=0, return_inverse=True
             )
-            pts_rot = pts_rot.reshape((3, n_rots, self.resolution**2))
-            for i in range(self.n_vols):
-                im_f[i] = nufft(data[i], pts_rot[:, i]) / self.resolution
-        elif (n_rots == 1) or (self.n_vols == 1):
-            # Broadcast stack with singleton.
-            pts_rot = pts_rot.reshape((3, n_rots * self.resolution**2))
-            im_f = nufft(data, pts_rot) / self.resolution
+            rot_indices = rot_indices.reshape(-1)
+            order = np.argsort(rot_indices, kind="stable")
+            bounds = np.cumsum(np.bincount(rot_indices, minlength=len(rots)))
+            for j, (start, stop) in enumerate(zip(np.r_[0, bounds[:-1]], bounds)):
+                idx = order[start:stop]
+                im_f[idx] = self._project_f(
+                    data[idx], rots[j].reshape(1, 3, 3), max_bytes
+                )
+            stack_shape = (self.n_vols,)
         else:
-            # Currently not supporting broadcasting n Volumes with m rotations.
             raise NotImplementedError(
                 f"Cannot broadcast with {n_rots} Rotations and {self.n_vols} Volumes."
+                " Use `outer=True` to project each Volume with each Rotation."
             )
 
         im_f = im_f.reshape(-1, self.resolution, self.resolution)
@@ -424,7 +458,37 @@ class Volume:
             im_f[:, :, 0] = 0
 
         im_f = fft.centered_ifft2(im_f)
-        return aspire.image.Image(xp.asnumpy(im_f.real), pixel_size=self.pixel_size)
+        im = xp.asnumpy(im_f.real).reshape(*stack_shape, *im_f.shape[-2:])
+        return aspire.image.Image(im, pixel_size=self.pixel_size)
+
+    def _project_f(self, data, rot_matrices, max_bytes):
+        """
+        Compute the central Fourier slices of each volume in `data`
+        for each rotation, batching volumes as NUFFT transforms.
+
+        :param data: Array of shape (k, L, L, L).
+        :param rot_matrices: Array of shape (m, 3, 3).
+        :param max_bytes: Approximate upper bound on the memory of each chunk of slices.
+        :return: Array of shape (k, m, L**2) holding the Fourier slices.
+        """
+        L = self.resolution
+        n_vols, n_rots = data.shape[0], rot_matrices.shape[0]
+        dtype = complex_type(self.dtype)
+
+        # Number of rotations per chunk, at least one.
+        slice_nbytes = n_vols * L**2 * np.dtype(dtype).itemsize
+        chunk = max(1, int(max_bytes // slice_nbytes))
+
+        im_f = xp.empty((n_vols, n_rots, L**2), dtype=dtype)
+        for start in range(0, n_rots, chunk):
+            rots = rot_matrices[start : start + chunk]
+            pts_rot = rotated_grids(L, rots).reshape((3, -1))
+            im_f[:, start : start + len(rots)] = nufft(data, pts_rot).reshape(
+                n_vols, len(rots), L**2
+            )
+        im_f /= L
+
+        return im_f
 
     def to_vec(self):
         """Returns an N x resolution ** 3 array."""
@@ -615,7 +679,11 @@ class Volume:
                 (self.n_vols, self.resolution**3), dtype=complex_type(self.dtype)
             )
             for i in range(K):
-                pts_rot[i] = rotated_grids_3d(self.resolution, rots_inverted[i])
+                rotated_grids_3d(
+                    self.resolution,
+                    rots_inverted[i].astype(self.dtype, copy=False),
+                    out=pts_rot[i],
+                )
 
                 vol_f[i] = nufft(self[i].asnumpy(), pts_rot[i])
 
@@ -817,63 +885,108 @@ class FBBasisVolume(BasisVolume):
 # TODO: The following functions likely all need to be moved inside the Volume class
 
 
-def rotated_grids(L, rot_matrices):
+@lru_cache(maxsize=config["cache"]["grid_cache_size"].get())
+def _fourier_pts_2d(L, dtype):
+    """
+    Return the frequency points of the 2D grid, in xy order as a read-only
+    2-by-L**2 array.  The constant zero z component is omitted.
+    """
+    grid2d = grid_2d(L, indexing="yx", dtype=dtype)
+    pts = np.pi * np.vstack([grid2d["x"].flatten(), grid2d["y"].flatten()])
+    pts.flags.writeable = False
+    return pts
+
+
+@lru_cache(maxsize=config["cache"]["grid_cache_size"].get())
+def _fourier_pts_3d(L, dtype):
+    """
+    Return the frequency points of the 3D grid, in xyz order as a read-only
+    3-by-L**3 array.
+    """
+    grid3d = grid_3d(L, indexing="zyx", dtype=dtype)
+    pts = np.pi * np.vstack(
+        [grid3d["x"].flatten(), grid3d["y"].flatten(), grid3d["z"].flatten()]
+    )
+    pts.flags.writeable = False
+    return pts
+
+
+def _rotate_pts(rot_matrices, pts, out):
+    """
+    Apply each rotation to the xyz frequency points `pts`, writing the
+    rotated points in zyx order to `out`.
+
+    :param rot_matrices: An array of size k-by-3-by-3.
+    :param pts: An array of size d-by-P with d <= 3. Missing trailing
+        components are taken to be zero.
+    :param out: Output array of size 3-by-k-by-P.
+    """
+    d = pts.shape[0]
+    # One matrix product over all rotations per output component.
+    for i in range(3):
+        np.matmul(rot_matrices[:, i, :d], pts, out=out[2 - i])
+
+
+def _check_out(out, shape, dtype):
+    """
+    Validate a caller supplied output buffer for the rotated grids.
+    """
+    if out.shape != shape or out.dtype != dtype or not out.flags.c_contiguous:
+        raise ValueError(
+            f"`out` must be a C contiguous {dtype} array of shape {shape},"
+            f" received {out.dtype} array of shape {out.shape}."
+        )
+
+
+def rotated_grids(L, rot_matrices, out=None):
     """
     Generate rotated Fourier grids in 3D from rotation matrices
 
     :param L: The resolution of the desired grids.
     :param rot_matrices: An array of size k-by-3-by-3 containing K rotation matrices
+    :param out: Optional C contiguous array of size 3-by-k-by-L-by-L,
+        matching the dtype of `rot_matrices`, to hold the result.
     :return: A set of rotated Fourier grids in three dimensions as specified by the rotation matrices.
         Frequencies are in the range [-pi, pi].
     """
 
-    grid2d = grid_2d(L, indexing="yx", dtype=rot_matrices.dtype)
-    num_pts = L**2
+    dtype = rot_matrices.dtype
     num_rots = rot_matrices.shape[0]
+    shape = (3, num_rots, L, L)
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    else:
+        _check_out(out, shape, dtype)
 
-    # Frequency points flattened and placed in xyz order to apply rotations.
-    pts = np.pi * np.vstack(
-        [
-            grid2d["x"].flatten(),
-            grid2d["y"].flatten(),
-            np.zeros(num_pts, dtype=rot_matrices.dtype),
-        ]
-    )
-    pts_rot = np.zeros((3, num_rots, num_pts), dtype=rot_matrices.dtype)
-    for i in range(num_rots):
-        pts_rot[:, i, :] = rot_matrices[i, :, :] @ pts
-
-    # Reshape rotated frequency points and convert back into zyx convention.
-    pts_rot = pts_rot.reshape((3, num_rots, L, L))[::-1]
+    # Rotate frequency points and place the result in zyx convention.
+    pts = _fourier_pts_2d(L, dtype)
+    _rotate_pts(rot_matrices, pts, out.reshape(3, num_rots, L**2))
 
-    return pts_rot
+    return out
 
 
-def rotated_grids_3d(L, rot_matrices):
+def rotated_grids_3d(L, rot_matrices, out=None):
     """
     Generate rotated Fourier grids in 3D from rotation matrices.
 
     :param L: The resolution of the desired grids.
     :param rot_matrices: An array of size k-by-3-by-3 containing K rotation matrices
+    :param out: Optional C contiguous array of size 3-by-(k*L**3),
+        matching the dtype of `rot_matrices`, to hold the result.
     :return: A set of rotated Fourier grids in three dimensions as specified by the rotation matrices.
         Frequencies are in the range [-pi, pi].
     """
 
-    grid3d = grid_3d(L, indexing="zyx", dtype=rot_matrices.dtype)
-    num_pts = L**3
+    dtype = rot_matrices.dtype
     num_rots = rot_matrices.shape[0]
-
-    # Frequency points flattened and placed in xyz order to apply rotations.
-    pts = np.pi * np.vstack(
-        [
-            grid3d["x"].flatten(),
-            grid3d["y"].flatten(),
-            grid3d["z"].flatten(),
-        ]
-    )
-    pts_rot = np.zeros((3, num_rots, num_pts), dtype=rot_matrices.dtype)
-    for i in range(num_rots):
-        pts_rot[:, i, :] = rot_matrices[i, :, :] @ pts
+    shape = (3, num_rots * L**3)
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    else:
+        _check_out(out, shape, dtype)
 
     # Note we return grids as (Z,Y,X)
-    return pts_rot.reshape(3, -1)[::-1]
+    pts = _fourier_pts_3d(L, dtype)
+    _rotate_pts(rot_matrices, pts, out.reshape(3, num_rots, L**3))
+
+    return out
@@ -4,9 +4,15 @@ import os
 import numpy as np
 import pytest
 
+from aspire import config
 from aspire.abinitio import CLSync3N
 from aspire.source import Simulation
-from aspire.utils import mean_aligned_angular_distance, rots_to_clmatrix
+from aspire.utils import (
+    J_conjugate,
+    all_triplets,
+    mean_aligned_angular_distance,
+    rots_to_clmatrix,
+)
 from aspire.volume import AsymmetricVolume
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "saved_test_data")
@@ -183,3 +189,167 @@ def test_weighted_sync3n(source_orientation_objs):
         # Set tolerance to 75% when using nonzero offsets.
         tol = 0.75
     assert within_5 / angle_diffs.size > tol
+
+
+def _reference_signs_times_v(cl3n, Rijs, vec):
+    """
+    Triangle by triangle signs_times_v, for comparison with the blocked version.
+    """
+    signs_confs = np.array([[1, 1, 1], [-1, 1, -1], [-1, -1, 1], [1, -1, -1]])
+    new_vec = np.zeros_like(vec)
+    for i, j, k in all_triplets(cl3n.n_img):
+        ij, ik, jk = (cl3n._pairs_to_linear[a, b] for a, b in [(i, j), (i, k), (j, k)])
+        Rij, Rik, Rjk = Rijs[ij], Rijs[ik], Rijs[jk]
+        c = np.array(
+            [
+                np.sum((Rij @ Rjk - Rik) ** 2),
+                np.sum((J_conjugate(Rij) @ Rjk - Rik) ** 2),
+                np.sum((Rij @ J_conjugate(Rjk) - Rik) ** 2),
+                np.sum((Rij @ Rjk - J_conjugate(Rik)) ** 2),
+            ]
+        )
+        best = np.argmin(c)
+        s = signs_confs[best].astype(vec.dtype)
+        if cl3n.J_weighting:
+            alt = np.minimum(c[cl3n._ALTS[0][best]], c[cl3n._ALTS[1][best]])
+            s *= 1 - np.sqrt(c[best] / alt)
+        new_vec[ij] += s[0] * vec[jk] + s[2] * vec[ik]
+        new_vec[jk] += s[0] * vec[ij] + s[1] * vec[ik]
+        new_vec[ik] += s[2] * vec[ij] + s[1] * vec[jk]
+
+    return new_vec
+
+
+@pytest.mark.parametrize("J_weighting", [False, True])
+def test_signs_times_v_host(J_weighting):
+    """
+    Test blocked, threaded `_signs_times_v_host` against a triangle loop
+    and the legacy MATLAB signs_times_v reference.
+    """
+    n = 12
+    src = Simulation(L=8, n=n, C=1, dtype=np.float64, seed=0)
+    cl3n = CLSync3N(src, J_weighting=J_weighting, disable_gpu=True)
+
+    rots = src.rotations
+    pairs = cl3n._pairs
+    Rijs = rots[pairs[:, 0]].transpose(0, 2, 1) @ rots[pairs[:, 1]]
+    # J-conjugate some estimates and add noise.
+    rng = np.random.default_rng(0)
+    flip = rng.random(len(Rijs)) < 0.3
+    Rijs[flip] = J_conjugate(Rijs[flip])
+    Rijs += 0.1 * rng.standard_normal(Rijs.shape)
+    vec = rng.standard_normal(len(Rijs))
+
+    block_size = config["abinitio"]["triangle_block_size"].get()
+    threads = config["abinitio"]["triangle_threads"].get()
+    try:
+        # Blocks spanning several j, with several threads.
+        config["abinitio"]["triangle_block_size"] = 7
+        config["abinitio"]["triangle_threads"] = 3
+        new_vec = cl3n._signs_times_v_host(Rijs, vec)
+    finally:
+        config["abinitio"]["triangle_block_size"] = block_size
+        config["abinitio"]["triangle_threads"] = threads
+
+    ref_vec = _reference_signs_times_v(cl3n, Rijs, vec)
+    np.testing.assert_allclose(new_vec, ref_vec, rtol=1e-10, atol=1e-12)
+
+    if not J_weighting:
+        # Legacy MATLAB reference, see `test_signs_times_v_mex`.
+        n = 5
+        n_pairs = n * (n - 1) // 2
+        Rijs = np.transpose(
+            np.arange(1, n_pairs * 9 + 1, dtype=np.float64).reshape(n_pairs, 3, 3),
+            (0, 2, 1),
+        )
+        cl3n = CLSync3N(Simulation(L=8, n=n, C=1), disable_gpu=True)
+        new_vec = cl3n._signs_times_v_host(Rijs, np.ones(n_pairs))
+        np.testing.assert_allclose(new_vec, [0, -2, -2, 0, -6, -4, -2, -2, -2, 0])
+
+
+@pytest.mark.parametrize("cache", ["memory", "memmap", None])
+def test_triangle_data(cache, tmp_path):
+    """
+    Test triangle scores and pair probabilities reduced over cached,
+    memory-mapped or streamed triangles against the legacy MATLAB
+    references, and permuting cached triangles under J-conjugation.
+    """
+    max_bytes = config["abinitio"]["triangle_cache_max_bytes"].get()
+    cache_dir = config["abinitio"]["triangle_cache_dir"].get()
+    try:
+        if cache != "memory":
+            config["abinitio"]["triangle_cache_max_bytes"] = 0
+        if cache == "memmap":
+            config["abinitio"]["triangle_cache_dir"] = str(tmp_path)
+
+        # Legacy MATLAB references, see `test_triangles_scores` and
+        # `test_pairs_prob_mex`.
+        n = 5
+        n_pairs = n * (n - 1) // 2
+        Rijs = np.transpose(
+            np.arange(1, n_pairs * 9 + 1, dtype=np.float64).reshape(n_pairs, 3, 3),
+            (0, 2, 1),
+        )
+        cl3n = CLSync3N(Simulation(L=8, n=n, C=1), disable_gpu=True)
+
+        ref_hist = np.zeros(cl3n.hist_intervals)
+        np.put(
+            ref_hist,
+            [0, 10, 11, 12, 70, 71, 72, 76, 81, 89],
+            [14, 2, 2, 2, 1, 1, 2, 1, 2, 3],
+        )
+        np.testing.assert_array_equal(cl3n._triangle_scores_inner_host(Rijs), ref_hist)
+
+        ln_f_ind, ln_f_arb = cl3n._pairs_probabilities_host(Rijs, *np.arange(1, 7))
+        ref_ln_f_ind = [
+            -24.1817,
+            -5.6554,
+            4.9117,
+            12.7047,
+            -12.9374,
+            -5.5158,
+            1.5289,
+            -9.0406,
+            -2.2067,
+            -7.3968,
+        ]
+        ref_ln_f_arb = [
+            -17.1264,
+            -6.7218,
+            -0.8876,
+            3.3437,
+            -10.7251,
+            -6.7051,
+            -2.9029,
+            -8.5061,
+            -4.8288,
+            -7.5608,
+        ]
+        np.testing.assert_allclose(ln_f_ind, ref_ln_f_ind, atol=5e-5)
+        np.testing.assert_allclose(ln_f_arb, ref_ln_f_arb, atol=5e-5)
+
+        # Cached triangles are permuted when J-conjugating pairs.
+        n = 12
+        src = Simulation(L=8, n=n, C=1, dtype=np.float64, seed=0)
+        cl3n = CLSync3N(src, disable_gpu=True)
+        rng = np.random.default_rng(0)
+        Rijs = rng.standard_normal((n * (n - 1) // 2, 3, 3))
+        data = cl3n._triangle_data(Rijs)
+        assert (data is None) == (cache is None)
+        if cache == "memmap":
+            assert isinstance(data, np.memmap)
+
+        cl3n._J_conjugate_pairs(Rijs, rng.random(len(Rijs)) < 0.5)
+        if cache is not None:
+            assert cl3n._triangle_data(Rijs) is data
+            ref = np.concatenate(
+                [
+                    c
+                    for i in range(n - 2)
+                    for *_, c in cl3n._triangle_discrepancies(Rijs, i)
+                ]
+            )
+            np.testing.assert_allclose(data, ref)
+    finally:
+        config["abinitio"]["triangle_cache_max_bytes"] = max_bytes
+        config["abinitio"]["triangle_cache_dir"] = cache_dir
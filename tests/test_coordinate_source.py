@@ -414,6 +414,31 @@ class CoordinateSourceTestCase(TestCase):
         for i, idx in enumerate(random_sample_neg):
             self.assertTrue(np.array_equal(images_in_order[idx], random_images_neg[i]))
 
+    def testImagesMicrographPool(self):
+        # cropping from a bounded pool of memory-mapped micrographs,
+        # with one or several threads, should match cropping directly
+        # from the fully loaded micrographs
+        random_sample = np.array(random.sample(range(400), 100))
+        expected = []
+        src = BoxesCoordinateSource(self.files_box)
+        for i in random_sample:
+            mrc_index, coord = src.particles[i]
+            arr = mrcfile.read(src.mrc_paths[mrc_index])
+            expected.append(src._crop_micrograph(arr, coord))
+        for n_workers in [1, 2]:
+            src = BoxesCoordinateSource(
+                self.files_box, n_workers=n_workers, max_open_micrographs=1
+            )
+            self.assertTrue(
+                np.array_equal(src.images[random_sample].asnumpy(), expected)
+            )
+            self.assertEqual(len(src._micrograph_pool), 1)
+        # the particle index matches the particles list
+        for mrc_index, particle_indices in enumerate(src.mrc_index_to_particles):
+            for i in particle_indices:
+                self.assertEqual(src.particles[i][0], mrc_index)
+        self.assertEqual(sum(map(len, src.mrc_index_to_particles)), src.n)
+
     def testMaxRows(self):
         src_from_box = BoxesCoordinateSource(self.files_box)
         imgs = src_from_box.images[:400]
@@ -1,3 +1,4 @@
+import gc
 import logging
 import os.path
 from unittest import TestCase
@@ -8,6 +9,7 @@ import pytest
 from aspire.operators import (
     ArrayFilter,
     CTFFilter,
+    FilterGridCache,
     FunctionFilter,
     IdentityFilter,
     PowerFilter,
@@ -15,6 +17,7 @@ from aspire.operators import (
     ScalarFilter,
     ScaledFilter,
     ZeroFilter,
+    evaluate_filters_on_grid,
 )
 from aspire.utils import utest_tolerance
 
@@ -338,6 +341,8 @@ class SimTestCase(TestCase):
 
 DTYPES = [np.float32, np.float64]
 EPS = [None, 0.01]
+# CTF phases reach tens of radians, limiting singles' accuracy.
+CTF_ATOL = {np.float32: 2e-4, np.float64: 1e-10}
 
 
 @pytest.fixture(params=DTYPES, ids=lambda x: f"dtype={x}", scope="module")
@@ -401,6 +406,147 @@ def test_array_filter_dtype_passthrough(dtype):
     assert filt_vals.dtype == dtype
 
 
+def test_evaluate_filters_on_grid(dtype):
+    """
+    Stacked evaluation should match evaluating each filter on its own,
+    with out of range indices mapped to the identity.
+    """
+    L = 16
+    filters = [RadialCTFFilter(defocus=d) for d in (1e4, 1.5e4, 2e4)]
+    filter_indices = np.array([2, 0, 0, -1, 2, 3, 1])
+
+    h = evaluate_filters_on_grid(filters, filter_indices, L, dtype=dtype)
+
+    assert h.shape == (len(filter_indices), L, L)
+    assert h.dtype == dtype
+    for k, i in enumerate(filter_indices):
+        if 0 <= i < len(filters):
+            ref = filters[i].evaluate_grid(L, dtype=dtype)
+        else:
+            ref = np.ones((L, L), dtype=dtype)
+        np.testing.assert_allclose(h[k], ref, atol=CTF_ATOL[dtype])
+
+
+def test_ctf_evaluate_grid_batch(dtype):
+    """
+    Batched CTF evaluation should match evaluating each CTFFilter.
+    """
+    L = 33
+    filters = [
+        CTFFilter(
+            pixel_size=1.3,
+            voltage=300,
+            defocus_u=1e4,
+            defocus_v=1.4e4,
+            defocus_ang=0.7,
+            Cs=2.0,
+            alpha=0.1,
+            B=20,
+        ),
+        RadialCTFFilter(pixel_size=2, defocus=2e4),
+        CTFFilter(defocus_u=2e4, defocus_v=1.1e4, defocus_ang=-1.1),
+    ]
+    params = {k: [getattr(f, k) for f in filters] for k in CTFFilter._batch_params}
+    h = CTFFilter.evaluate_grid_batch(L, **params, dtype=dtype)
+
+    ref = np.stack([f.evaluate_grid(L, dtype=dtype) for f in filters])
+
+    assert h.shape == (len(filters), L, L)
+    assert h.dtype == dtype
+    np.testing.assert_allclose(h, ref, atol=CTF_ATOL[dtype])
+
+    # Scalars broadcast across the batch.
+    h = CTFFilter.evaluate_grid_batch(
+        L, defocus_u=[1e4, 2e4], defocus_v=[1e4, 2e4], dtype=dtype
+    )
+    assert h.shape == (2, L, L)
+
+
+GRID_CACHE = FilterGridCache()
+
+
+class CountingFilter(ScalarFilter):
+    """
+    ScalarFilter counting grid evaluations, cached in `GRID_CACHE`.
+    """
+
+    def __init__(self, value=1):
+        super().__init__(dim=2, value=value)
+        self.evaluations = 0
+
+    @GRID_CACHE.cached
+    def evaluate_grid(self, L, dtype=np.float32):
+        self.evaluations += 1
+        return np.full((L, L), self.value, dtype=dtype)
+
+
+@pytest.fixture
+def grid_cache():
+    GRID_CACHE.clear()
+    GRID_CACHE.max_bytes = None
+    yield GRID_CACHE
+    GRID_CACHE.clear()
+
+
+def test_filter_grid_cache_stats(grid_cache):
+    filt = CountingFilter()
+
+    a = filt.evaluate_grid(8)
+    b = filt.evaluate_grid(8)
+    assert a is b
+    # Resolution and dtype are part of the key.
+    filt.evaluate_grid(9)
+    c = filt.evaluate_grid(8, dtype=np.float64)
+    assert c.dtype == np.float64
+
+    assert filt.evaluations == 3
+    stats = grid_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["entries"] == 3
+    assert stats["nbytes"] == a.nbytes + 9 * 9 * 4 + c.nbytes
+
+    grid_cache.clear()
+    assert len(grid_cache) == 0
+    assert grid_cache.stats()["misses"] == 0
+
+
+def test_filter_grid_cache_byte_budget(grid_cache):
+    L = 8
+    entry_bytes = L * L * np.dtype(np.float32).itemsize
+    grid_cache.max_bytes = 2 * entry_bytes
+    filters = [CountingFilter(value=v) for v in range(3)]
+
+    for filt in filters:
+        filt.evaluate_grid(L)
+
+    # The least recently used entry is evicted to respect the budget.
+    stats = grid_cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["nbytes"] == 2 * entry_bytes
+    filters[0].evaluate_grid(L)
+    assert filters[0].evaluations == 2
+    filters[2].evaluate_grid(L)
+    assert filters[2].evaluations == 1
+
+    # Entries larger than the budget are never stored.
+    filters[0].evaluate_grid(3 * L)
+    assert grid_cache.stats()["nbytes"] <= 2 * entry_bytes
+
+
+def test_filter_grid_cache_weakref(grid_cache):
+    """
+    Cached entries should not keep their filter alive.
+    """
+    filt = CountingFilter()
+    filt.evaluate_grid(8)
+    assert len(grid_cache) == 1
+
+    del filt
+    gc.collect()
+    assert len(grid_cache) == 0
+
+
 def test_ctf_reference():
     """
     Test CTFFilter against a MATLAB reference.
@@ -3,7 +3,8 @@ from unittest import TestCase
 
 import numpy as np
 
-from aspire.reconstruction import FourierKernel
+from aspire.reconstruction import FourierKernel, FourierKernelMatrix
+from aspire.volume import Volume
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "saved_test_data")
 
@@ -109,3 +110,82 @@ class FourierKernelTestCase(TestCase):
                 ),
             )
         )
+
+
+def _reference_convolution(x, kernel_f):
+    """
+    Full spectrum convolution of a single volume with `kernel_f`.
+    """
+    N, N_ker = x.shape[0], kernel_f.shape[0]
+    x_f = np.fft.fftn(np.pad(x, [(0, N_ker - N)] * 3))
+    return np.real(np.fft.ifftn(x_f * kernel_f))[:N, :N, :N]
+
+
+def test_convolve_volume_stack():
+    rng = np.random.default_rng(0)
+    kernel_f = rng.standard_normal((16, 16, 16))
+    kernel = FourierKernel(kernel_f)
+    vols = Volume(rng.standard_normal((3, 8, 8, 8)))
+
+    res = kernel.convolve_volume(vols)
+    assert res.shape == vols.shape
+    for v, r in zip(vols.asnumpy(), res.asnumpy()):
+        np.testing.assert_allclose(r, _reference_convolution(v, kernel_f), atol=1e-10)
+
+    # Singleton volumes match the stacked result.
+    np.testing.assert_allclose(kernel.convolve_volume(vols[1]), res[1:2], atol=1e-12)
+
+
+def test_convolve_volumes_matrix():
+    rng = np.random.default_rng(0)
+    r, L = 3, 8
+    kermat = rng.standard_normal((r, r, 2 * L, 2 * L, 2 * L)).astype(np.float32)
+    kernel = FourierKernelMatrix(kermat)
+    vols = Volume(rng.standard_normal((r, L, L, L)).astype(np.float32))
+
+    res = kernel.convolve_volumes(vols)
+    assert res.dtype == np.float32
+
+    for k in range(r):
+        ref = sum(
+            _reference_convolution(vols.asnumpy()[j], kermat[k, j]) for j in range(r)
+        )
+        np.testing.assert_allclose(res.asnumpy()[k], ref, atol=1e-4)
+        # Agrees with the single pair method.
+        pairs = sum(kernel.convolve_volume(vols[j], k, j) for j in range(r))
+        np.testing.assert_allclose(res[k], pairs[0], atol=1e-4)
+
+
+def test_half_spectrum_storage():
+    rng = np.random.default_rng(0)
+    # A real kernel, symmetric under `w -> -w`.
+    kernel_f = np.fft.fftn(np.fft.ifftshift(_symmetric_volume(rng, 8))).real
+    kernel = FourierKernel(kernel_f)
+
+    assert kernel.kernel_h.shape == (16, 16, 9)
+    np.testing.assert_allclose(kernel.kernel, kernel_f, atol=1e-12)
+    np.testing.assert_allclose((kernel + 1.0).kernel, kernel_f + 1.0, atol=1e-12)
+
+
+def test_convolve_volume_matrix():
+    rng = np.random.default_rng(0)
+    N = 3
+    kernel_f = rng.standard_normal((2 * N,) * 6)
+    kernel = FourierKernel(kernel_f)
+    assert kernel.kernel_h.shape == (2 * N,) * 5 + (N + 1,)
+
+    x = rng.standard_normal((N,) * 6)
+    x_f = np.fft.fftn(np.pad(x, [(0, N)] * 6))
+    ref = np.real(np.fft.ifftn(x_f * kernel_f))[(slice(0, N),) * 6]
+
+    np.testing.assert_allclose(kernel.convolve_volume_matrix(x), ref, atol=1e-10)
+
+
+def _symmetric_volume(rng, L):
+    """
+    Random volume of size 2L, symmetric about its center.
+    """
+    x = np.zeros((2 * L,) * 3)
+    x[1:, 1:, 1:] = rng.standard_normal((2 * L - 1,) * 3)
+    x[1:, 1:, 1:] += x[1:, 1:, 1:][::-1, ::-1, ::-1]
+    return x
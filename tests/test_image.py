@@ -1,5 +1,6 @@
 import logging
 import os.path
+import pickle
 import tempfile
 from datetime import datetime
 from unittest import mock
@@ -554,3 +555,18 @@ def test_save_load_pixel_size(get_images, dtype):
     np.testing.assert_almost_equal(
         im2.pixel_size, im.pixel_size, err_msg="Image pixel_size incorrect save-load"
     )
+
+
+def test_pickle_round_trip(dtype):
+    """
+    Test `Image` survives pickling with a valid array interface.
+    """
+    im = Image(np.random.randn(3, 16, 16).astype(dtype), pixel_size=1.23)
+    im2 = pickle.loads(pickle.dumps(im))
+
+    np.testing.assert_array_equal(np.asarray(im2), np.asarray(im))
+    assert im2.pixel_size == im.pixel_size
+    # Array interface should point at the unpickled data.
+    assert (
+        im2.__array_interface__["data"][0] == im2._data.__array_interface__["data"][0]
+    )
@@ -193,3 +193,21 @@ def test_checkpoint_args(sim, basis):
                     maxiter=junk,
                     checkpoint_prefix=prefix,
                 )
+
+
+def test_estimate_multiresolution(sim, basis):
+    """
+    Test the coarse to fine driver converges to the single level estimate.
+    """
+    estimator = MeanEstimator(sim, basis=basis, checkpoint_iterations=None)
+    est = estimator.estimate(tol=1e-6)
+
+    est_mr = estimator.estimate_multiresolution(factors=(4, 2), tol=1e-6)
+
+    # L // 4 is too coarse and skipped.
+    assert [s["L"] for s in estimator.level_stats] == [sim.L // 2, sim.L]
+    assert all(s["iterations"] > 0 for s in estimator.level_stats)
+    assert est_mr.resolution == sim.L
+    np.testing.assert_allclose(
+        est_mr / np.linalg.norm(est), est / np.linalg.norm(est), atol=1e-4
+    )
@@ -3,8 +3,10 @@ from unittest import TestCase
 from unittest.case import SkipTest
 
 import numpy as np
+import pytest
 
-from aspire.nufft import Plan, backend_available
+from aspire.nufft import Plan, PlanCache, anufft, backend_available, nufft
+from aspire.nufft.finufft import FinufftPlan
 from aspire.utils.types import complex_type, utest_tolerance
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "saved_test_data")
@@ -945,3 +947,69 @@ class SimTestCase(TestCase):
 
     def testAdjoint2_64(self):
         self._testAdjoint("pynfft", np.float64)
+
+
+@pytest.mark.skipif(not backend_available("finufft"), reason="requires finufft")
+def test_plan_cache():
+    """
+    Test plans are reused for equal point sets and evicted by byte budget.
+    """
+    rng = np.random.default_rng(0)
+    sz = (8, 8)
+    pts = rng.uniform(-np.pi, np.pi, size=(2, 32)).astype(np.float32)
+    cache = PlanCache()
+
+    plan = cache.get(FinufftPlan, sz, pts)
+    # Only the direction used is planned.
+    assert plan._plans == {}
+    plan.transform(np.ones(sz, dtype=np.complex64))
+    assert list(plan._plans) == [2]
+
+    # An equal, distinct point array hits the cache.
+    assert cache.get(FinufftPlan, sz, pts.copy()) is plan
+    assert cache.stats()["hits"] == 1
+    # Points, precision and batch size are part of the key.
+    plans = [
+        plan,
+        cache.get(FinufftPlan, sz, pts[:, ::-1]),
+        cache.get(FinufftPlan, sz, pts, epsilon=1e-4),
+        cache.get(FinufftPlan, sz, pts, ntransforms=2),
+    ]
+    assert len(set(map(id, plans))) == 4
+    stats = cache.stats()
+    assert stats["misses"] == 4
+    assert stats["entries"] == 4
+    assert stats["nbytes"] == sum(map(PlanCache.plan_nbytes, plans))
+
+    # A budget of one plan evicts least recently used plans.
+    cache = PlanCache(max_bytes=PlanCache.plan_nbytes(plan))
+    cache.get(FinufftPlan, sz, pts)
+    cache.get(FinufftPlan, sz, pts[:, ::-1])
+    assert len(cache) == 1
+    assert cache.stats()["evictions"] == 1
+    assert cache.get(FinufftPlan, sz, pts[:, ::-1]) is not None
+    assert cache.stats()["hits"] == 1
+
+    # Disabled cache always builds.
+    cache = PlanCache(max_bytes=0)
+    assert cache.get(FinufftPlan, sz, pts) is not cache.get(FinufftPlan, sz, pts)
+    assert len(cache) == 0
+
+
+@pytest.mark.skipif(not backend_available("finufft"), reason="requires finufft")
+def test_plan_cache_nufft():
+    """
+    Test repeated `nufft`/`anufft` calls with a cached plan match an uncached plan.
+    """
+    rng = np.random.default_rng(0)
+    L = 8
+    pts = rng.uniform(-np.pi, np.pi, size=(3, 64))
+    vol = rng.standard_normal((2, L, L, L))
+    sig = rng.standard_normal((2, 64))
+
+    plan = Plan(sz=(L,) * 3, fourier_pts=pts, ntransforms=2, backend="finufft")
+    for _ in range(2):
+        np.testing.assert_allclose(nufft(vol, pts), plan.transform(vol))
+        np.testing.assert_allclose(
+            anufft(sig, pts, (L,) * 3), plan.adjoint(sig.astype(np.complex128))
+        )
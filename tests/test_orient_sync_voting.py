@@ -7,11 +7,13 @@ import numpy as np
 import pytest
 from click.testing import CliRunner
 
+from aspire import config
 from aspire.abinitio import CLOrient3D, CLSyncVoting
 from aspire.commands.orient3d import orient3d
 from aspire.noise import WhiteNoiseAdder
 from aspire.source import Simulation
 from aspire.utils import mean_aligned_angular_distance, rots_to_clmatrix
+from aspire.utils.random import Random
 from aspire.volume import AsymmetricVolume
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "saved_test_data")
@@ -206,6 +208,78 @@ def test_n_check_error():
         _ = CLOrient3D(sim, n_check=sim.n + 1)
 
 
+def _reference_clmatrix(orient_est):
+    """
+    Pair by pair common line search, for comparison with `build_clmatrix_host`.
+    """
+    n_theta_half = orient_est.n_theta // 2
+    r_max = orient_est.pf.shape[2]
+    shifts, shift_phases, h = orient_est._generate_shift_phase_and_filter(
+        r_max, orient_est.max_shift, orient_est.shift_step
+    )
+    pf = orient_est._apply_filter_and_norm("ijk, k -> ijk", orient_est.pf, r_max, h)
+
+    clmatrix = -np.ones((orient_est.n_img, orient_est.n_img))
+    shifts_1d = np.zeros((orient_est.n_img, orient_est.n_img))
+    for i in range(orient_est.n_img):
+        for j in range(i + 1, orient_est.n_img):
+            best = -1
+            for shift, shift_phase in zip(shifts, shift_phases):
+                p2 = (shift_phase * np.conj(pf[j])).T
+                part1 = np.real(pf[i]).dot(np.real(p2))
+                part2 = np.imag(pf[i]).dot(np.imag(p2))
+                for c, offset in [(part1 - part2, 0), (part1 + part2, n_theta_half)]:
+                    cl1, cl2 = np.unravel_index(c.argmax(), c.shape)
+                    if 2 * c[cl1, cl2] > best:
+                        best = 2 * c[cl1, cl2]
+                        clmatrix[i, j], clmatrix[j, i] = cl1, cl2 + offset
+                        shifts_1d[i, j] = shift
+
+    return shifts_1d, clmatrix
+
+
+def test_build_clmatrix_tiles():
+    """
+    Test the tiled, threaded common line search matches a pair by pair search.
+    """
+    src = Simulation(
+        n=12,
+        L=32,
+        vols=AsymmetricVolume(L=32, C=1, K=100, seed=0).generate(),
+        amplitudes=1,
+        seed=0,
+    )
+    orient_est = CLOrient3D(src, max_shift=0.15)
+    ref_shifts_1d, ref_clmatrix = _reference_clmatrix(orient_est)
+
+    tile_bytes = config["abinitio"]["clmatrix_tile_bytes"].get()
+    threads = config["abinitio"]["clmatrix_threads"].get()
+    try:
+        # Tiles of a single pair, with several threads.
+        config["abinitio"]["clmatrix_tile_bytes"] = 1
+        config["abinitio"]["clmatrix_threads"] = 3
+        shifts_1d, clmatrix = orient_est.build_clmatrix_host()
+    finally:
+        config["abinitio"]["clmatrix_tile_bytes"] = tile_bytes
+        config["abinitio"]["clmatrix_threads"] = threads
+
+    np.testing.assert_array_equal(clmatrix, ref_clmatrix)
+    np.testing.assert_array_equal(shifts_1d, ref_shifts_1d)
+
+    # Default tiling.
+    shifts_1d, clmatrix = orient_est.build_clmatrix_host()
+    np.testing.assert_array_equal(clmatrix, ref_clmatrix)
+    np.testing.assert_array_equal(shifts_1d, ref_shifts_1d)
+
+    # Random subsets of pairs with `n_check` are drawn as before.
+    orient_est = CLOrient3D(src, max_shift=0.15, n_check=5)
+    with Random(0):
+        _, clmatrix = orient_est.build_clmatrix_host()
+    assert np.count_nonzero(clmatrix[np.triu_indices(src.n, 1)] >= 0) == sum(
+        min(src.n - i - 1, 5) for i in range(src.n - 1)
+    )
+
+
 def test_command_line():
     # Ensure that the command line tool works as expected
     runner = CliRunner()
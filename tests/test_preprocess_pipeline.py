@@ -4,6 +4,15 @@ import os.path
 import numpy as np
 import pytest
 
+from aspire.image import Image
+from aspire.image.xform import (
+    Downsample,
+    FilterXform,
+    IndexedXform,
+    Multiply,
+    Pipeline,
+    Shift,
+)
 from aspire.noise import (
     AnisotropicNoiseEstimator,
     CustomNoiseAdder,
@@ -247,3 +256,53 @@ def testInvertContrast(L, dtype):
     # dtype of returned images should be the same
     assert dtype == imgs1_rc.dtype
     assert dtype == imgs2_rc.dtype
+
+
+@pytest.mark.parametrize("L, dtype", params)
+def testFusedPipeline(L, dtype):
+    """
+    Fused Fourier-diagonal Xforms should match applying them one at a time.
+    """
+    n = 16
+    rng = np.random.default_rng(0)
+    im = Image(rng.standard_normal((n, L, L)).astype(dtype), pixel_size=1.5)
+    indices = np.arange(n)[::-1].copy()
+
+    filters = [RadialCTFFilter(defocus=d) for d in (1.5e4, 2e4, 2.5e4)]
+    filter_indices = rng.integers(0, len(filters), size=n)
+    xforms = [
+        Shift(rng.uniform(-3, 3, size=(n, 2))),
+        Multiply(-1.5),
+        IndexedXform([FilterXform(f.sign) for f in filters], filter_indices),
+        Downsample(L // 2 + 1),
+        FilterXform(RadialCTFFilter(defocus=1e4)),
+        Downsample(L // 2),
+        Shift(np.array([0.5, -1.25])),
+    ]
+
+    fused = Pipeline(xforms, fuse=True)
+    unfused = Pipeline(xforms, fuse=False)
+    # All Xforms form a single fused run.
+    assert len(fused._runs()) == 1
+
+    im_fused = fused.forward(im, indices)
+    im_unfused = unfused.forward(im, indices)
+    assert im_fused.dtype == dtype
+    assert im_fused.pixel_size == im_unfused.pixel_size
+    np.testing.assert_allclose(
+        im_fused, im_unfused, atol=utest_tolerance(dtype), rtol=1e-4
+    )
+
+
+@pytest.mark.parametrize("L, dtype", params)
+def testFusedSourcePreprocessing(L, dtype):
+    """
+    Standard downsample, phase flip and whiten chain with and without fusion.
+    """
+    sim = get_sim_object(L, dtype)
+    src = sim.downsample(L // 2).phase_flip().whiten(AnisotropicNoiseEstimator(sim))
+    fused = src.images[:32]
+    src.generation_pipeline.fuse = False
+    unfused = src.images[:32]
+
+    np.testing.assert_allclose(fused, unfused, atol=utest_tolerance(dtype), rtol=1e-4)
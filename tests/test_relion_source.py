@@ -1,9 +1,13 @@
 import logging
 import os
+from collections import OrderedDict
 
+import mrcfile
+import numpy as np
 import pytest
 
 from aspire.source import RelionSource
+from aspire.storage import StarFile
 from aspire.volume import SymmetryGroup
 
 from .test_starfile_stack import StarFileTestCase
@@ -56,3 +60,84 @@ def test_symmetry_group(caplog):
 
     assert isinstance(src_override_sym.symmetry_group, SymmetryGroup)
     assert str(src_override_sym.symmetry_group) == "C6"
+
+
+def test_disk_cache_rebuilt_on_stack_change(tmp_path):
+    """
+    Test an on-disk cache is rebuilt when a referenced stack changes.
+    """
+    data = np.arange(3 * 8 * 8, dtype=np.float32).reshape(3, 8, 8)
+    stack = tmp_path / "s0.mrcs"
+    with mrcfile.new(stack) as mrc:
+        mrc.set_data(data)
+    starfile = tmp_path / "p.star"
+    StarFile(
+        blocks=OrderedDict(
+            {"": {"_rlnImageName": [f"{i + 1:06}@s0.mrcs" for i in range(3)]}}
+        )
+    ).write(starfile)
+    cache_dir = tmp_path / "cache"
+
+    cached = RelionSource(starfile).cache(cache_dir=cache_dir)
+    np.testing.assert_array_equal(cached.images[:], data)
+
+    # Modify the stack in place, explicitly advancing the modification time
+    # in case the filesystem timestamp resolution is coarse.
+    with mrcfile.open(stack, mode="r+") as mrc:
+        mrc.data[:] = -data
+    st = os.stat(stack)
+    os.utime(stack, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    recached = RelionSource(starfile).cache(cache_dir=cache_dir)
+    np.testing.assert_array_equal(recached.images[:], -data)
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_metadata_index(tmp_path, caplog):
+    """
+    Test the metadata index sidecar is written, reused and regenerated when stale.
+    """
+    data = np.arange(4 * 8 * 8, dtype=np.float32).reshape(4, 8, 8)
+    with mrcfile.new(tmp_path / "s0.mrcs") as mrc:
+        mrc.set_data(data)
+    starfile = tmp_path / "p.star"
+    blocks = OrderedDict(
+        {
+            "": {
+                "_rlnImageName": [f"{i + 1:06}@s0.mrcs" for i in range(4)],
+                "_rlnDefocusU": [1e4, 1.5e4, 1e4, 2e4],
+            }
+        }
+    )
+    StarFile(blocks=blocks).write(starfile)
+    index_path = tmp_path / "p.star.index.npz"
+
+    src = RelionSource(starfile)
+    assert not index_path.exists()
+
+    caplog.set_level(logging.INFO)
+    src_write = RelionSource(starfile, metadata_index=True)
+    assert index_path.exists()
+    assert "Wrote metadata index" in caplog.text
+
+    caplog.clear()
+    src_read = RelionSource(starfile, metadata_index=True, max_rows=3)
+    assert "Loaded metadata index" in caplog.text
+    assert src_read.n == 3
+    for k, v in src._metadata.items():
+        np.testing.assert_array_equal(src_write._metadata[k], v)
+        np.testing.assert_array_equal(src_read._metadata[k], v[:3])
+        assert src_read._metadata[k].dtype == v.dtype
+    np.testing.assert_array_equal(src_read.images[:], data[:3])
+
+    # Rewriting the STAR file invalidates the index.
+    blocks[""]["_rlnImageName"] = blocks[""]["_rlnImageName"][::-1]
+    StarFile(blocks=blocks).write(starfile)
+    st = os.stat(starfile)
+    os.utime(starfile, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    caplog.clear()
+    src_stale = RelionSource(starfile, metadata_index=str(index_path))
+    assert "is stale" in caplog.text
+    assert "Wrote metadata index" in caplog.text
+    np.testing.assert_array_equal(src_stale.images[:], data[::-1])
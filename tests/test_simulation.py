@@ -4,6 +4,7 @@ import tempfile
 from unittest import TestCase
 
 import numpy as np
+import pytest
 from pytest import raises
 
 from aspire.noise import WhiteNoiseAdder
@@ -673,6 +674,102 @@ def test_cached_image_accessors():
     )
 
 
+def test_disk_cached_images():
+    """
+    Test caching images to, and reusing them from, disk.
+    """
+    src = Simulation(
+        L=16, n=10, C=1, noise_adder=WhiteNoiseAdder(var=0.123), seed=7
+    ).downsample(8)
+
+    with tempfile.TemporaryDirectory() as tmpdir_name:
+        cached_src = src.cache(cache_dir=tmpdir_name)
+        np.testing.assert_allclose(cached_src.images[:], src.images[:], atol=1e-6)
+        assert len(os.listdir(tmpdir_name)) == 1
+
+        # An identically constructed source reuses the same file.
+        same_src = Simulation(
+            L=16, n=10, C=1, noise_adder=WhiteNoiseAdder(var=0.123), seed=7
+        ).downsample(8)
+        assert same_src._cache_key() == src._cache_key()
+        same_src.cache(cache_dir=tmpdir_name)
+        assert len(os.listdir(tmpdir_name)) == 1
+
+        # Changing the pipeline changes the key.
+        other_src = src.downsample(4).cache(cache_dir=tmpdir_name)
+        assert len(os.listdir(tmpdir_name)) == 2
+        np.testing.assert_allclose(
+            other_src.images[:], src.downsample(4).images[:], atol=1e-6
+        )
+
+        # Views of a disk cached source read from the cache.
+        view = cached_src[2:6]
+        np.testing.assert_allclose(view.images[:], src.images[2:6], atol=1e-6)
+
+
+@pytest.mark.parametrize("prefetch", [0, 1, 3])
+def test_iter_batches(prefetch):
+    """
+    Test batches are yielded in order and match direct image access.
+    """
+    src = Simulation(L=8, n=23, C=1, noise_adder=WhiteNoiseAdder(var=0.1), seed=5)
+    expected = src.images[:].asnumpy()
+
+    starts = []
+    for start, im in src.iter_batches(batch_size=5, prefetch=prefetch):
+        starts.append(start)
+        np.testing.assert_array_equal(im, expected[start : start + 5])
+    assert starts == list(range(0, 23, 5))
+
+    # Sub-range iteration.
+    batches = list(src.iter_batches(batch_size=4, prefetch=prefetch, start=3, stop=12))
+    assert [b[0] for b in batches] == [3, 7, 11]
+    np.testing.assert_array_equal(
+        np.concatenate([b[1].asnumpy() for b in batches]), expected[3:12]
+    )
+
+    # Stopping early is safe.
+    for start, _ in src.iter_batches(batch_size=2, prefetch=prefetch):
+        if start >= 4:
+            break
+
+
+@pytest.mark.parametrize("L, dtype", [(32, np.float32), (33, np.float64)])
+def test_apply_filters(L, dtype):
+    """
+    Batched filter application should match filtering each group in turn.
+    """
+    sim = Simulation(
+        L=L,
+        n=32,
+        unique_filters=[
+            RadialCTFFilter(defocus=d) for d in np.linspace(1.5e4, 2.5e4, 7)
+        ],
+        offsets=0,
+        amplitudes=1,
+        dtype=dtype,
+    )
+    indices = np.arange(sim.n)[::-1]
+    im = sim.projections[indices]
+    filter_indices = sim.filter_indices[indices]
+    # Mark a few images as having no filter.
+    filter_indices[:3] = -1
+
+    ref = im.copy()
+    for i, filt in enumerate(sim.unique_filters):
+        idx_k = np.where(filter_indices == i)[0]
+        if len(idx_k) > 0:
+            ref[idx_k] = im[idx_k].filter(filt).asnumpy()
+
+    res = sim._apply_filters(im, sim.unique_filters, filter_indices)
+
+    assert res.dtype == dtype
+    np.testing.assert_array_equal(res[:3], im[:3])
+    # Filters are evaluated on a singles grid for either dtype,
+    # so the batched and per-filter CTFs agree to singles precision.
+    np.testing.assert_allclose(res, ref, atol=utest_tolerance(np.float32))
+
+
 def test_save_overwrite(caplog):
     """
     Test that the overwrite flag behaves as expected.
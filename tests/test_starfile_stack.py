@@ -1,5 +1,7 @@
 import os
 import os.path
+import tempfile
+from collections import OrderedDict
 from unittest import TestCase
 
 import mrcfile
@@ -8,6 +10,7 @@ import numpy as np
 import tests.saved_test_data
 from aspire.image import Image
 from aspire.source.relion import RelionSource
+from aspire.storage import StarFile
 from aspire.utils import importlib_path
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "saved_test_data")
@@ -16,12 +19,18 @@ DATA_DIR = os.path.join(os.path.dirname(__file__), "saved_test_data")
 class StarFileTestCase(TestCase):
     # Default dtype (inferred)
     _dtype = None
+    # Default non memory-mapped reads
+    _mmap = False
 
     def setUpStarFile(self, starfile_name):
         # set up RelionSource object for tests
         with importlib_path(tests.saved_test_data, starfile_name) as starfile:
             self.src = RelionSource(
-                starfile, data_folder=DATA_DIR, max_rows=12, dtype=self._dtype
+                starfile,
+                data_folder=DATA_DIR,
+                max_rows=12,
+                dtype=self._dtype,
+                mmap=self._mmap,
             )
 
     def setUp(self):
@@ -60,6 +69,14 @@ class StarFileMainCase(StarFileTestCase):
             3073.912046, self.src.get_metadata("_rlnCoordinateY", [0])
         )
 
+    def testImageUnorderedIndices(self):
+        # Images requested out of order, with repeats, should match
+        # the corresponding images requested one at a time.
+        indices = np.array([7, 2, 11, 2, 0, 5])
+        images = self.src.images[indices].asnumpy()
+        for i, idx in enumerate(indices):
+            np.testing.assert_array_equal(images[i], self.src.images[idx].asnumpy()[0])
+
     def testImageDownsample(self):
         self.src = self.src.downsample(16)
         first_image = self.src.images[0].asnumpy()[0]
@@ -126,3 +143,76 @@ class StarFileDtypeOverrideCase64(StarFileMainCase):
 class StarFileDtypeOverrideCase32(StarFileMainCase):
     # Override RelionSource dtype
     _dtype = np.float32
+
+
+class StarFileMmapCase(StarFileMainCase):
+    # Read particles through memory-mapped handles
+    _mmap = True
+
+    def testMatchesNonMmap(self):
+        """Test memory-mapped reads match default reads."""
+        with importlib_path(
+            tests.saved_test_data, "sample_particles_relion31.star"
+        ) as starfile:
+            src = RelionSource(starfile, data_folder=DATA_DIR, max_rows=12)
+        idx = np.arange(self.src.n)[::-1]
+        np.testing.assert_array_equal(
+            self.src.images[idx].asnumpy(), src.images[idx].asnumpy()
+        )
+
+    def testHandlePool(self):
+        """Test handles are reused and bounded."""
+        self.src.images[:]
+        n_open = len(self.src._mrc_pool)
+        self.assertTrue(n_open >= 1)
+        self.src.images[:]
+        self.assertEqual(len(self.src._mrc_pool), n_open)
+
+        # Copies of the source do not share open handles.
+        src = self.src.downsample(16)
+        self.assertEqual(len(src._mrc_pool), 0)
+        _ = src.images[0]
+        self.assertEqual(len(self.src._mrc_pool), n_open)
+
+
+class StarFileMultiStackMmapCase(TestCase):
+    """
+    Read particles spread over several stacks through a small handle pool.
+    """
+
+    n_stacks = 8
+    n_per_stack = 5
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.data = rng.standard_normal(
+            (self.n_stacks, self.n_per_stack, 8, 8), dtype=np.float32
+        )
+        names = []
+        for s in range(self.n_stacks):
+            with mrcfile.new(os.path.join(self.tmpdir.name, f"s{s}.mrcs")) as mrc:
+                mrc.set_data(self.data[s])
+            names.extend(f"{i + 1:06}@s{s}.mrcs" for i in range(self.n_per_stack))
+        # Interleave particles from different stacks in the STAR file.
+        self.order = rng.permutation(len(names))
+        self.starfile = os.path.join(self.tmpdir.name, "particles.star")
+        StarFile(
+            blocks=OrderedDict({"": {"_rlnImageName": [names[i] for i in self.order]}})
+        ).write(self.starfile)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def testBoundedPoolReads(self):
+        src = RelionSource(self.starfile, mmap=True, max_open_files=1, n_workers=4)
+        src_ref = RelionSource(self.starfile)
+        expected = self.data.reshape(-1, 8, 8)[self.order]
+
+        rng = np.random.default_rng(1)
+        for _ in range(3):
+            idx = rng.permutation(src.n)
+            im = src.images[idx].asnumpy()
+            self.assertLessEqual(len(src._mrc_pool), 1)
+            np.testing.assert_array_equal(im, src_ref.images[idx].asnumpy())
+            np.testing.assert_array_equal(im, expected[idx])
@@ -5,12 +5,13 @@ from itertools import zip_longest
 from unittest import TestCase
 
 import numpy as np
+import pytest
 from scipy.datasets import face
 
 import tests.saved_test_data
 from aspire.image import Image
 from aspire.source import ArrayImageSource
-from aspire.storage import StarFile, StarFileError
+from aspire.storage import StarFile, StarFileError, iter_star_loop, read_star_loop
 from aspire.utils import RelionStarFile, importlib_path
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "saved_test_data")
@@ -213,3 +214,149 @@ class StarFileTestCase(TestCase):
             [np.array([data_block_legacy[c][i] for c in ctf_params]) for i in range(n)]
         )
         self.assertTrue(np.all(_ctf_current == _ctf_legacy))
+
+
+STAR_FILES = [
+    "sample_data_model.star",
+    "sample_particles_relion30.star",
+    "sample_particles_relion31.star",
+    "sample_relion_one_image.star",
+]
+
+
+@pytest.mark.parametrize("star_file", STAR_FILES)
+def test_reader_matches_gemmi(star_file):
+    """
+    The line based reader should match parsing with gemmi.
+    """
+    path = os.path.join(DATA_DIR, star_file)
+    star = StarFile(path)
+
+    ref = StarFile()
+    ref.filepath = path
+    ref._read_blocks_gemmi()
+
+    assert star == ref
+
+
+def test_reader_fallback(tmp_path):
+    """
+    Quoted values are not handled by the line based reader,
+    and should fall back to gemmi.
+    """
+    path = tmp_path / "quoted.star"
+    path.write_text(
+        "data_\n\nloop_\n_rlnImageName #1\n_rlnDefocusU #2\n"
+        "1@a.mrcs 10000.0\n'2@b c.mrcs' 20000.0\n3@a.mrcs 30000.0\n"
+    )
+    star = StarFile(path)
+    assert star[""]["_rlnImageName"] == ["1@a.mrcs", "'2@b c.mrcs'", "3@a.mrcs"]
+
+    # Streaming resumes with gemmi after the rows already yielded.
+    chunks = list(
+        iter_star_loop(path, column_types={"_rlnDefocusU": float}, chunk_size=1)
+    )
+    assert len(chunks) == 3
+    np.testing.assert_array_equal(
+        np.concatenate([c["_rlnDefocusU"] for c in chunks]), [1e4, 2e4, 3e4]
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 65536])
+def test_iter_star_loop(chunk_size):
+    path = os.path.join(DATA_DIR, "sample_particles_relion31.star")
+    ref = StarFile(path)["particles"]
+    columns = ["_rlnDefocusU", "_rlnImageName", "_rlnOpticsGroup"]
+    column_types = {"_rlnDefocusU": float, "_rlnOpticsGroup": int}
+
+    chunks = list(
+        iter_star_loop(
+            path,
+            block="particles",
+            columns=columns,
+            column_types=column_types,
+            start=2,
+            stop=11,
+            chunk_size=chunk_size,
+        )
+    )
+    assert all(len(c["_rlnDefocusU"]) <= chunk_size for c in chunks)
+    assert all(list(c) == columns for c in chunks)
+
+    res = read_star_loop(
+        path,
+        block="particles",
+        columns=columns,
+        column_types=column_types,
+        start=2,
+        stop=11,
+    )
+    for col in columns:
+        streamed = np.concatenate([c[col] for c in chunks])
+        np.testing.assert_array_equal(streamed, res[col])
+        expected = np.array(ref[col][2:11]).astype(column_types.get(col, str))
+        np.testing.assert_array_equal(res[col], expected)
+        assert res[col].dtype == expected.dtype
+
+    # Empty row range keeps the columns and types.
+    res = read_star_loop(path, block="particles", column_types=column_types, start=100)
+    assert res["_rlnDefocusU"].dtype == np.float64
+    assert len(res["_rlnDefocusU"]) == 0
+
+    with pytest.raises(StarFileError, match="not found"):
+        read_star_loop(path, block="particles", columns=["_rlnBogus"])
+
+
+def test_relion_starfile_typed_columns():
+    """
+    RelionStarFile loop columns are parsed directly into typed arrays.
+    """
+    path = os.path.join(DATA_DIR, "sample_particles_relion31.star")
+    block = RelionStarFile(path).get_merged_data_block()
+    assert block["_rlnDefocusU"].dtype == np.float64
+    assert block["_rlnOpticsGroup"].dtype == int
+    assert block["_rlnImageName"].dtype.kind == "U"
+    # Optics columns are merged per row.
+    np.testing.assert_array_equal(
+        block["_rlnVoltage"], np.where(block["_rlnOpticsGroup"] == 1, 300.0, 200.0)
+    )
+
+
+def test_write_matches_gemmi(tmp_path):
+    """
+    Bulk written STAR files should match gemmi's formatting.
+    """
+    from gemmi import cif
+
+    blocks = OrderedDict()
+    blocks["optics"] = {"_rlnVoltage": 300.0, "_rlnOpticsGroupName": "og1"}
+    blocks["empty"] = {}
+    blocks["particles"] = {
+        "_rlnDefocusU": np.linspace(1e4, 2e4, 11, dtype=np.float32),
+        "_rlnClassNumber": np.arange(11),
+        "_rlnImageName": np.array([f"{i:06}@a.mrcs" for i in range(11)], dtype=object),
+    }
+    star = StarFile(blocks=blocks)
+    # Exercise chunked writing.
+    star._write_chunk_size = 4
+    star.write(tmp_path / "aspire.star")
+
+    doc = cif.Document()
+    for name, block in star.blocks.items():
+        gemmi_block = doc.add_new_block(name)
+        if name == "optics":
+            for k, v in block.items():
+                gemmi_block.set_pair(k, v)
+        elif name == "particles":
+            loop = gemmi_block.init_loop("", list(block))
+            for row in zip(*block.values()):
+                loop.add_row(list(row))
+    doc.write_file(str(tmp_path / "gemmi.star"))
+
+    assert (tmp_path / "aspire.star").read_text() == (
+        tmp_path / "gemmi.star"
+    ).read_text()
+    # Note empty blocks are not read back.
+    read_back = StarFile(tmp_path / "aspire.star")
+    assert list(read_back.blocks) == ["optics", "particles"]
+    assert read_back["particles"] == star["particles"]
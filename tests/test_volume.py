@@ -1,5 +1,6 @@
 import logging
 import os
+import pickle
 import tempfile
 import warnings
 from datetime import datetime
@@ -12,7 +13,7 @@ from numpy import pi
 from pytest import raises, skip
 
 from aspire.source import _LegacySimulation
-from aspire.utils import Rotation, anorm, grid_2d, powerset, utest_tolerance
+from aspire.utils import Rotation, anorm, grid_2d, grid_3d, powerset, utest_tolerance
 from aspire.volume import (
     AsymmetricVolume,
     CnSymmetricVolume,
@@ -20,6 +21,8 @@ from aspire.volume import (
     SymmetryGroup,
     TSymmetryGroup,
     Volume,
+    rotated_grids,
+    rotated_grids_3d,
 )
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "saved_test_data")
@@ -818,6 +821,65 @@ def test_project_broadcast(dtype):
         _ = vols.project(rots[:2])
 
 
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_project_outer(dtype):
+    L = 16
+
+    n_vols, n_rots = 3, 5
+    vols = AsymmetricVolume(L=L, C=n_vols, dtype=dtype).generate()
+    rots = Rotation.generate_random_rotations(n_rots, dtype=dtype, seed=0)
+
+    # Project each Volume with each Rotation, using small chunks of rotations.
+    projs = vols.project(rots, outer=True, max_bytes=1)
+    assert projs.stack_shape == (n_vols, n_rots)
+    for i in range(n_vols):
+        np.testing.assert_allclose(
+            projs[i].asnumpy(),
+            vols[i].project(rots).asnumpy(),
+            atol=utest_tolerance(dtype),
+        )
+
+    # Element-wise projection with repeated rotations is batched by rotation.
+    rot_ids = np.array([1, 3, 1])
+    projs_3_3 = vols.project(rots[rot_ids]).asnumpy()
+    np.testing.assert_allclose(
+        projs_3_3,
+        projs.asnumpy()[np.arange(n_vols), rot_ids],
+        atol=utest_tolerance(dtype),
+    )
+
+
+@pytest.mark.parametrize("L", [7, 8])
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_rotated_grids(L, dtype):
+    rots = Rotation.generate_random_rotations(4, dtype=dtype, seed=0).matrices
+
+    # Compare with rotating each grid point directly.
+    g2 = grid_2d(L, indexing="yx", dtype=dtype)
+    pts = np.pi * np.stack([g2["x"], g2["y"], np.zeros_like(g2["x"])], axis=-1)
+    ref = np.einsum("kij,yxj->ikyx", rots, pts)[::-1]
+    grids = rotated_grids(L, rots)
+    assert grids.dtype == dtype
+    np.testing.assert_allclose(grids, ref, atol=utest_tolerance(dtype))
+
+    g3 = grid_3d(L, indexing="zyx", dtype=dtype)
+    pts = np.pi * np.stack([g3["x"], g3["y"], g3["z"]], axis=-1)
+    ref = np.einsum("kij,zyxj->ikzyx", rots, pts)[::-1].reshape(3, -1)
+    grids_3d = rotated_grids_3d(L, rots)
+    np.testing.assert_allclose(grids_3d, ref, atol=utest_tolerance(dtype))
+
+    # Results can be written to a caller supplied buffer.
+    out = np.empty_like(grids)
+    assert rotated_grids(L, rots, out=out) is out
+    np.testing.assert_array_equal(out, grids)
+    out = np.empty_like(grids_3d)
+    assert rotated_grids_3d(L, rots, out=out) is out
+    np.testing.assert_array_equal(out, grids_3d)
+
+    with raises(ValueError, match=r".*must be a C contiguous.*"):
+        rotated_grids(L, rots, out=np.empty((3, 4, L, L + 1), dtype=dtype))
+
+
 # SYM_GROUP_PARAMS consists of (initializing method, string representation).
 # Testing just the basic cases of setting the symmetry group from
 # a SymmetryGroup instance, a string, and the default.
@@ -920,3 +982,17 @@ def test_volume_load_with_symmetry():
     )
     assert isinstance(vol.symmetry_group, CnSymmetryGroup)
     assert str(vol.symmetry_group) == "C3"
+
+
+def test_pickle_round_trip(vols_1):
+    """
+    Test `Volume` survives pickling with a valid array interface.
+    """
+    vols = pickle.loads(pickle.dumps(vols_1))
+
+    np.testing.assert_array_equal(np.asarray(vols), np.asarray(vols_1))
+    assert str(vols.symmetry_group) == str(vols_1.symmetry_group)
+    # Array interface should point at the unpickled data.
+    assert (
+        vols.__array_interface__["data"][0] == vols._data.__array_interface__["data"][0]
+    )
@@ -196,3 +196,135 @@ def test_checkpoint_args(sim, basis, weights):
                     maxiter=junk,
                     checkpoint_prefix=prefix,
                 )
+
+
+def test_compute_kernel_pairs(sim, basis):
+    """
+    Test each (k, j) entry of the batched kernel matches the kernel
+    of a single volume, whose weights multiply to those of k and j.
+    """
+    r = 3
+    weights = np.random.default_rng(SEED).uniform(0.5, 1.5, (sim.n, r))
+    kernel = WeightedVolumesEstimator(
+        weights, sim, basis=basis, preconditioner="none", batch_size=100
+    )._compute_kernel()
+    assert kernel.shape == (r, r, 2 * sim.L, 2 * sim.L, sim.L + 1)
+
+    atol = 1e-6 * np.abs(kernel).max()
+    for k in range(r):
+        for j in range(r):
+            np.testing.assert_array_equal(kernel[k, j], kernel[j, k])
+            ref = WeightedVolumesEstimator(
+                np.sqrt(weights[:, k] * weights[:, j])[:, None],
+                sim,
+                basis=basis,
+                preconditioner="none",
+                batch_size=100,
+            )._compute_kernel()[0, 0]
+            np.testing.assert_allclose(kernel[k, j], ref / r, atol=atol)
+
+
+def test_num_procs(sim, basis, weights):
+    """
+    Test accumulating over several processes matches a single process.
+    """
+    kwargs = dict(basis=basis, preconditioner="none", batch_size=64)
+    serial = WeightedVolumesEstimator(weights, sim, num_procs=1, **kwargs)
+    sharded = WeightedVolumesEstimator(weights, sim, num_procs=3, **kwargs)
+
+    np.testing.assert_allclose(
+        sharded.src_backward(), serial.src_backward(), rtol=1e-5, atol=1e-8
+    )
+    kernel = serial._compute_kernel()
+    np.testing.assert_allclose(
+        sharded._compute_kernel(), kernel, atol=1e-5 * np.abs(kernel).max()
+    )
+
+    with pytest.raises(ValueError, match=r"`num_procs` should be a positive"):
+        _ = WeightedVolumesEstimator(weights, sim, num_procs=0, **kwargs)
+
+
+def test_accumulation_cache(tmp_path, sim, basis, weights):
+    """
+    Test the kernel and back projection sums are checkpointed, resumed and reused.
+    """
+    kwargs = dict(basis=basis, batch_size=32, cache_dir=tmp_path, checkpoint_batches=1)
+    ref = WeightedVolumesEstimator(weights, sim, basis=basis, batch_size=32)
+    ref_kernel = ref._compute_kernel()
+
+    # Interrupt the kernel accumulation after a few batches.
+    estimator = WeightedVolumesEstimator(weights, sim, **kwargs)
+    compute_pairs = estimator._compute_kernel_pairs
+    calls = []
+
+    def interrupted(start, stop):
+        if len(calls) == 3:
+            raise KeyboardInterrupt()
+        calls.append(start)
+        return compute_pairs(start, stop)
+
+    estimator._compute_kernel_pairs = interrupted
+    with pytest.raises(KeyboardInterrupt):
+        _ = estimator._compute_kernel()
+    assert len(list(tmp_path.glob("*kernel*.partial.npz"))) == 1
+
+    # A new run resumes at the first incomplete batch.
+    estimator = WeightedVolumesEstimator(weights, sim, **kwargs)
+    compute_pairs = estimator._compute_kernel_pairs
+    calls = []
+
+    def counted(start, stop):
+        calls.append(start)
+        return compute_pairs(start, stop)
+
+    estimator._compute_kernel_pairs = counted
+    np.testing.assert_allclose(estimator._compute_kernel(), ref_kernel, rtol=1e-5)
+    assert calls[0] == 3 * 32
+    assert not list(tmp_path.glob("*.partial.npz"))
+
+    # Runs differing in `cg` settings reuse the cached sums.
+    b_coef = estimator.src_backward()
+    estimator = WeightedVolumesEstimator(
+        weights, sim, preconditioner="none", maxiter=7, **kwargs
+    )
+    estimator._compute_kernel_pairs = estimator._src_backward_range = None
+    np.testing.assert_allclose(estimator._compute_kernel(), ref_kernel, rtol=1e-5)
+    np.testing.assert_allclose(estimator.src_backward(), b_coef)
+
+    # Changing the weights changes the key.
+    path = estimator._cache_path("kernel")
+    estimator = WeightedVolumesEstimator(2 * weights, sim, **kwargs)
+    assert estimator._cache_path("kernel") != path
+
+
+@pytest.mark.parametrize("preconditioner", ["block_circulant", "jacobi", "multigrid"])
+def test_preconditioners(sim, basis, weights, preconditioner):
+    """
+    Test named preconditioners converge to the unpreconditioned solution,
+    in no more iterations.
+    """
+    # Full rank weights, so the solution is unique.
+    weights = weights.copy()
+    weights[: sim.n // 2, 1] *= -1
+
+    reference = WeightedVolumesEstimator(
+        weights, sim, basis=basis, preconditioner=None, checkpoint_iterations=None
+    )
+    x_ref = reference.estimate(tol=1e-6)
+
+    estimator = WeightedVolumesEstimator(
+        weights,
+        sim,
+        basis=basis,
+        preconditioner=preconditioner,
+        checkpoint_iterations=None,
+    )
+    # Share the computed kernel and back projection.
+    estimator.kernel = reference.kernel
+    estimator.src_backward = reference.src_backward
+    x = estimator.estimate(tol=1e-6)
+
+    assert estimator.i <= reference.i
+    np.testing.assert_allclose(
+        x / np.linalg.norm(x_ref), x_ref / np.linalg.norm(x_ref), atol=1e-3
+    )